@@ -0,0 +1,247 @@
+"""
+Fit many independent Beta-Binomial models across a process pool.
+
+Every row of a table with attempts and successes columns (one detection method,
+survey slice, ...) is fitted on its own. The machine's cores are split between
+fits running in parallel (`workers`) and the chains inside each fit
+(`cores_per_fit`), so a 64-core box runs 64 single-core fits, or 32 fits with
+two parallel chains each, instead of one fit with 2 chains at a time.
+
+Each task gets a seed spawned from one `np.random.SeedSequence`, so results
+depend only on the base seed and the row order, not on which worker ran the fit
+or when it finished. Each worker keeps one compiled model
+(`models.ReusableModel`) and only swaps in the counts of the next task.
+
+Example:
+
+    from batch import run_batch
+
+    summary = run_batch(df, label_cols=["method"], workers=16, cores_per_fit=1)
+
+or from the command line (without a CSV the exoplanet table of
+beta_binomial_model.py is used)
+
+    python batch.py survey.csv --label method --label slice --workers 16
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+EXAMPLE_DATA = {
+    "method": ["Transit", "Radial Velocity", "Direct Imaging", "Microlensing"],
+    "attempts": [1000, 800, 200, 150],
+    "successes": [450, 320, 25, 18],
+}
+
+# Summary columns after the label columns
+RESULT_COLUMNS = [
+    "attempts", "successes", "mean", "sd", "hdi_lower", "hdi_upper",
+    "ess_bulk", "r_hat", "divergences", "seed", "seconds", "error",
+]
+
+
+@dataclass(frozen=True)
+class FitTask:
+    """One independent fit: a row of the input table"""
+    index: int
+    labels: Dict[str, object]
+    attempts: int
+    successes: int
+    seed: int
+
+
+@dataclass(frozen=True)
+class FitSettings:
+    """Prior and sampler settings shared by every task"""
+    alpha_prior: float = 1.0
+    beta_prior: float = 1.0
+    draws: int = 2000
+    tune: int = 1000
+    chains: int = 2
+    cores_per_fit: int = 1
+    target_accept: float = 0.9
+    hdi_prob: float = 0.95
+
+
+def split_cores(total_cores: Optional[int] = None, cores_per_fit: int = 1) -> int:
+    """Number of fits to run in parallel when each uses `cores_per_fit` cores"""
+    total_cores = total_cores or os.cpu_count() or 1
+    if cores_per_fit < 1:
+        raise ValueError("cores_per_fit must be at least 1")
+    return max(1, total_cores // cores_per_fit)
+
+
+def make_tasks(
+    df: pd.DataFrame,
+    label_cols: Sequence[str],
+    attempts_col: str = "attempts",
+    successes_col: str = "successes",
+    seed: int = 42,
+) -> List[FitTask]:
+    """One task per row, with seeds spawned from `SeedSequence(seed)` in row order"""
+    children = np.random.SeedSequence(seed).spawn(len(df))
+    return [
+        FitTask(
+            index=i,
+            labels={col: row[col] for col in label_cols},
+            attempts=int(row[attempts_col]),
+            successes=int(row[successes_col]),
+            seed=int(child.generate_state(1)[0]),
+        )
+        for i, ((_, row), child) in enumerate(zip(df.iterrows(), children))
+    ]
+
+
+# ReusableModels of this process, by prior
+_FITTERS: Dict[tuple, object] = {}
+
+
+def fit_task(task: FitTask, settings: FitSettings) -> dict:
+    """Fit one task and summarise its posterior; errors are returned, not raised"""
+    import logging
+
+    import arviz as az
+
+    from models import ReusableModel, beta_binomial_model
+
+    logging.getLogger("pymc").setLevel(logging.ERROR)
+    row = {**task.labels, "attempts": task.attempts, "successes": task.successes, "seed": task.seed}
+    start = time.perf_counter()
+    try:
+        prior = (settings.alpha_prior, settings.beta_prior)
+        if prior not in _FITTERS:
+            _FITTERS[prior] = ReusableModel(beta_binomial_model, alpha_prior=prior[0], beta_prior=prior[1])
+        trace = _FITTERS[prior].fit(
+            [task.attempts],
+            [task.successes],
+            draws=settings.draws,
+            tune=settings.tune,
+            chains=settings.chains,
+            cores=settings.cores_per_fit,
+            random_seed=task.seed,
+            target_accept=settings.target_accept,
+            progressbar=False,
+        )
+        stats = az.summary(trace, var_names=["detection_probability"], hdi_prob=settings.hdi_prob).iloc[0]
+        hdi = stats.filter(like="hdi_")
+        row.update(
+            mean=stats["mean"],
+            sd=stats["sd"],
+            hdi_lower=hdi.iloc[0],
+            hdi_upper=hdi.iloc[1],
+            ess_bulk=stats["ess_bulk"],
+            r_hat=stats["r_hat"],
+            divergences=int(trace.sample_stats["diverging"].sum()),
+            error=None,
+        )
+    except Exception as exc:
+        row["error"] = f"{type(exc).__name__}: {exc}"
+    row["seconds"] = time.perf_counter() - start
+    return row
+
+
+def print_progress(done: int, total: int, row: dict) -> None:
+    status = row["error"] or f"mean={row['mean']:.4f}"
+    labels = ", ".join(str(v) for k, v in row.items() if k not in RESULT_COLUMNS)
+    print(f"[{done}/{total}] {labels}: {status} ({row['seconds']:.1f} s)", flush=True)
+
+
+def run_batch(
+    df: pd.DataFrame,
+    label_cols: Sequence[str] = ("method",),
+    attempts_col: str = "attempts",
+    successes_col: str = "successes",
+    workers: Optional[int] = None,
+    cores_per_fit: int = 1,
+    seed: int = 42,
+    progress: Optional[Callable[[int, int, dict], None]] = print_progress,
+    **settings,
+) -> pd.DataFrame:
+    """
+    Fit an independent Beta-Binomial model to every row of `df`.
+
+    Args:
+        df: One row per fit
+        label_cols: Columns identifying a row, copied into the summary
+        attempts_col, successes_col: Count columns
+        workers: Fits running in parallel (default: all cores // cores_per_fit);
+         1 fits in this process
+        cores_per_fit: Cores (parallel chains) per fit
+        seed: Base seed; task seeds are spawned from it in row order
+        progress: Called as `progress(done, total, row)` after every fit, or None
+        **settings: `FitSettings` fields (priors, draws, tune, chains, ...)
+
+    Returns:
+        pd.DataFrame: One summary row per input row, in input order, with the
+         posterior mean, sd, HDI, ESS, r-hat, divergences, seed, wall time and
+         error (None on success)
+    """
+    settings = FitSettings(cores_per_fit=cores_per_fit, **settings)
+    tasks = make_tasks(df, label_cols, attempts_col, successes_col, seed)
+    workers = split_cores(None, cores_per_fit) if workers is None else workers
+    workers = max(1, min(workers, len(tasks)))
+
+    rows = [None] * len(tasks)
+    if workers == 1:
+        for done, task in enumerate(tasks, 1):
+            rows[task.index] = fit_task(task, settings)
+            if progress is not None:
+                progress(done, len(tasks), rows[task.index])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(fit_task, task, settings): task for task in tasks}
+            for done, future in enumerate(as_completed(futures), 1):
+                task = futures[future]
+                rows[task.index] = future.result()
+                if progress is not None:
+                    progress(done, len(tasks), rows[task.index])
+    return pd.DataFrame(rows, columns=[*label_cols, *RESULT_COLUMNS])
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fit independent Beta-Binomial models in parallel")
+    parser.add_argument("csv", nargs="?", help="Table with label, attempts and successes columns")
+    parser.add_argument("--label", action="append", help="Label column (repeatable; default: method)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cores-per-fit", type=int, default=1)
+    parser.add_argument("--draws", type=int, default=2000)
+    parser.add_argument("--tune", type=int, default=1000)
+    parser.add_argument("--chains", type=int, default=2)
+    parser.add_argument("--alpha-prior", type=float, default=2.0)
+    parser.add_argument("--beta-prior", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the summary table to this CSV")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv) if args.csv else pd.DataFrame(EXAMPLE_DATA)
+    start = time.perf_counter()
+    summary = run_batch(
+        df,
+        label_cols=args.label or ["method"],
+        workers=args.workers,
+        cores_per_fit=args.cores_per_fit,
+        seed=args.seed,
+        draws=args.draws,
+        tune=args.tune,
+        chains=args.chains,
+        alpha_prior=args.alpha_prior,
+        beta_prior=args.beta_prior,
+    )
+    elapsed = time.perf_counter() - start
+    print()
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"\n{len(summary)} fits in {elapsed:.1f} s ({len(summary) / elapsed:.2f} fits/s)")
+    if args.output:
+        summary.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Build, compile and sampling time of the hierarchical Beta-Binomial model with one
+Binomial node per group (the original loop) against the vectorized builder in
+`models.py`, at 4, 100 and 10,000 groups.
+
+Run with
+
+    python benchmark_hierarchical.py [--groups 4 100 10000] [--draws 200]
+
+The loop version creates one PyTensor node per group, so its build and compile
+time grow with the number of groups; it is skipped above `--max-loop-groups`.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import pymc as pm
+
+import metrics
+from models import hierarchical_model
+
+
+def loop_model(attempts, successes) -> pm.Model:
+    """The original model: one observed Binomial per group"""
+    with pm.Model() as model:
+        mu = pm.Beta("population_mean", alpha=1, beta=1)
+        kappa = pm.Exponential("population_concentration", lam=0.1)
+        p = pm.Beta("method_probabilities", alpha=mu * kappa, beta=(1 - mu) * kappa, shape=len(attempts))
+        for i in range(len(attempts)):
+            pm.Binomial(f"detections_{i}", n=attempts[i], p=p[i], observed=successes[i])
+    return model
+
+
+def synthetic_counts(n_groups: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    attempts = rng.integers(50, 1000, n_groups)
+    rates = rng.beta(4, 8, n_groups)
+    return attempts, rng.binomial(attempts, rates)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def measure(build, attempts, successes, draws: int, tune: int, sample: bool) -> dict:
+    model, build_s = timed(lambda: build(attempts, successes))
+    _, compile_s = timed(lambda: (model.compile_logp(), model.compile_dlogp()))
+    row = {"nodes": len(model.observed_RVs) + len(model.free_RVs), "build_s": build_s, "compile_s": compile_s}
+    if sample:
+        with model:
+            _, sample_s = timed(lambda: metrics.sample(
+                draws, tune=tune, chains=1, cores=1, random_seed=42, progressbar=False, compute_convergence_checks=False
+            ))
+        row["sample_s"] = sample_s
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--groups", type=int, nargs="+", default=[4, 100, 10000])
+    parser.add_argument("--draws", type=int, default=200)
+    parser.add_argument("--tune", type=int, default=200)
+    parser.add_argument("--max-loop-groups", type=int, default=100)
+    parser.add_argument("--no-sample", action="store_true", help="Only time model build and compilation")
+    args = parser.parse_args()
+
+    rows = []
+    for n_groups in args.groups:
+        attempts, successes = synthetic_counts(n_groups)
+        builders = {"vectorized": hierarchical_model}
+        if n_groups <= args.max_loop_groups:
+            builders["loop"] = loop_model
+        for name, build in builders.items():
+            row = measure(build, attempts, successes, args.draws, args.tune, not args.no_sample)
+            rows.append({"groups": n_groups, "model": name, **row})
+            print(rows[-1], flush=True)
+
+    print()
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
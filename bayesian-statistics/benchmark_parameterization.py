@@ -0,0 +1,95 @@
+"""
+Centered Beta against non-centered logit-normal parameterization of the
+hierarchical model: ESS per second, divergences, tree-depth saturation and how
+closely the two posteriors of the group rates agree, at small and large group
+counts.
+
+Attempts per group are log-uniform from 2 to `--max-attempts`: with 20 most
+groups are barely informed by their data, which is where the centered funnel
+bites; with 1000 most are well informed. The
+two models use different population priors, so small differences in the group
+rates are expected; the agreement columns show how small.
+
+Run with
+
+    python benchmark_parameterization.py [--groups 4 100 1000] [--max-attempts 20 1000] [--target-accept 0.8 0.9]
+"""
+
+import argparse
+import itertools
+import logging
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from models import PARAMETERIZATIONS, hierarchical_model
+
+
+def synthetic_counts(n_groups: int, max_attempts: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    # Log-uniform attempts between 2 and max_attempts
+    attempts = np.round(np.exp(rng.uniform(np.log(2), np.log(max_attempts), n_groups))).astype(np.int64)
+    rates = rng.beta(4, 12, n_groups)
+    return attempts, rng.binomial(attempts, rates)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--groups", type=int, nargs="+", default=[4, 100, 1000])
+    parser.add_argument("--target-accept", type=float, nargs="+", default=[0.8, 0.9])
+    parser.add_argument(
+        "--max-attempts", type=int, nargs="+", default=[20, 1000],
+        help="Attempts per group are log-uniform from 2 to this; small values mean weakly informed groups",
+    )
+    parser.add_argument("--draws", type=int, default=1000)
+    parser.add_argument("--tune", type=int, default=1000)
+    parser.add_argument("--chains", type=int, default=2)
+    args = parser.parse_args()
+    logging.getLogger("pymc").setLevel(logging.ERROR)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, "metrics.jsonl")
+        for n_groups, max_attempts, target_accept in itertools.product(
+            args.groups, args.max_attempts, args.target_accept
+        ):
+            attempts, successes = synthetic_counts(n_groups, max_attempts)
+            means = {}
+            for parameterization in PARAMETERIZATIONS:
+                model = hierarchical_model(attempts, successes, parameterization=parameterization)
+                trace = metrics.sample(
+                    args.draws, model=model, tune=args.tune, chains=args.chains, cores=1,
+                    target_accept=target_accept, random_seed=42, progressbar=False,
+                    label=parameterization, metrics_log=log,
+                )
+                probabilities = trace.posterior["method_probabilities"]
+                means[parameterization] = probabilities.mean(("chain", "draw")).values
+                record = metrics.load_records(log)[-1]
+                rows.append({
+                    "groups": n_groups,
+                    "max_attempts": max_attempts,
+                    "target_accept": target_accept,
+                    "parameterization": parameterization,
+                    "seconds": record["total_seconds"],
+                    "min_ess_bulk": record["min_ess_bulk"],
+                    "ess_per_second": record["min_ess_bulk_per_second"],
+                    "divergences": record["divergences"],
+                    "treedepth_saturation": record["treedepth_saturation"],
+                    "max_r_hat": record["max_r_hat"],
+                    "rate_ess_per_second": record["variables"]["method_probabilities"]["ess_bulk_per_second"],
+                })
+                print(rows[-1], flush=True)
+            # Agreement of the group rate posterior means between the two
+            difference = np.abs(means["centered"] - means["non_centered"])
+            for row in rows[-len(PARAMETERIZATIONS):]:
+                row.update(max_rate_difference=float(difference.max()), mean_rate_difference=float(difference.mean()))
+
+    print()
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Posterior predictive check cost of the hierarchical model at growing group
+counts: `pm.sample_posterior_predictive` against `predictive.predictive_summary`
+(analytical and sampled) on the same posterior draws.
+
+The posterior is synthetic (conjugate Beta draws per group), so no sampling
+time is included and large group counts are cheap to set up.
+
+Run with
+
+    python benchmark_predictive.py [--groups 4 1000 10000] [--draws 4000]
+"""
+
+import argparse
+import logging
+import time
+import tracemalloc
+
+import arviz as az
+import numpy as np
+import pymc as pm
+
+from conjugate import BetaPosterior, BetaPrior
+from models import hierarchical_model
+from predictive import posterior_draws, predictive_summary
+
+
+def synthetic_trace(attempts, successes, draws: int, seed: int = 0):
+    """One chain of conjugate posterior draws shaped like a hierarchical_model trace"""
+    rng = np.random.default_rng(seed)
+    rates = BetaPosterior.from_counts(attempts, successes, BetaPrior(2, 3)).sample(draws, rng=rng)
+    return az.from_dict(
+        posterior={
+            "population_mean": rng.beta(4, 8, (1, draws)),
+            "population_concentration": rng.gamma(10.0, 1.0, (1, draws)),
+            "method_probabilities": rates[np.newaxis],
+        },
+        dims={"method_probabilities": ["group"]},
+        coords={"group": np.arange(len(attempts))},
+    )
+
+
+def timed(fn):
+    """(seconds, peak traced MiB) of one call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--groups", type=int, nargs="+", default=[4, 1000, 10000])
+    parser.add_argument("--draws", type=int, default=4000)
+    parser.add_argument("--max-pymc-groups", type=int, default=10000, help="Skip PyMC above this many groups")
+    args = parser.parse_args()
+    logging.getLogger("pymc").setLevel(logging.ERROR)
+
+    print(f"{'groups':>8}  {'method':<28}{'seconds':>9}{'peak MiB':>10}")
+    for n_groups in args.groups:
+        rng = np.random.default_rng(n_groups)
+        attempts = rng.integers(50, 1000, n_groups)
+        successes = rng.binomial(attempts, rng.beta(4, 8, n_groups))
+        trace = synthetic_trace(attempts, successes, args.draws)
+        draws = posterior_draws(trace, "method_probabilities")
+
+        methods = {
+            "predictive analytical": lambda: predictive_summary(draws, attempts),
+            "predictive analytical p-value": lambda: predictive_summary(draws, attempts, successes),
+            "predictive sample": lambda: predictive_summary(draws, attempts, successes, method="sample", random_seed=1),
+        }
+        if n_groups <= args.max_pymc_groups:
+            model = hierarchical_model(attempts, successes)
+
+            def pymc_ppc():
+                ppc = pm.sample_posterior_predictive(trace, model=model, random_seed=1, progressbar=False)
+                predicted = ppc.posterior_predictive["detections"].values.reshape(-1, n_groups)
+                return predicted.mean(axis=0), predicted.std(axis=0)
+
+            methods = {"pm.sample_posterior_predictive": pymc_ppc, **methods}
+        for name, fn in methods.items():
+            seconds, peak = timed(fn)
+            print(f"{n_groups:>8}  {name:<28}{seconds:>9.3f}{peak:>10.0f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Parameter recovery and fit time against dataset size on synthetic records.
+
+For every number of records, `synthetic.SyntheticDetections` draws them from a
+known hierarchical truth and three fits estimate the group rates:
+
+* "conjugate": an independent Beta posterior per group from the summed counts
+* "aggregated": the hierarchical PyMC model on the counts summed per group,
+  which is exact for Binomial records and costs the same at any record count
+* "records": the hierarchical PyMC model with one observed row per record, up
+  to `--max-record-fit` records
+
+Recovery is the share of true group rates inside the 94% HDIs and the mean
+absolute error of the posterior means.
+
+Run with
+
+    python benchmark_recovery.py [--records 10000 100000 1000000 10000000] [--groups 100]
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from conjugate import BetaPosterior
+from models import hierarchical_model
+from synthetic import GroundTruth, SyntheticDetections, aggregate
+
+HDI_PROB = 0.94
+
+
+def _recovery(rates, means, lower, upper) -> dict:
+    return {
+        "coverage": float(np.mean((lower <= rates) & (rates <= upper))),
+        "mean_abs_error": float(np.mean(np.abs(means - rates))),
+    }
+
+
+def fit_hierarchical(attempts, successes, groups, args) -> dict:
+    import arviz as az
+
+    model = hierarchical_model(attempts, successes, groups)
+    trace = metrics.sample(
+        args.draws, model=model, tune=args.tune, chains=args.chains, cores=1, random_seed=42, progressbar=False,
+        compute_convergence_checks=False,
+    )
+    probabilities = trace.posterior["method_probabilities"]
+    hdi = az.hdi(probabilities, hdi_prob=HDI_PROB)["method_probabilities"].values
+    # Groups without records have no rows, so map the model's groups back to ids
+    ids = np.asarray(trace.posterior["group"].values, dtype=np.int64)
+    return {"ids": ids, "means": probabilities.mean(("chain", "draw")).values, "lower": hdi[:, 0], "upper": hdi[:, 1]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--groups", type=int, default=100)
+    parser.add_argument("--max-attempts", type=int, default=GroundTruth.max_attempts)
+    parser.add_argument("--max-record-fit", type=int, default=100_000, help="Largest record count fitted row by row")
+    parser.add_argument("--draws", type=int, default=500)
+    parser.add_argument("--tune", type=int, default=500)
+    parser.add_argument("--chains", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.getLogger("pymc").setLevel(logging.ERROR)
+
+    data = SyntheticDetections(args.groups, GroundTruth(max_attempts=args.max_attempts), args.seed)
+    rows = []
+    for n_records in args.records:
+        start = time.perf_counter()
+        attempts, successes = aggregate(data.chunks(n_records), args.groups)
+        generate_seconds = time.perf_counter() - start
+        seen = np.flatnonzero(attempts)
+        base = {"records": n_records, "groups_seen": seen.size, "generate_seconds": generate_seconds}
+
+        start = time.perf_counter()
+        posterior = BetaPosterior.from_counts(attempts[seen], successes[seen])
+        lower, upper = posterior.hdi(HDI_PROB)
+        seconds = time.perf_counter() - start
+        rows.append({**base, "fit": "conjugate", "fit_seconds": seconds,
+                     **_recovery(data.rates[seen], posterior.mean, lower, upper)})
+        print(rows[-1], flush=True)
+
+        fits = [("aggregated", lambda: (attempts[seen], successes[seen], seen))]
+        if n_records <= args.max_record_fit:
+            def records():
+                frame = data.frame(n_records)
+                return frame["attempts"].to_numpy(), frame["successes"].to_numpy(), frame["group"].to_numpy()
+            fits.append(("records", records))
+        for name, inputs in fits:
+            start = time.perf_counter()
+            fit = fit_hierarchical(*inputs(), args)
+            seconds = time.perf_counter() - start
+            rates = data.rates[fit["ids"]]
+            rows.append({**base, "fit": name, "fit_seconds": seconds,
+                         **_recovery(rates, fit["means"], fit["lower"], fit["upper"])})
+            print(rows[-1], flush=True)
+
+    print()
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+First-fit against subsequent-fit latency of the Beta-Binomial and hierarchical
+models: rebuilding (and recompiling) the model for every batch of counts versus
+`models.ReusableModel`, which swaps new counts into `pm.Data` containers and
+reuses the compiled NUTS sampler.
+
+Run with
+
+    python benchmark_refit.py [--rows 4] [--fits 5] [--draws 500]
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from models import ReusableModel, beta_binomial_model, hierarchical_model
+
+
+def batches(n_fits: int, n_rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    for _ in range(n_fits):
+        attempts = rng.integers(50, 1000, n_rows)
+        yield attempts, rng.binomial(attempts, rng.beta(4, 8, n_rows))
+
+
+def rebuild_fit(build, attempts, successes, **sample_kwargs):
+    model = build(attempts, successes)
+    return metrics.sample(model=model, **sample_kwargs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=4)
+    parser.add_argument("--fits", type=int, default=5)
+    parser.add_argument("--draws", type=int, default=500)
+    parser.add_argument("--tune", type=int, default=500)
+    parser.add_argument("--chains", type=int, default=2)
+    args = parser.parse_args()
+    logging.getLogger("pymc").setLevel(logging.ERROR)
+
+    sample_kwargs = dict(
+        draws=args.draws, tune=args.tune, chains=args.chains, cores=1, random_seed=42,
+        progressbar=False, compute_convergence_checks=False,
+    )
+    rows = []
+    for build in (beta_binomial_model, hierarchical_model):
+        reusable = ReusableModel(build)
+        strategies = {
+            "rebuild": lambda a, s: rebuild_fit(build, a, s, **sample_kwargs),
+            "reuse": lambda a, s: reusable.fit(a, s, **sample_kwargs),
+        }
+        for name, fit in strategies.items():
+            for i, (attempts, successes) in enumerate(batches(args.fits, args.rows)):
+                start = time.perf_counter()
+                fit(attempts, successes)
+                rows.append({"model": build.__name__, "strategy": name, "fit": i, "seconds": time.perf_counter() - start})
+
+    df = pd.DataFrame(rows)
+    df["which"] = np.where(df["fit"] == 0, "first", "subsequent")
+    summary = df.groupby(["model", "strategy", "which"])["seconds"].mean().unstack("which")
+    print(summary.to_string(float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Time of the report figures from a trace with millions of draws: ArviZ plots on
+the raw draws against `report` specs (binned KDEs, thinned traces) rendered in
+a process pool, cold and with every figure unchanged.
+
+Run with
+
+    python benchmark_report.py [--draws 1000000] [--chains 4] [--groups 4] [--workers 4] [--skip-arviz]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+import arviz as az  # noqa: E402
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+import report  # noqa: E402
+
+
+def synthetic_trace(chains: int, draws: int, groups: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return az.from_dict(
+        posterior={
+            "population_mean": rng.beta(30, 70, (chains, draws)),
+            "population_concentration": rng.gamma(8, 1.0, (chains, draws)),
+            "method_probabilities": rng.beta(40, 60, (chains, draws, groups)),
+        },
+        dims={"method_probabilities": ["method"]},
+        coords={"method": [f"method_{i}" for i in range(groups)]},
+    )
+
+
+VAR_NAMES = ["population_mean", "population_concentration", "method_probabilities"]
+
+
+def arviz_figures(trace, output_dir: str) -> None:
+    for name, plot in [
+        ("trace", lambda: az.plot_trace(trace, var_names=VAR_NAMES)),
+        ("posterior", lambda: az.plot_posterior(trace, var_names=VAR_NAMES)),
+        ("forest", lambda: az.plot_forest(trace, var_names=["method_probabilities"])),
+    ]:
+        plot()
+        plt.gcf().savefig(os.path.join(output_dir, f"{name}.png"), dpi=100, bbox_inches="tight")
+        plt.close("all")
+
+
+def report_specs(trace):
+    return [
+        report.trace_figure("trace", trace, VAR_NAMES, "Trace"),
+        report.posterior_figure("posterior", trace, VAR_NAMES, "Posterior"),
+        report.forest_figure("forest", trace, "method_probabilities", "Forest"),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--draws", type=int, default=1_000_000, help="Draws per chain")
+    parser.add_argument("--chains", type=int, default=4)
+    parser.add_argument("--groups", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--skip-arviz", action="store_true", help="Only time the report builder")
+    args = parser.parse_args()
+
+    trace = synthetic_trace(args.chains, args.draws, args.groups)
+    print(f"{args.chains} chains x {args.draws} draws, {2 + args.groups} variables, {args.workers} workers")
+    with tempfile.TemporaryDirectory() as tmp:
+        if not args.skip_arviz:
+            start = time.perf_counter()
+            arviz_figures(trace, tmp)
+            print(f"arviz on raw draws:   {time.perf_counter() - start:8.2f} s")
+
+        start = time.perf_counter()
+        specs = report_specs(trace)
+        reduced = time.perf_counter()
+        report.build_report(specs, os.path.join(tmp, "report"), workers=args.workers)
+        end = time.perf_counter()
+        print(f"report, cold:         {end - start:8.2f} s  (reduce {reduced - start:.2f} s, render {end - reduced:.2f} s)")
+
+        start = time.perf_counter()
+        report.build_report(report_specs(trace), os.path.join(tmp, "report"), workers=args.workers)
+        print(f"report, unchanged:    {time.perf_counter() - start:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
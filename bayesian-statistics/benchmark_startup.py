@@ -0,0 +1,77 @@
+"""
+Wall time and peak memory of the Bayesian scripts in their different modes.
+
+Every mode runs in a fresh interpreter, so import time is included. The trace
+cache is disabled unless `--cache` is given.
+
+The "before" modes mimic the scripts as they were before `cli.py`: every heavy
+library is imported up front and each run samples and draws all the figures.
+
+Run with
+
+    python benchmark_startup.py [--repeat 3] [--draws 2000]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# What the scripts imported at the top before they became importable
+EAGER_IMPORTS = "import numpy, pandas, scipy.stats, pymc, arviz, matplotlib.pyplot"
+
+
+def eager(script: str, *args: str) -> list:
+    """Run `script` after the eager imports, like the scripts before `cli.py`"""
+    code = f"{EAGER_IMPORTS}; import runpy, sys; sys.argv = {[script, *args]!r}; runpy.run_path({script!r}, run_name='__main__')"
+    return ["-c", code]
+
+
+def modes(output_dir: str, draws: int):
+    sampler = ["--draws", str(draws), "--tune", str(draws // 2), "--cores", "1"]
+    return {
+        "beta_binomial before": eager("beta_binomial_model.py", "--output-dir", output_dir, *sampler),
+        "beta_binomial --no-mcmc --no-plots": ["beta_binomial_model.py", "--no-mcmc", "--no-plots", "--json", os.devnull],
+        "beta_binomial --no-plots": ["beta_binomial_model.py", "--no-plots", "--json", os.devnull, *sampler],
+        "beta_binomial --output-dir": ["beta_binomial_model.py", "--output-dir", output_dir, *sampler],
+        "intro before": eager("intro_to_pymc.py", "--output-dir", output_dir, *sampler),
+        "intro --no-mcmc --no-plots": ["intro_to_pymc.py", "--no-mcmc", "--no-plots", "--json", os.devnull],
+        "intro --no-plots": ["intro_to_pymc.py", "--no-plots", "--json", os.devnull, *sampler],
+        "intro --output-dir": ["intro_to_pymc.py", "--output-dir", output_dir, *sampler],
+    }
+
+
+def measure(args, env) -> tuple:
+    """(seconds, peak RSS in MiB) of one run in a child process"""
+    start = time.perf_counter()
+    pid = subprocess.Popen([sys.executable, *args], cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).pid
+    _, status, usage = os.wait4(pid, 0)
+    elapsed = time.perf_counter() - start
+    if status != 0:
+        raise RuntimeError(f"{' '.join(args)} exited with status {status}")
+    # ru_maxrss is in KiB on Linux
+    return elapsed, usage.ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--draws", type=int, default=2000)
+    parser.add_argument("--cache", action="store_true", help="Use the trace cache")
+    args = parser.parse_args()
+
+    env = dict(os.environ, MPLBACKEND="Agg")
+    if not args.cache:
+        env["TRACE_CACHE"] = "0"
+    with tempfile.TemporaryDirectory() as output_dir:
+        print(f"{'mode':<38}{'best s':>9}{'peak MiB':>10}")
+        for name, cmd in modes(output_dir, args.draws).items():
+            runs = [measure(cmd, env) for _ in range(args.repeat)]
+            print(f"{name:<38}{min(t for t, _ in runs):>9.2f}{max(m for _, m in runs):>10.0f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,32 @@
-import arviz as az
-import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
-import pymc as pm
-from scipy.stats import beta as scipy_beta
+"""
+Exoplanet detection rates with Beta-Binomial models: a closed-form conjugate
+analysis of one method, a single-method PyMC model checked against it, and a
+hierarchical model across all methods.
+
+Run it as a script
+
+    python beta_binomial_model.py                        # show the figures
+    python beta_binomial_model.py --output-dir figures   # headless: write PNGs
+    python beta_binomial_model.py --no-plots --json results.json
+    python beta_binomial_model.py --no-mcmc --no-plots   # closed form only
 
-# Set random seed for reproducibility
-np.random.seed(42)
+or import the steps as functions. Heavy libraries are only imported by the
+steps that use them: with `--no-plots` this module never imports matplotlib or
+arviz (PyMC still imports both when it samples), and `--no-mcmc` does not import
+PyMC at all.
+"""
 
-print("Creating synthetic exoplanet detection data...")
+from typing import Dict, List, Optional
 
-# Create realistic exoplanet detection data based on actual survey statistics
-detection_methods = ["Transit", "Radial Velocity", "Direct Imaging", "Microlensing"]
+import numpy as np
+import pandas as pd
+
+from cli import Figures, run_cli
+from conjugate import BetaPosterior, BetaPrior
 
 # Realistic detection rates based on actual exoplanet surveys
-detection_data = {
-    "method": detection_methods,
+DETECTION_DATA = {
+    "method": ["Transit", "Radial Velocity", "Direct Imaging", "Microlensing"],
     "attempts": [1000, 800, 200, 150],  # Number of observation attempts
     "successes": [450, 320, 25, 18],  # Successful detections
     "description": [
@@ -26,269 +37,419 @@ detection_data = {
     ],
 }
 
-df = pd.DataFrame(detection_data)
-print("\nExoplanet Detection Data:")
-print(df[["method", "attempts", "successes"]])
-
-# Calculate observed success rates
-df["success_rate"] = df["successes"] / df["attempts"]
-print(f"\nObserved Success Rates:")
-for i, row in df.iterrows():
-    print(f"{row['method']}: {row['success_rate']:.3f}")
-
-# Beta-Binomial Conjugate Model
-print("\n" + "=" * 50)
-print("BETA-BINOMIAL CONJUGATE MODEL")
-print("=" * 50)
-
-# Focus on Transit method for detailed conjugate analysis
-method_idx = 0
-n_trials = df.loc[method_idx, "attempts"]
-n_success = df.loc[method_idx, "successes"]
-
-print(f"\nAnalyzing {df.loc[method_idx, 'method']} method:")
-print(f"Observation attempts: {n_trials}")
-print(f"Successful detections: {n_success}")
-print(f"Observed success rate: {n_success/n_trials:.3f}")
-
-# Conjugate analysis (analytical solution)
-alpha_prior = 2  # Slightly informative prior
-beta_prior = 3  # Expecting moderate success rates
-
-# Posterior: Beta(α₀ + successes, β₀ + failures)
-alpha_posterior = alpha_prior + n_success
-beta_posterior = beta_prior + (n_trials - n_success)
-
-print(f"\nConjugate Analysis:")
-print(f"Prior: Beta({alpha_prior}, {beta_prior})")
-print(f"Posterior: Beta({alpha_posterior}, {beta_posterior})")
-
-# Calculate analytical posterior statistics
-analytical_mean = alpha_posterior / (alpha_posterior + beta_posterior)
-analytical_var = (alpha_posterior * beta_posterior) / (
-    (alpha_posterior + beta_posterior) ** 2 * (alpha_posterior + beta_posterior + 1)
-)
-
-print(f"Analytical posterior mean: {analytical_mean:.4f}")
-print(f"Analytical posterior std: {np.sqrt(analytical_var):.4f}")
-
-# PyMC Model for single method
-with pm.Model() as beta_binomial_model:
-    # Prior for detection probability
-    p = pm.Beta("detection_probability", alpha=alpha_prior, beta=beta_prior)
-
-    # Likelihood - binomial distribution for count data
-    obs = pm.Binomial("observed_detections", n=n_trials, p=p, observed=n_success)
-
-    # Sample from posterior
-    trace = pm.sample(2000, tune=1000, chains=2, random_seed=42, target_accept=0.9)
-
-# Compare analytical vs MCMC results
-mcmc_mean = trace.posterior["detection_probability"].mean().values
-mcmc_std = trace.posterior["detection_probability"].std().values
-
-print(f"\nResults Comparison:")
-print(f"Analytical posterior mean: {analytical_mean:.4f}")
-print(f"MCMC posterior mean: {mcmc_mean:.4f}")
-print(f"Difference in means: {abs(analytical_mean - mcmc_mean):.6f}")
-print(f"Analytical posterior std: {np.sqrt(analytical_var):.4f}")
-print(f"MCMC posterior std: {mcmc_std:.4f}")
-
-# Hierarchical Beta-Binomial Model
-print("\n" + "=" * 50)
-print("HIERARCHICAL BETA-BINOMIAL MODEL")
-print("=" * 50)
-
-with pm.Model() as hierarchical_model:
-    # Hyperpriors for population-level parameters
-    mu = pm.Beta("population_mean", alpha=1, beta=1)  # Population mean detection rate
-    kappa = pm.Exponential(
-        "population_concentration", lam=0.1
-    )  # How similar methods are
-
-    # Convert to alpha, beta parameterization for Beta distribution
-    alpha = mu * kappa
-    beta = (1 - mu) * kappa
-
-    # Method-specific detection probabilities
-    p_methods = pm.Beta(
-        "method_probabilities", alpha=alpha, beta=beta, shape=len(detection_methods)
+# Slightly informative prior, expecting moderate success rates
+ALPHA_PRIOR = 2
+BETA_PRIOR = 3
+
+
+def detection_data() -> pd.DataFrame:
+    """The detection table with observed success rates"""
+    df = pd.DataFrame(DETECTION_DATA)
+    df["success_rate"] = df["successes"] / df["attempts"]
+    return df
+
+
+def conjugate_analysis(
+    df: pd.DataFrame, method_idx: int = 0, alpha_prior: float = ALPHA_PRIOR, beta_prior: float = BETA_PRIOR
+) -> dict:
+    """
+    Closed-form Beta posterior of one method, and of every method at once.
+
+    Returns:
+        dict: Counts, posterior parameters, mean, std and 95% HDI of the method,
+         and `all_methods` with the summary of every method
+    """
+    n_trials = int(df.loc[method_idx, "attempts"])
+    n_success = int(df.loc[method_idx, "successes"])
+    prior = BetaPrior(alpha_prior, beta_prior)
+    # Posterior: Beta(α₀ + successes, β₀ + failures)
+    posterior = BetaPosterior.from_counts(n_trials, n_success, prior)
+    hdi_lower, hdi_upper = posterior.hdi(0.95)
+    all_methods = BetaPosterior.from_counts(df["attempts"], df["successes"], prior)
+    return {
+        "method": df.loc[method_idx, "method"],
+        "n_trials": n_trials,
+        "n_success": n_success,
+        "alpha_prior": alpha_prior,
+        "beta_prior": beta_prior,
+        "alpha_posterior": float(posterior.alpha),
+        "beta_posterior": float(posterior.beta),
+        "mean": float(posterior.mean),
+        "std": float(posterior.std),
+        "hdi_95": [float(hdi_lower), float(hdi_upper)],
+        "all_methods": {
+            method: {key: float(value[i]) for key, value in all_methods.summary(0.95).items()}
+            for i, method in enumerate(df["method"])
+        },
+    }
+
+
+def _sample(model, cache, fit_mode: str = "nuts", **sample_kwargs):
+    if fit_mode != "nuts":
+        from fit_modes import fit
+
+        # The approximations take seconds at most, so they are not cached
+        return fit(model, fit_mode, **sample_kwargs)
+    with model:
+        if cache is None:
+            from metrics import sample
+
+            return sample(**sample_kwargs)
+        return cache.sample(**sample_kwargs)
+
+
+def fit_single_method(conjugate: dict, cache=None, fit_mode: str = "nuts", **sample_kwargs):
+    """
+    Sample the single-method Beta-Binomial model of `conjugate_analysis`.
+
+    Args:
+        conjugate: Result of `conjugate_analysis`
+        cache: `trace_cache.TraceCache`, or None to always sample
+        fit_mode: One of `fit_modes.FIT_MODES`; NUTS by default
+        **sample_kwargs: Passed to `pm.sample`
+
+    Returns:
+        (model, trace, results): The model, its InferenceData and the MCMC mean
+         and std next to the analytical ones
+    """
+    from models import beta_binomial_model
+
+    # The counts are pm.Data containers, so the model can be refitted on new
+    # counts with models.set_counts
+    model = beta_binomial_model(
+        conjugate["n_trials"],
+        conjugate["n_success"],
+        alpha_prior=conjugate["alpha_prior"],
+        beta_prior=conjugate["beta_prior"],
+    )
+    trace = _sample(model, cache, fit_mode, **sample_kwargs)
+    samples = trace.posterior["detection_probability"].values
+    results = {
+        "mcmc_mean": float(samples.mean()),
+        "mcmc_std": float(samples.std()),
+        "analytical_mean": conjugate["mean"],
+        "analytical_std": conjugate["std"],
+    }
+    results["mean_difference"] = abs(results["analytical_mean"] - results["mcmc_mean"])
+    return model, trace, results
+
+
+def fit_hierarchical(
+    df: pd.DataFrame, cache=None, fit_mode: str = "nuts", parameterization: str = "centered", **sample_kwargs
+):
+    """
+    Sample the hierarchical model: a population-level Beta(mu * kappa,
+    (1 - mu) * kappa) prior on the method rates, with a single vectorized
+    Binomial node indexed by method. `parameterization="non_centered"` uses
+    logit-normal rates instead (see `models.hierarchical_model`).
+
+    Returns:
+        (model, trace, results): The model, its InferenceData and the posterior
+         mean and std of every method's rate
+    """
+    from models import hierarchical_model
+
+    model = hierarchical_model(df["attempts"], df["successes"], groups=df["method"], parameterization=parameterization)
+    trace = _sample(model, cache, fit_mode, **sample_kwargs)
+    samples = trace.posterior["method_probabilities"]
+    means = samples.mean(dim=["chain", "draw"]).values
+    stds = samples.std(dim=["chain", "draw"]).values
+    results = {
+        method: {"mean": float(means[i]), "std": float(stds[i])} for i, method in enumerate(df["method"])
+    }
+    return model, trace, results
+
+
+def posterior_predictive(df: pd.DataFrame, trace, method: str = "analytical", random_seed: int = 42) -> dict:
+    """
+    Posterior predictive mean and std of every method's detections, and the
+    p-value P(replicated >= observed), computed from the posterior draws of the
+    method rates for all methods at once (see predictive.py)
+    """
+    from predictive import posterior_draws, predictive_summary
+
+    summary = predictive_summary(
+        posterior_draws(trace, "method_probabilities"),
+        df["attempts"],
+        observed=df["successes"],
+        method=method,
+        random_seed=random_seed,
     )
+    return {key: value.tolist() for key, value in summary.items()}
 
-    # Observations for each method
-    for i, method in enumerate(detection_methods):
-        pm.Binomial(
-            f"detections_{method}",
-            n=df.loc[i, "attempts"],
-            p=p_methods[i],
-            observed=df.loc[i, "successes"],
+
+def figure_specs(
+    df: pd.DataFrame,
+    conjugate: dict,
+    single: dict,
+    trace,
+    hierarchical: dict,
+    hierarchical_trace,
+    ppc: dict,
+) -> list:
+    """
+    The nine figures as `report.FigureSpec`s. Traces are reduced here, once:
+    densities are binned KDEs and trace lines are thinned (see `report`).
+    """
+    from scipy.stats import beta as scipy_beta
+
+    from report import axes_figure, forest_figure, posterior_figure, trace_figure
+
+    detection_methods = list(df["method"])
+    analytical_mean = conjugate["mean"]
+    mcmc_mean = single["mcmc_mean"]
+    n_trials, n_success = conjugate["n_trials"], conjugate["n_success"]
+    x = np.linspace(0, 1, 1000)
+    prior_pdf = scipy_beta(conjugate["alpha_prior"], conjugate["beta_prior"]).pdf(x)
+    posterior_pdf = scipy_beta(conjugate["alpha_posterior"], conjugate["beta_posterior"]).pdf(x)
+    specs = []
+
+    # Plot 1: Prior vs Posterior comparison
+    specs.append(axes_figure(
+        "1_prior_posterior",
+        [
+            ("plot", (x, prior_pdf), {
+                "label": f"Prior Beta({conjugate['alpha_prior']},{conjugate['beta_prior']})",
+                "linestyle": "--",
+                "linewidth": 2,
+            }),
+            ("plot", (x, posterior_pdf), {"label": "Posterior (Analytical)", "linewidth": 2}),
+            ("axvline", (analytical_mean,), {"color": "red", "linestyle": ":", "label": "Posterior Mean", "linewidth": 2}),
+            ("axvline", (n_success / n_trials,), {
+                "color": "orange", "linestyle": ":", "label": "Observed Rate", "linewidth": 2,
+            }),
+        ],
+        title=f"Prior vs Posterior Distribution ({conjugate['method']} Method)",
+        xlabel="Detection Probability",
+        ylabel="Density",
+    ))
+
+    # Plot 2: MCMC vs Analytical comparison, from a 50-bin histogram of the draws
+    counts, edges = np.histogram(trace.posterior["detection_probability"].values, bins=50, density=True)
+    specs.append(axes_figure(
+        "2_mcmc_vs_analytical",
+        [
+            ("stairs", (counts, edges), {"fill": True, "alpha": 0.7, "label": "MCMC Samples", "color": "skyblue"}),
+            ("plot", (x, posterior_pdf, "r-"), {"linewidth": 3, "label": "Analytical Posterior"}),
+            ("axvline", (mcmc_mean,), {
+                "color": "blue", "linestyle": "--", "label": f"MCMC Mean: {mcmc_mean:.3f}", "linewidth": 2,
+            }),
+            ("axvline", (analytical_mean,), {
+                "color": "red", "linestyle": ":", "label": f"Analytical Mean: {analytical_mean:.3f}", "linewidth": 2,
+            }),
+        ],
+        title="MCMC vs Analytical Posterior Comparison",
+        xlabel="Detection Probability",
+        ylabel="Density",
+    ))
+
+    # Plot 3: Trace plot for single method model
+    specs.append(trace_figure("3_single_trace", trace, ["detection_probability"], "MCMC Trace Plot - Single Method Model"))
+
+    # Plot 4: Posterior plot for single method
+    specs.append(posterior_figure(
+        "4_single_posterior", trace, ["detection_probability"], "Posterior Distribution - Single Method Model"
+    ))
+
+    # Plot 5: Method comparison
+    x_pos = np.arange(len(detection_methods))
+    specs.append(axes_figure(
+        "5_method_comparison",
+        [
+            ("bar", (x_pos, [hierarchical[m]["mean"] for m in detection_methods]), {
+                "yerr": [hierarchical[m]["std"] for m in detection_methods],
+                "capsize": 5,
+                "alpha": 0.7,
+                "color": "lightcoral",
+            }),
+            ("scatter", (x_pos, df["success_rate"].to_numpy()), {
+                "color": "darkred", "s": 100, "zorder": 5, "label": "Observed Rates",
+            }),
+        ],
+        figsize=(12, 6),
+        title="Detection Probabilities by Method (Hierarchical Model)",
+        ylabel="Detection Probability",
+        xticks=(x_pos, detection_methods),
+    ))
+
+    # Plot 6: Hierarchical model trace
+    specs.append(trace_figure(
+        "6_hierarchical_trace",
+        hierarchical_trace,
+        ["population_mean", "population_concentration"],
+        "MCMC Trace Plot - Hierarchical Parameters",
+    ))
+
+    # Plot 7: Hierarchical model posteriors
+    specs.append(posterior_figure(
+        "7_hierarchical_posteriors",
+        hierarchical_trace,
+        ["population_mean", "population_concentration", "method_probabilities"],
+        "Posterior Distributions - Hierarchical Model",
+    ))
+
+    # Plot 8: Forest plot for method comparison
+    specs.append(forest_figure(
+        "8_forest",
+        hierarchical_trace,
+        "method_probabilities",
+        "Forest Plot - Method Detection Probabilities",
+        labels=[f'{method}\n(n={df.loc[i, "attempts"]})' for i, method in enumerate(detection_methods)],
+    ))
+
+    # Plot 9: Posterior predictive check, with the predictive p-value
+    # P(replicated >= observed) next to every method
+    observed = df["successes"].to_numpy()
+    predicted_means = np.asarray(ppc["mean"])
+    max_val = max(observed.max(), predicted_means.max())
+    specs.append(axes_figure(
+        "9_posterior_predictive",
+        [
+            ("errorbar", (observed, predicted_means), {
+                "yerr": np.asarray(ppc["std"]), "fmt": "o", "capsize": 5, "markersize": 8,
+            }),
+            ("plot", ([0, max_val], [0, max_val], "r--"), {"alpha": 0.5, "label": "Perfect Prediction"}),
+        ] + [
+            ("annotate", (f"{method} (p={p_value:.2f})", (observed[i], predicted_means[i])), {
+                "xytext": (5, 5), "textcoords": "offset points", "fontsize": 10,
+            })
+            for i, (method, p_value) in enumerate(zip(detection_methods, ppc["p_value"]))
+        ],
+        title="Posterior Predictive Check",
+        xlabel="Observed Detections",
+        ylabel="Predicted Detections",
+    ))
+    return specs
+
+
+def make_plots(
+    df: pd.DataFrame,
+    conjugate: dict,
+    single: dict,
+    trace,
+    hierarchical: dict,
+    hierarchical_trace,
+    ppc: dict,
+    output_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> List[str]:
+    """
+    Draw the nine figures. They are shown one by one, or written as PNGs to
+    `output_dir` by `report.build_report` in `workers` processes, skipping
+    figures whose inputs are unchanged since the last run; returns the paths.
+    """
+    specs = figure_specs(df, conjugate, single, trace, hierarchical, hierarchical_trace, ppc)
+    if output_dir is not None:
+        from report import build_report
+
+        return build_report(specs, output_dir, workers=workers)
+
+    from report import render
+
+    figures = Figures()
+    for spec in specs:
+        render(spec)
+        figures.finish(spec.name)
+    return figures.saved
+
+
+def run(
+    mcmc: bool = True,
+    plots: bool = True,
+    output_dir: Optional[str] = None,
+    use_cache: bool = True,
+    verbose: bool = True,
+    fit_mode: str = "nuts",
+    **sample_kwargs,
+) -> Dict[str, object]:
+    """
+    Run the whole analysis and return its numeric results.
+
+    Args:
+        mcmc: Fit the PyMC models; False keeps only the closed-form results
+        plots: Draw the figures (requires `mcmc`)
+        output_dir: Write the figures here instead of showing them
+        use_cache: Sample through `trace_cache.TraceCache`
+        verbose: Print the results as they are computed
+        fit_mode: "nuts", or a faster approximation from `fit_modes.FIT_MODES`
+        **sample_kwargs: Override the `pm.sample` settings (draws, tune, chains, cores, ...)
+
+    Returns:
+        dict: JSON-serializable results
+    """
+    say = print if verbose else (lambda *args, **kwargs: None)
+    # Set random seed for reproducibility
+    np.random.seed(42)
+
+    say("Creating synthetic exoplanet detection data...")
+    df = detection_data()
+    say("\nExoplanet Detection Data:")
+    say(df[["method", "attempts", "successes"]])
+    say("\nObserved Success Rates:")
+    for _, row in df.iterrows():
+        say(f"{row['method']}: {row['success_rate']:.3f}")
+
+    say("\n" + "=" * 50)
+    say("BETA-BINOMIAL CONJUGATE MODEL")
+    say("=" * 50)
+    conjugate = conjugate_analysis(df)
+    say(f"\nAnalyzing {conjugate['method']} method:")
+    say(f"Observation attempts: {conjugate['n_trials']}")
+    say(f"Successful detections: {conjugate['n_success']}")
+    say(f"Observed success rate: {conjugate['n_success'] / conjugate['n_trials']:.3f}")
+    say("\nConjugate Analysis:")
+    say(f"Prior: Beta({conjugate['alpha_prior']}, {conjugate['beta_prior']})")
+    say(f"Posterior: Beta({conjugate['alpha_posterior']:g}, {conjugate['beta_posterior']:g})")
+    say(f"Analytical posterior mean: {conjugate['mean']:.4f}")
+    say(f"Analytical posterior std: {conjugate['std']:.4f}")
+    say(f"Analytical 95% HDI: [{conjugate['hdi_95'][0]:.4f}, {conjugate['hdi_95'][1]:.4f}]")
+    say("\nConjugate posteriors for all methods:")
+    say(pd.DataFrame(conjugate["all_methods"]).T.round(4))
+
+    results: Dict[str, object] = {"data": DETECTION_DATA, "conjugate": conjugate}
+    if not mcmc:
+        return results
+
+    cache = None
+    if use_cache:
+        from trace_cache import TraceCache
+
+        # Reruns with unchanged data, priors and settings reuse the stored traces
+        cache = TraceCache()
+    settings = {"draws": 2000, "tune": 1000, "chains": 2, "random_seed": 42, "target_accept": 0.9, **sample_kwargs}
+
+    model, trace, single = fit_single_method(conjugate, cache, fit_mode, **settings)
+    say("\nResults Comparison:")
+    say(f"Analytical posterior mean: {single['analytical_mean']:.4f}")
+    say(f"MCMC posterior mean: {single['mcmc_mean']:.4f}")
+    say(f"Difference in means: {single['mean_difference']:.6f}")
+    say(f"Analytical posterior std: {single['analytical_std']:.4f}")
+    say(f"MCMC posterior std: {single['mcmc_std']:.4f}")
+
+    say("\n" + "=" * 50)
+    say("HIERARCHICAL BETA-BINOMIAL MODEL")
+    say("=" * 50)
+    _, hierarchical_trace, hierarchical = fit_hierarchical(df, cache, fit_mode, **settings)
+    say("Hierarchical Model Results:")
+    for method, stats in hierarchical.items():
+        say(f"{method}: {stats['mean']:.3f} ± {stats['std']:.3f}")
+
+    ppc = posterior_predictive(df, hierarchical_trace)
+    results.update(fit_mode=fit_mode, single_method=single, hierarchical=hierarchical, posterior_predictive=ppc)
+
+    if plots:
+        say("\n" + "=" * 50)
+        say("VISUALIZATION")
+        say("=" * 50)
+        results["figures"] = make_plots(
+            df, conjugate, single, trace, hierarchical, hierarchical_trace, ppc, output_dir
         )
+    return results
 
-    # Sample from posterior
-    hierarchical_trace = pm.sample(
-        2000, tune=1000, chains=2, random_seed=42, target_accept=0.9
-    )
 
-# Extract results
-method_probs_samples = hierarchical_trace.posterior["method_probabilities"]
-method_means = method_probs_samples.mean(dim=["chain", "draw"]).values
-method_stds = method_probs_samples.std(dim=["chain", "draw"]).values
-
-print("Hierarchical Model Results:")
-for i, method in enumerate(detection_methods):
-    print(f"{method}: {method_means[i]:.3f} ± {method_stds[i]:.3f}")
-
-# Individual Plots
-print("\n" + "=" * 50)
-print("VISUALIZATION")
-print("=" * 50)
-
-# Plot 1: Prior vs Posterior comparison
-plt.figure(figsize=(10, 6))
-x = np.linspace(0, 1, 1000)
-prior_dist = scipy_beta(alpha_prior, beta_prior)
-posterior_dist = scipy_beta(alpha_posterior, beta_posterior)
-
-plt.plot(x, prior_dist.pdf(x), label="Prior Beta(2,3)", linestyle="--", linewidth=2)
-plt.plot(x, posterior_dist.pdf(x), label="Posterior (Analytical)", linewidth=2)
-plt.axvline(
-    analytical_mean, color="red", linestyle=":", label="Posterior Mean", linewidth=2
-)
-plt.axvline(
-    n_success / n_trials,
-    color="orange",
-    linestyle=":",
-    label="Observed Rate",
-    linewidth=2,
-)
-plt.title("Prior vs Posterior Distribution (Transit Method)", fontsize=14)
-plt.xlabel("Detection Probability")
-plt.ylabel("Density")
-plt.legend()
-plt.grid(True, alpha=0.3)
-plt.show()
-
-# Plot 2: MCMC vs Analytical comparison
-plt.figure(figsize=(10, 6))
-posterior_samples = trace.posterior["detection_probability"].values.flatten()
-plt.hist(
-    posterior_samples,
-    bins=50,
-    density=True,
-    alpha=0.7,
-    label="MCMC Samples",
-    color="skyblue",
-)
-plt.plot(x, posterior_dist.pdf(x), "r-", linewidth=3, label="Analytical Posterior")
-plt.axvline(
-    mcmc_mean,
-    color="blue",
-    linestyle="--",
-    label=f"MCMC Mean: {mcmc_mean:.3f}",
-    linewidth=2,
-)
-plt.axvline(
-    analytical_mean,
-    color="red",
-    linestyle=":",
-    label=f"Analytical Mean: {analytical_mean:.3f}",
-    linewidth=2,
-)
-plt.title("MCMC vs Analytical Posterior Comparison", fontsize=14)
-plt.xlabel("Detection Probability")
-plt.ylabel("Density")
-plt.legend()
-plt.grid(True, alpha=0.3)
-plt.show()
-
-# Plot 3: Trace plot for single method model
-az.plot_trace(trace, var_names=["detection_probability"])
-plt.suptitle("MCMC Trace Plot - Single Method Model", fontsize=14)
-plt.tight_layout()
-plt.show()
-
-# Plot 4: Posterior plot for single method
-az.plot_posterior(trace, var_names=["detection_probability"])
-plt.suptitle("Posterior Distribution - Single Method Model", fontsize=14)
-plt.show()
-
-# Plot 5: Method comparison
-plt.figure(figsize=(12, 6))
-x_pos = np.arange(len(detection_methods))
-bars = plt.bar(
-    x_pos, method_means, yerr=method_stds, capsize=5, alpha=0.7, color="lightcoral"
-)
-plt.scatter(
-    x_pos, df["success_rate"], color="darkred", s=100, zorder=5, label="Observed Rates"
-)
-plt.xticks(x_pos, detection_methods, rotation=45, ha="right")
-plt.title("Detection Probabilities by Method (Hierarchical Model)", fontsize=14)
-plt.ylabel("Detection Probability")
-plt.legend()
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.show()
-
-# Plot 6: Hierarchical model trace
-az.plot_trace(
-    hierarchical_trace, var_names=["population_mean", "population_concentration"]
-)
-plt.suptitle("MCMC Trace Plot - Hierarchical Parameters", fontsize=14)
-plt.tight_layout()
-plt.show()
-
-# Plot 7: Hierarchical model posteriors
-az.plot_posterior(
-    hierarchical_trace,
-    var_names=["population_mean", "population_concentration", "method_probabilities"],
-)
-plt.suptitle("Posterior Distributions - Hierarchical Model", fontsize=14)
-plt.show()
-
-# Plot 8: Forest plot for method comparison
-az.plot_forest(hierarchical_trace, var_names=["method_probabilities"])
-plt.title("Forest Plot - Method Detection Probabilities", fontsize=14)
-plt.xlabel("Detection Probability")
-labels = [
-    f'{method}\n(n={df.loc[i, "attempts"]})'
-    for i, method in enumerate(detection_methods)
-]
-plt.gca().set_yticklabels(labels)
-plt.show()
-
-# Plot 9: Posterior predictive check
-with hierarchical_model:
-    ppc = pm.sample_posterior_predictive(hierarchical_trace, random_seed=42)
-
-plt.figure(figsize=(10, 6))
-observed = df["successes"].values
-predicted_samples = np.array(
-    [
-        ppc.posterior_predictive[f"detections_{method}"].values.flatten()
-        for method in detection_methods
-    ]
-)
-predicted_means = predicted_samples.mean(axis=1)
-predicted_stds = predicted_samples.std(axis=1)
-
-plt.errorbar(
-    observed, predicted_means, yerr=predicted_stds, fmt="o", capsize=5, markersize=8
-)
-max_val = max(max(observed), max(predicted_means))
-plt.plot([0, max_val], [0, max_val], "r--", alpha=0.5, label="Perfect Prediction")
-plt.xlabel("Observed Detections")
-plt.ylabel("Predicted Detections")
-plt.title("Posterior Predictive Check", fontsize=14)
-plt.legend()
-plt.grid(True, alpha=0.3)
-
-# Add method labels
-for i, method in enumerate(detection_methods):
-    plt.annotate(
-        method,
-        (observed[i], predicted_means[i]),
-        xytext=(5, 5),
-        textcoords="offset points",
-        fontsize=10,
-    )
-plt.show()
+def main(argv: Optional[List[str]] = None) -> None:
+    run_cli(run, "Exoplanet detection rates with Beta-Binomial models", argv)
+
+
+if __name__ == "__main__":
+    main()
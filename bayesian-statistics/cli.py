@@ -0,0 +1,98 @@
+"""
+Command line and figure handling shared by the Bayesian scripts.
+
+Every script exposes `run(mcmc, plots, output_dir, use_cache, verbose,
+fit_mode, **sample_kwargs)` returning JSON-serializable results; `run_cli` maps the
+common options onto it. Nothing heavy is imported here: matplotlib is only
+imported when a `Figures` object is created. Only the command line run, which
+owns its process, picks the Agg backend (through `MPLBACKEND`); `Figures` never
+switches the backend of the process that imports it.
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Callable, Dict, List, Optional
+
+from fit_modes import FIT_MODES
+from metrics import METRICS_ENV
+
+
+class Figures:
+    """Show figures interactively, or save them to `output_dir` and close them"""
+
+    def __init__(self, output_dir: Optional[str] = None):
+        self.output_dir = output_dir
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+        import matplotlib.pyplot as plt
+
+        self.plt = plt
+        self.saved: List[str] = []
+
+    def finish(self, name: str) -> None:
+        if self.output_dir is None:
+            self.plt.show()
+            return
+        path = os.path.join(self.output_dir, f"{name}.png")
+        # Only the figure just drawn: figures the caller has open stay open
+        fig = self.plt.gcf()
+        fig.savefig(path, dpi=100, bbox_inches="tight")
+        self.plt.close(fig)
+        self.saved.append(path)
+
+
+def build_parser(description: str) -> argparse.ArgumentParser:
+    """Command line options shared by the Bayesian scripts"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--no-plots", action="store_true", help="Skip the figures (matplotlib/arviz are not imported)")
+    parser.add_argument("--no-mcmc", action="store_true", help="Closed-form results only; PyMC is not imported")
+    parser.add_argument("--output-dir", "--headless", dest="output_dir", help="Write figures here instead of showing them")
+    parser.add_argument("--json", help="Write the numeric results as JSON to this file ('-' for stdout)")
+    parser.add_argument("--no-cache", action="store_true", help="Always sample; do not use the trace cache")
+    parser.add_argument(
+        "--fit-mode", choices=FIT_MODES, default="nuts",
+        help="Posterior approximation; the non-NUTS modes are faster but approximate (see fit_modes.py)",
+    )
+    parser.add_argument("--metrics", help=f"Append sampler metrics as JSON lines to this file (sets ${METRICS_ENV})")
+    parser.add_argument("--draws", type=int)
+    parser.add_argument("--tune", type=int)
+    parser.add_argument("--chains", type=int)
+    parser.add_argument("--cores", type=int)
+    return parser
+
+
+def run_cli(
+    run_fn: Callable[..., Dict[str, object]], description: str, argv: Optional[List[str]] = None
+) -> Dict[str, object]:
+    """Parse the shared options, call `run_fn` and write the JSON output"""
+    args = build_parser(description).parse_args(argv)
+    sample_kwargs = {
+        name: getattr(args, name)
+        for name in ("draws", "tune", "chains", "cores")
+        if getattr(args, name) is not None
+    }
+    to_stdout = args.json == "-"
+    if args.output_dir is not None:
+        # No display is needed, and no GUI toolkit is imported
+        os.environ.setdefault("MPLBACKEND", "Agg")
+    if args.metrics:
+        os.environ[METRICS_ENV] = args.metrics
+    results = run_fn(
+        mcmc=not args.no_mcmc,
+        plots=not (args.no_plots or args.no_mcmc),
+        output_dir=args.output_dir,
+        use_cache=not args.no_cache,
+        verbose=not to_stdout,
+        fit_mode=args.fit_mode,
+        **sample_kwargs,
+    )
+    if args.json:
+        text = json.dumps(results, indent=2, default=str)
+        if to_stdout:
+            sys.stdout.write(text + "\n")
+        else:
+            with open(args.json, "w") as f:
+                f.write(text + "\n")
+    return results
@@ -0,0 +1,314 @@
+"""
+Closed-form Beta-Binomial posteriors, vectorized over many arms.
+
+With a Beta(α₀, β₀) prior on a success probability and Binomial data, the
+posterior is Beta(α₀ + successes, β₀ + failures). Every summary below is
+computed with array math for all arms (detection methods, channels, ...) at
+once, so scoring tens of thousands of arms takes milliseconds instead of one
+MCMC run per arm.
+
+MCMC is only used by `posterior` when the prior is not a Beta, i.e. when no
+conjugate form exists.
+
+Example:
+
+    from conjugate import BetaPrior, posterior
+
+    post = posterior(df["attempts"], df["successes"], BetaPrior(2, 3))
+    post.mean, post.std, post.hdi(0.95), post.predictive(100).mean
+"""
+
+import warnings
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+from scipy import stats
+
+_GOLDEN = (np.sqrt(5.0) - 1.0) / 2.0
+
+
+@dataclass(frozen=True)
+class BetaPrior:
+    """Beta(alpha, beta) prior on a success probability"""
+    alpha: float = 1.0
+    beta: float = 1.0
+
+    def __post_init__(self):
+        if self.alpha <= 0 or self.beta <= 0:
+            raise ValueError("Beta prior parameters must be positive")
+
+
+def validate_counts(attempts, successes) -> Tuple[np.ndarray, np.ndarray]:
+    """`attempts` and `successes` as float arrays; raises ValueError unless 0 <= successes <= attempts"""
+    attempts = np.asarray(attempts, dtype=np.float64)
+    successes = np.asarray(successes, dtype=np.float64)
+    if np.any(attempts < 0) or np.any(successes < 0) or np.any(successes > attempts):
+        raise ValueError("Need 0 <= successes <= attempts")
+    return attempts, successes
+
+
+def _min_width_interval(ppf: Callable[[np.ndarray], np.ndarray], prob: float, shape, tol: float):
+    """
+    Find the narrowest interval [ppf(p), ppf(p + prob)] for every arm by a golden
+    section search on the lower tail mass p, vectorized over arms.
+    """
+    def width(p):
+        return ppf(p + prob) - ppf(p)
+
+    lo = np.zeros(shape)
+    hi = np.full(shape, 1.0 - prob)
+    x1 = hi - _GOLDEN * (hi - lo)
+    x2 = lo + _GOLDEN * (hi - lo)
+    w1, w2 = width(x1), width(x2)
+    while np.max(hi - lo) > tol:
+        # Where the left probe is narrower keep [lo, x2], otherwise [x1, hi]; one
+        # old probe is reused and only the new one is evaluated
+        left = w1 < w2
+        hi = np.where(left, x2, hi)
+        lo = np.where(left, lo, x1)
+        probe = np.where(left, hi - _GOLDEN * (hi - lo), lo + _GOLDEN * (hi - lo))
+        w_probe = width(probe)
+        x1, x2 = np.where(left, probe, x2), np.where(left, x1, probe)
+        w1, w2 = np.where(left, w_probe, w2), np.where(left, w1, w_probe)
+    p = (lo + hi) / 2.0
+    return ppf(p), ppf(p + prob)
+
+
+@dataclass
+class BetaBinomialPredictive:
+    """
+    Beta-Binomial predictive distribution of successes in `n` future attempts per arm.
+    """
+    n: np.ndarray
+    alpha: np.ndarray
+    beta: np.ndarray
+
+    @property
+    def dist(self):
+        return stats.betabinom(self.n, self.alpha, self.beta)
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self.n * self.alpha / (self.alpha + self.beta)
+
+    @property
+    def var(self) -> np.ndarray:
+        total = self.alpha + self.beta
+        return self.n * self.alpha * self.beta * (total + self.n) / (total ** 2 * (total + 1.0))
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.var)
+
+    def pmf(self, k) -> np.ndarray:
+        return self.dist.pmf(k)
+
+    def cdf(self, k) -> np.ndarray:
+        return self.dist.cdf(k)
+
+    def interval(self, prob: float = 0.95):
+        """Equal-tailed predictive interval (lower, upper) of success counts"""
+        return self.dist.interval(prob)
+
+
+@dataclass
+class BetaPosterior:
+    """
+    Beta(alpha, beta) posteriors for an array of arms.
+    """
+    alpha: np.ndarray
+    beta: np.ndarray
+
+    @classmethod
+    def from_counts(cls, attempts, successes, prior: BetaPrior = BetaPrior()) -> "BetaPosterior":
+        """
+        Conjugate update of `prior` with Binomial counts.
+
+        Args:
+            attempts: Number of trials per arm
+            successes: Number of successes per arm
+
+        Returns:
+            BetaPosterior: Beta(α₀ + successes, β₀ + attempts - successes)
+        """
+        attempts, successes = validate_counts(attempts, successes)
+        return cls(prior.alpha + successes, prior.beta + (attempts - successes))
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self.alpha / (self.alpha + self.beta)
+
+    @property
+    def var(self) -> np.ndarray:
+        total = self.alpha + self.beta
+        return self.alpha * self.beta / (total ** 2 * (total + 1.0))
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.var)
+
+    @property
+    def mode(self) -> np.ndarray:
+        """Posterior mode, clipped to [0, 1] when a parameter is below 1"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mode = (self.alpha - 1.0) / (self.alpha + self.beta - 2.0)
+        mode = np.where(self.alpha <= 1.0, 0.0, mode)
+        return np.where(self.beta <= 1.0, np.where(self.alpha <= 1.0, np.nan, 1.0), mode)
+
+    def pdf(self, x) -> np.ndarray:
+        return stats.beta.pdf(x, self.alpha, self.beta)
+
+    def quantile(self, q) -> np.ndarray:
+        """Posterior quantiles; `q` broadcasts against the arms"""
+        return stats.beta.ppf(q, self.alpha, self.beta)
+
+    def interval(self, prob: float = 0.95):
+        """Equal-tailed credible interval (lower, upper)"""
+        tail = (1.0 - prob) / 2.0
+        return self.quantile(tail), self.quantile(1.0 - tail)
+
+    def hdi(self, prob: float = 0.95, tol: float = 1e-7):
+        """
+        Highest-density interval (lower, upper): the narrowest interval holding `prob`.
+        """
+        if not 0.0 < prob < 1.0:
+            raise ValueError("prob must be between 0 and 1")
+        alpha, beta = np.broadcast_arrays(self.alpha, self.beta)
+        with warnings.catch_warnings():
+            # The search probes tail masses near 0 and 1, where the Beta quantile
+            # of a J-shaped posterior warns about slow convergence
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return _min_width_interval(lambda p: stats.beta.ppf(p, alpha, beta), prob, alpha.shape, tol)
+
+    def predictive(self, n) -> BetaBinomialPredictive:
+        """Predictive distribution of successes in `n` new attempts per arm"""
+        n, alpha, beta = np.broadcast_arrays(np.asarray(n, dtype=np.int64), self.alpha, self.beta)
+        return BetaBinomialPredictive(n, alpha, beta)
+
+    def sample(self, size=None, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """Draw posterior samples; `size` is prepended to the arm shape"""
+        rng = np.random.default_rng() if rng is None else rng
+        shape = np.broadcast(self.alpha, self.beta).shape
+        size = () if size is None else tuple(np.atleast_1d(size))
+        return rng.beta(self.alpha, self.beta, size=size + shape)
+
+    def summary(self, prob: float = 0.95) -> Dict[str, np.ndarray]:
+        """Mean, std and HDI bounds for every arm"""
+        lower, upper = self.hdi(prob)
+        return {
+            "alpha": np.asarray(self.alpha),
+            "beta": np.asarray(self.beta),
+            "mean": self.mean,
+            "std": self.std,
+            "hdi_lower": lower,
+            "hdi_upper": upper,
+        }
+
+
+@dataclass
+class SampledPosterior:
+    """
+    Posterior represented by MCMC draws of shape (draws, arms), with the same
+    summaries as `BetaPosterior`.
+    """
+    draws: np.ndarray
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self.draws.mean(axis=0)
+
+    @property
+    def var(self) -> np.ndarray:
+        return self.draws.var(axis=0)
+
+    @property
+    def std(self) -> np.ndarray:
+        return self.draws.std(axis=0)
+
+    def quantile(self, q) -> np.ndarray:
+        return np.quantile(self.draws, q, axis=0)
+
+    def interval(self, prob: float = 0.95):
+        tail = (1.0 - prob) / 2.0
+        return self.quantile(tail), self.quantile(1.0 - tail)
+
+    def hdi(self, prob: float = 0.95):
+        """Narrowest window of sorted draws holding `prob` of them, per arm"""
+        ordered = np.sort(self.draws, axis=0)
+        n = ordered.shape[0]
+        k = max(1, int(np.floor(prob * n)))
+        widths = ordered[k:] - ordered[:n - k]
+        start = np.argmin(widths, axis=0)
+        cols = np.arange(ordered.shape[1]) if ordered.ndim > 1 else ()
+        return ordered[start, cols], ordered[start + k, cols]
+
+    def predictive(self, n) -> Dict[str, np.ndarray]:
+        """Predictive mean and variance of successes in `n` new attempts"""
+        n = np.asarray(n, dtype=np.float64)
+        mean_p = self.mean
+        return {
+            "mean": n * mean_p,
+            "var": n * (self.draws * (1.0 - self.draws)).mean(axis=0) + n ** 2 * self.var,
+        }
+
+    def summary(self, prob: float = 0.95) -> Dict[str, np.ndarray]:
+        lower, upper = self.hdi(prob)
+        return {"mean": self.mean, "std": self.std, "hdi_lower": lower, "hdi_upper": upper}
+
+
+def sample_posterior(
+    attempts,
+    successes,
+    prior: Callable[[int], object],
+    draws: int = 2000,
+    tune: int = 1000,
+    chains: int = 2,
+    random_seed: Optional[int] = 42,
+    **sample_kwargs,
+) -> SampledPosterior:
+    """
+    Fit a non-conjugate prior by MCMC, with one vectorized Binomial likelihood.
+
+    Args:
+        attempts: Number of trials per arm
+        successes: Number of successes per arm
+        prior: Called inside the model as `prior(n_arms)`; returns the tensor of
+         per-arm success probabilities, e.g.
+         ``lambda k: pm.math.invlogit(pm.Normal("logit_p", 0, 1.5, shape=k))``
+        draws, tune, chains, random_seed: Passed to `pm.sample`
+
+    Returns:
+        SampledPosterior: Draws of the success probabilities
+    """
+    import pymc as pm
+
+    from metrics import sample
+
+    attempts, successes = validate_counts(attempts, successes)
+    attempts, successes = np.atleast_1d(attempts), np.atleast_1d(successes)
+    with pm.Model():
+        p = pm.Deterministic("p", prior(attempts.size))
+        pm.Binomial("obs", n=attempts, p=p, observed=successes)
+        trace = sample(
+            draws, tune=tune, chains=chains, random_seed=random_seed, progressbar=False, **sample_kwargs
+        )
+    values = trace.posterior["p"].values
+    return SampledPosterior(values.reshape(-1, values.shape[-1]))
+
+
+def posterior(
+    attempts,
+    successes,
+    prior: Union[BetaPrior, Callable[[int], object]] = BetaPrior(),
+    **sample_kwargs,
+) -> Union[BetaPosterior, SampledPosterior]:
+    """
+    Posterior of per-arm success probabilities: closed form for a `BetaPrior`,
+    MCMC (see `sample_posterior`) for any other prior.
+    """
+    if isinstance(prior, BetaPrior):
+        if sample_kwargs:
+            raise TypeError("Sampler arguments are only used for non-conjugate priors")
+        return BetaPosterior.from_counts(attempts, successes, prior)
+    return sample_posterior(attempts, successes, prior, **sample_kwargs)
@@ -0,0 +1,230 @@
+"""
+Fast approximate fits as an alternative to NUTS, with an accuracy report.
+
+`fit(model, mode)` returns posterior draws as InferenceData for every mode:
+
+* "nuts": `pm.sample`, the reference
+* "advi": mean-field ADVI (`pm.fit`), then draws from the approximation
+* "fullrank_advi": full-rank ADVI, which also captures posterior correlations
+* "laplace": Gaussian approximation at the posterior mode in the unconstrained
+  space (optimised with L-BFGS, covariance from the Hessian), mapped back
+  through the transforms. It is the fastest and is accurate when the
+  posterior is close to normal on the logit/log scale, i.e. with plenty of data.
+
+`compare_fit_modes` times each mode on a fresh model and reports how far its
+posterior means and standard deviations are from a reference: the closed-form
+Beta posterior for the Beta-Binomial model, NUTS otherwise.
+
+    python fit_modes.py [--draws 2000]
+"""
+
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+FIT_MODES = ("nuts", "advi", "fullrank_advi", "laplace")
+
+# Arguments of pm.sample that only apply to NUTS; other modes ignore them
+_NUTS_ONLY = frozenset({"tune", "chains", "cores", "target_accept", "max_treedepth", "init", "step", "nuts_sampler"})
+
+
+def laplace(model, draws: int = 2000, random_seed: Optional[int] = None):
+    """
+    Laplace approximation of the posterior of `model`.
+
+    Returns:
+        az.InferenceData: `draws` draws (one chain) of every free variable and
+         deterministic
+    """
+    import arviz as az
+    from pymc.blocking import DictToArrayBijection, RaveledVars
+    from scipy.optimize import minimize
+
+    value_vars = model.value_vars
+    start = model.initial_point(random_seed)
+    x0 = DictToArrayBijection.map({v.name: start[v.name] for v in value_vars})
+
+    def unravel(x):
+        return DictToArrayBijection.rmap(RaveledVars(x, x0.point_map_info))
+
+    # Density of the unconstrained values (including the log-Jacobian of the
+    # transforms) and its gradient in one compiled function, as NUTS uses.
+    # The Hessian is taken by central differences of the gradient: compiling
+    # the symbolic one costs several times more than the whole fit
+    logp_dlogp = model.logp_dlogp_function(ravel_inputs=True, initial_point=start)
+    logp_dlogp.set_extra_values({})
+
+    def negative(x):
+        logp, dlogp = logp_dlogp(x)
+        return -logp, -dlogp
+
+    result = minimize(negative, x0.data, jac=True, method="L-BFGS-B")
+    steps = 1e-5 * np.maximum(1.0, np.abs(result.x))
+    hessian = np.empty((result.x.size, result.x.size))
+    for i, h in enumerate(steps):
+        shift = np.zeros_like(result.x)
+        shift[i] = h
+        hessian[:, i] = (negative(result.x + shift)[1] - negative(result.x - shift)[1]) / (2 * h)
+    cov = np.linalg.pinv((hessian + hessian.T) / 2.0)
+
+    rng = np.random.default_rng(random_seed)
+    flat = rng.multivariate_normal(result.x, cov, size=draws, method="eigh")
+
+    # Map every unconstrained draw back to the model's variables
+    outputs = [v for v in model.unobserved_value_vars if not v.name.endswith("__")]
+    to_constrained = model.compile_fn(outputs, inputs=value_vars, on_unused_input="ignore")
+    samples = [to_constrained(unravel(x)) for x in flat]
+    posterior = {
+        var.name: np.stack([s[i] for s in samples])[np.newaxis] for i, var in enumerate(outputs)
+    }
+    dims = {name: list(dims) for name, dims in model.named_vars_to_dims.items() if name in posterior}
+    return az.from_dict(posterior=posterior, coords=model.coords, dims=dims)
+
+
+def fit(model, mode: str = "nuts", draws: int = 2000, random_seed: Optional[int] = None,
+        n_iterations: int = 20000, progressbar: bool = False, **sample_kwargs):
+    """
+    Fit `model` with one of `FIT_MODES`.
+
+    Args:
+        model: The PyMC model
+        mode: "nuts", "advi", "fullrank_advi" or "laplace"
+        draws: Posterior draws (per chain for NUTS)
+        random_seed: Seed for sampling, optimisation and approximation draws
+        n_iterations: Optimisation steps for the ADVI modes
+        progressbar: Show PyMC's progress bar
+        **sample_kwargs: Passed to `pm.sample` for NUTS; NUTS-only settings
+         (tune, chains, cores, target_accept, ...) are ignored by the other modes
+
+    Returns:
+        az.InferenceData: Posterior draws
+    """
+    import pymc as pm
+
+    from metrics import sample
+
+    if mode == "nuts":
+        return sample(draws, model=model, random_seed=random_seed, progressbar=progressbar, **sample_kwargs)
+    unknown = set(sample_kwargs) - _NUTS_ONLY
+    if unknown:
+        raise TypeError(f"Unexpected arguments for mode {mode!r}: {sorted(unknown)}")
+    if mode in ("advi", "fullrank_advi"):
+        with model:
+            approx = pm.fit(n=n_iterations, method=mode, random_seed=random_seed, progressbar=progressbar)
+        return approx.sample(draws, random_seed=random_seed)
+    if mode == "laplace":
+        return laplace(model, draws, random_seed)
+    raise ValueError(f"Unknown fit mode {mode!r}; expected one of {FIT_MODES}")
+
+
+def posterior_moments(trace, var_names: Iterable[str]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Posterior mean and std of every variable, over chains and draws"""
+    out = {}
+    for name in var_names:
+        values = trace.posterior[name]
+        out[name] = (values.mean(dim=("chain", "draw")).values, values.std(dim=("chain", "draw")).values)
+    return out
+
+
+def compare_fit_modes(
+    build: Callable[[], object],
+    var_names: Iterable[str],
+    reference: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None,
+    modes: Iterable[str] = FIT_MODES,
+    draws: int = 2000,
+    random_seed: int = 42,
+    **nuts_kwargs,
+):
+    """
+    Wall time and accuracy of every fit mode.
+
+    Args:
+        build: Returns a fresh model, so that every mode pays its own compilation
+        var_names: Variables to compare
+        reference: Exact `{name: (mean, std)}`; defaults to the NUTS fit
+        modes: Modes to run
+        draws: Posterior draws per mode
+        random_seed: Seed for every mode
+        **nuts_kwargs: Extra `pm.sample` arguments for NUTS (tune, chains, ...)
+
+    Returns:
+        pd.DataFrame: Per mode, the wall time, the speedup over NUTS and the
+         largest absolute error of the posterior means and relative error of
+         the posterior stds against the reference
+    """
+    import pandas as pd
+
+    var_names = list(var_names)
+    modes = list(modes)
+    if reference is None and "nuts" not in modes:
+        modes = ["nuts", *modes]
+
+    rows, moments = [], {}
+    for mode in modes:
+        model = build()
+        start = time.perf_counter()
+        trace = fit(model, mode, draws=draws, random_seed=random_seed, **(nuts_kwargs if mode == "nuts" else {}))
+        seconds = time.perf_counter() - start
+        moments[mode] = posterior_moments(trace, var_names)
+        rows.append({"mode": mode, "seconds": seconds})
+
+    reference = moments["nuts"] if reference is None else reference
+    for row in rows:
+        mean_err, std_err = 0.0, 0.0
+        for name in var_names:
+            mean, std = moments[row["mode"]][name]
+            ref_mean, ref_std = (np.asarray(v) for v in reference[name])
+            mean_err = max(mean_err, float(np.max(np.abs(mean - ref_mean))))
+            std_err = max(std_err, float(np.max(np.abs(std - ref_std) / ref_std)))
+        row.update(max_mean_error=mean_err, max_std_rel_error=std_err)
+
+    df = pd.DataFrame(rows)
+    nuts_seconds = df.loc[df["mode"] == "nuts", "seconds"]
+    df["speedup"] = nuts_seconds.iloc[0] / df["seconds"] if len(nuts_seconds) else np.nan
+    return df[["mode", "seconds", "speedup", "max_mean_error", "max_std_rel_error"]]
+
+
+def main() -> None:
+    import argparse
+    import logging
+
+    from conjugate import BetaPosterior, BetaPrior
+    from models import beta_binomial_model, hierarchical_model
+
+    parser = argparse.ArgumentParser(description="Accuracy and wall time of the fit modes against NUTS")
+    parser.add_argument("--draws", type=int, default=2000)
+    parser.add_argument("--cores", type=int, default=None)
+    args = parser.parse_args()
+    logging.getLogger("pymc").setLevel(logging.ERROR)
+
+    methods = ["Transit", "Radial Velocity", "Direct Imaging", "Microlensing"]
+    attempts, successes = [1000, 800, 200, 150], [450, 320, 25, 18]
+    nuts = {"tune": 1000, "chains": 2, "target_accept": 0.9}
+    if args.cores is not None:
+        nuts["cores"] = args.cores
+    fmt = {"float_format": lambda v: f"{v:.4g}", "index": False}
+
+    exact = BetaPosterior.from_counts(attempts, successes, BetaPrior(2, 3))
+    report = compare_fit_modes(
+        lambda: beta_binomial_model(attempts, successes, alpha_prior=2, beta_prior=3),
+        ["detection_probability"],
+        reference={"detection_probability": (exact.mean, exact.std)},
+        draws=args.draws,
+        **nuts,
+    )
+    print("Beta-Binomial model, against the closed-form posterior")
+    print(report.to_string(**fmt))
+
+    report = compare_fit_modes(
+        lambda: hierarchical_model(attempts, successes, groups=methods),
+        ["population_mean", "method_probabilities"],
+        draws=args.draws,
+        **nuts,
+    )
+    print("\nHierarchical model, against NUTS")
+    print(report.to_string(**fmt))
+
+
+if __name__ == "__main__":
+    main()
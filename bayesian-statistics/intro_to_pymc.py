@@ -1,78 +1,191 @@
-import matplotlib.pyplot as plt
+"""
+Introduction to PyMC: a conversion rate with a Beta(2, 8) prior and Binomial
+data, sampled with PyMC and compared with the analytical Beta posterior.
+
+Run it as a script
+
+    python intro_to_pymc.py                        # show the figures
+    python intro_to_pymc.py --output-dir figures   # headless: write PNGs
+    python intro_to_pymc.py --no-plots --json -    # numbers only, as JSON
+    python intro_to_pymc.py --no-mcmc --no-plots   # analytical posterior only
+
+or import `run` and the steps it calls. PyMC, matplotlib and scipy are only
+imported by the steps that use them.
+"""
+
+from typing import Dict, List, Optional
+
 import numpy as np
-import pymc as pm
-from scipy import stats
+
+from cli import Figures, run_cli
 
 # Observed data
-n_trials = 50
-n_successes = 15
-
-# Create the model
-with pm.Model() as beta_binomial_model:
-    # Beta prior for conversion rate
-    theta = pm.Beta("theta", alpha=2, beta=8)
-
-    # Binomial likelihood
-    obs = pm.Binomial("obs", n=n_trials, p=theta, observed=n_successes)
-
-    # Sample from posterior
-    trace = pm.sample(2000, return_inferencedata=True)
-
-# Analytical posterior (for comparison)
-posterior_alpha = 2 + n_successes  # 17
-posterior_beta = 8 + (n_trials - n_successes)  # 43
-
-print(f"Analytical posterior: Beta({posterior_alpha}, {posterior_beta})")
-print(
-    f"Analytical posterior mean: {posterior_alpha / (posterior_alpha + posterior_beta):.3f}"
-)
-
-# PyMC results
-print(f"PyMC posterior mean: {trace.posterior['theta'].mean():.3f}")
-print(f"PyMC 95% HDI: {pm.hdi(trace.posterior['theta'], hdi_prob=0.95)}")
-
-# Plot prior vs posterior comparison
-plt.figure(figsize=(10, 6))
-x = np.linspace(0, 1, 1000)
-
-# Calculate densities using scipy for easier plotting
-prior_pdf = stats.beta.pdf(x, a=2, b=8)
-posterior_pdf = stats.beta.pdf(x, a=17, b=43)
-
-plt.plot(x, prior_pdf, label="Prior Beta(2,8)", alpha=0.7, linewidth=2)
-plt.plot(x, posterior_pdf, label="Posterior Beta(17,43)", alpha=0.7, linewidth=2)
-plt.axvline(
-    n_successes / n_trials,
-    color="red",
-    linestyle="--",
-    label=f"Observed rate ({n_successes}/{n_trials} = {n_successes/n_trials:.1%})",
-)
-plt.xlabel("Conversion Rate")
-plt.ylabel("Density")
-plt.legend()
-plt.title("Prior vs Posterior Distribution")
-plt.grid(True, alpha=0.3)
-plt.show()
-
-# Plot PyMC trace
-pm.plot_trace(trace, var_names=["theta"])
-plt.show()
-
-# Plot posterior samples histogram
-plt.figure(figsize=(10, 6))
-posterior_samples = trace.posterior["theta"].values.flatten()
-plt.hist(
-    posterior_samples,
-    bins=50,
-    density=True,
-    alpha=0.7,
-    label="PyMC Samples",
-    color="skyblue",
-)
-plt.plot(x, posterior_pdf, "r-", linewidth=2, label="Analytical Beta(17,43)")
-plt.xlabel("Conversion Rate")
-plt.ylabel("Density")
-plt.legend()
-plt.title("PyMC Posterior Samples vs Analytical Solution")
-plt.grid(True, alpha=0.3)
-plt.show()
+N_TRIALS = 50
+N_SUCCESSES = 15
+
+# Beta prior for conversion rate
+ALPHA_PRIOR = 2
+BETA_PRIOR = 8
+
+
+def analytical_posterior(n_trials: int = N_TRIALS, n_successes: int = N_SUCCESSES) -> dict:
+    """Conjugate Beta posterior parameters and mean"""
+    posterior_alpha = ALPHA_PRIOR + n_successes  # 17
+    posterior_beta = BETA_PRIOR + (n_trials - n_successes)  # 43
+    return {
+        "alpha": posterior_alpha,
+        "beta": posterior_beta,
+        "mean": posterior_alpha / (posterior_alpha + posterior_beta),
+    }
+
+
+def build_model(n_trials: int = N_TRIALS, n_successes: int = N_SUCCESSES):
+    """The Beta-Binomial model, with the counts in data containers"""
+    import pymc as pm
+
+    with pm.Model() as beta_binomial_model:
+        # Data containers: new counts can be swapped in with pm.set_data and
+        # resampled without rebuilding the model
+        trials = pm.Data("n_trials", n_trials)
+        successes = pm.Data("n_successes", n_successes)
+
+        # Beta prior for conversion rate
+        theta = pm.Beta("theta", alpha=ALPHA_PRIOR, beta=BETA_PRIOR)
+
+        # Binomial likelihood
+        pm.Binomial("obs", n=trials, p=theta, observed=successes)
+    return beta_binomial_model
+
+
+def fit(model, use_cache: bool = True, fit_mode: str = "nuts", **sample_kwargs):
+    """Sample the posterior, through the trace cache unless `use_cache` is False"""
+    if fit_mode != "nuts":
+        import fit_modes
+
+        return fit_modes.fit(model, fit_mode, **{"draws": 2000, "random_seed": 42, **sample_kwargs})
+    settings = {"draws": 2000, "random_seed": 42, "return_inferencedata": True, **sample_kwargs}
+    with model:
+        if use_cache:
+            from trace_cache import TraceCache
+
+            # Reruns with unchanged data and settings reuse the stored trace
+            return TraceCache().sample(**settings)
+        from metrics import sample
+
+        return sample(**settings)
+
+
+def summarize(trace) -> dict:
+    """Posterior mean and 95% HDI of theta from the samples"""
+    import arviz as az
+
+    samples = trace.posterior["theta"]
+    hdi = az.hdi(samples, hdi_prob=0.95)["theta"].values
+    return {"mean": float(samples.mean()), "hdi_95": [float(hdi[0]), float(hdi[1])]}
+
+
+def make_plots(trace, analytical: dict, output_dir: Optional[str] = None) -> List[str]:
+    """Draw the three figures, shown or written to `output_dir`; returns the written paths"""
+    import arviz as az
+    from scipy import stats
+
+    figures = Figures(output_dir)
+    plt = figures.plt
+    post_alpha, post_beta = analytical["alpha"], analytical["beta"]
+
+    # Plot prior vs posterior comparison
+    plt.figure(figsize=(10, 6))
+    x = np.linspace(0, 1, 1000)
+
+    # Calculate densities using scipy for easier plotting
+    prior_pdf = stats.beta.pdf(x, a=ALPHA_PRIOR, b=BETA_PRIOR)
+    posterior_pdf = stats.beta.pdf(x, a=post_alpha, b=post_beta)
+
+    plt.plot(x, prior_pdf, label=f"Prior Beta({ALPHA_PRIOR},{BETA_PRIOR})", alpha=0.7, linewidth=2)
+    plt.plot(x, posterior_pdf, label=f"Posterior Beta({post_alpha},{post_beta})", alpha=0.7, linewidth=2)
+    plt.axvline(
+        N_SUCCESSES / N_TRIALS,
+        color="red",
+        linestyle="--",
+        label=f"Observed rate ({N_SUCCESSES}/{N_TRIALS} = {N_SUCCESSES/N_TRIALS:.1%})",
+    )
+    plt.xlabel("Conversion Rate")
+    plt.ylabel("Density")
+    plt.legend()
+    plt.title("Prior vs Posterior Distribution")
+    plt.grid(True, alpha=0.3)
+    figures.finish("1_prior_posterior")
+
+    # Plot PyMC trace
+    az.plot_trace(trace, var_names=["theta"])
+    figures.finish("2_trace")
+
+    # Plot posterior samples histogram
+    plt.figure(figsize=(10, 6))
+    posterior_samples = trace.posterior["theta"].values.flatten()
+    plt.hist(
+        posterior_samples,
+        bins=50,
+        density=True,
+        alpha=0.7,
+        label="PyMC Samples",
+        color="skyblue",
+    )
+    plt.plot(x, posterior_pdf, "r-", linewidth=2, label=f"Analytical Beta({post_alpha},{post_beta})")
+    plt.xlabel("Conversion Rate")
+    plt.ylabel("Density")
+    plt.legend()
+    plt.title("PyMC Posterior Samples vs Analytical Solution")
+    plt.grid(True, alpha=0.3)
+    figures.finish("3_samples_vs_analytical")
+    return figures.saved
+
+
+def run(
+    mcmc: bool = True,
+    plots: bool = True,
+    output_dir: Optional[str] = None,
+    use_cache: bool = True,
+    verbose: bool = True,
+    fit_mode: str = "nuts",
+    **sample_kwargs,
+) -> Dict[str, object]:
+    """
+    Run the example and return its numeric results.
+
+    Args:
+        mcmc: Sample with PyMC; False keeps only the analytical posterior
+        plots: Draw the figures (requires `mcmc`)
+        output_dir: Write the figures here instead of showing them
+        use_cache: Sample through `trace_cache.TraceCache`
+        verbose: Print the results
+        fit_mode: "nuts", or a faster approximation from `fit_modes.FIT_MODES`
+        **sample_kwargs: Override the `pm.sample` settings
+
+    Returns:
+        dict: JSON-serializable results
+    """
+    say = print if verbose else (lambda *args, **kwargs: None)
+    analytical = analytical_posterior()
+    say(f"Analytical posterior: Beta({analytical['alpha']}, {analytical['beta']})")
+    say(f"Analytical posterior mean: {analytical['mean']:.3f}")
+    results: Dict[str, object] = {"n_trials": N_TRIALS, "n_successes": N_SUCCESSES, "analytical": analytical}
+    if not mcmc:
+        return results
+
+    trace = fit(build_model(), use_cache, fit_mode, **sample_kwargs)
+    pymc_results = summarize(trace)
+    say(f"PyMC posterior mean: {pymc_results['mean']:.3f}")
+    say(f"PyMC 95% HDI: [{pymc_results['hdi_95'][0]:.3f}, {pymc_results['hdi_95'][1]:.3f}]")
+    results["pymc"] = {**pymc_results, "fit_mode": fit_mode}
+    if plots:
+        results["figures"] = make_plots(trace, analytical, output_dir)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    run_cli(run, "Introduction to PyMC: a Beta-Binomial conversion rate", argv)
+
+
+if __name__ == "__main__":
+    main()
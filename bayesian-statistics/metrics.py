@@ -0,0 +1,210 @@
+"""
+Sampler performance metrics for every `pm.sample` call, as JSON lines.
+
+`metrics.sample` is a drop-in for `pm.sample`. When a metrics log is set (the
+`SAMPLER_METRICS` environment variable, `--metrics FILE` on the scripts, or
+`metrics_log=`), it appends one record per fit with
+
+* the wall time split into compilation and initialisation (until the first
+  draw), tuning, drawing and conversion to InferenceData, timed from the
+  per-draw sampler callback,
+* bulk and tail ESS, ESS per second of the whole fit and r-hat per variable
+  (worst element of vector variables; null for a single chain, which has no
+  between-chain variance),
+* divergences, the share of draws that hit the maximum tree depth and the
+  number of gradient evaluations.
+
+Without a log it calls `pm.sample` unchanged. The scripts, `TraceCache`,
+`ReusableModel` and `fit_modes` sample through it; cache hits do not sample
+and are not recorded.
+
+    SAMPLER_METRICS=metrics.jsonl python beta_binomial_model.py --no-plots
+    python metrics.py metrics.jsonl      # rank the models by cost
+"""
+
+import datetime
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+METRICS_ENV = "SAMPLER_METRICS"
+
+
+def metrics_path() -> Optional[str]:
+    """Metrics log from the environment, or None when disabled"""
+    return os.environ.get(METRICS_ENV) or None
+
+
+class PhaseTimer:
+    """
+    `pm.sample` callback attributing the wall time between consecutive draws to
+    tuning or drawing; the time before the first draw is compilation and setup.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.start = time.perf_counter()
+        self.first = None
+        self.last = self.start
+        self.tune_seconds = 0.0
+        self.draw_seconds = 0.0
+
+    def __call__(self, trace, draw):
+        now = time.perf_counter()
+        if self.first is None:
+            self.first = now
+        elif draw.tuning:
+            self.tune_seconds += now - self.last
+        else:
+            self.draw_seconds += now - self.last
+        self.last = now
+        if self.callback is not None:
+            self.callback(trace=trace, draw=draw)
+
+    @property
+    def compile_seconds(self) -> float:
+        return (self.start if self.first is None else self.first) - self.start
+
+
+def model_label(model) -> str:
+    """The model's name, or its free variables when it has none"""
+    return model.name or "+".join(sorted(rv.name for rv in model.free_RVs))
+
+
+def fit_metrics(trace, timer: PhaseTimer, end: float, label: str) -> Dict[str, object]:
+    """Metrics record of one fit; `end` is the time `pm.sample` returned"""
+    import arviz as az
+    import numpy as np
+
+    posterior = trace.posterior
+    total = end - timer.start
+    ess_bulk = az.ess(trace, method="bulk")
+    ess_tail = az.ess(trace, method="tail")
+    chains = int(posterior.sizes["chain"])
+    r_hat = az.rhat(trace) if chains > 1 else None
+    variables = {}
+    for name in posterior.data_vars:
+        bulk = float(np.nanmin(ess_bulk[name].values))
+        worst = None
+        if r_hat is not None and not np.isnan(r_hat[name].values).all():
+            worst = float(np.nanmax(r_hat[name].values))
+        tail = float(np.nanmin(ess_tail[name].values))
+        variables[name] = {
+            "ess_bulk": bulk,
+            "ess_tail": tail,
+            "ess_bulk_per_second": bulk / total,
+            "ess_tail_per_second": tail / total,
+            "r_hat": worst,
+        }
+
+    stats = trace.sample_stats
+    record = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "label": label,
+        "chains": chains,
+        "draws": int(posterior.sizes["draw"]),
+        "tune": int(posterior.attrs.get("tuning_steps", 0)),
+        "compile_seconds": timer.compile_seconds,
+        "tune_seconds": timer.tune_seconds,
+        "draw_seconds": timer.draw_seconds,
+        "postprocess_seconds": end - timer.last,
+        "total_seconds": total,
+        "divergences": int(stats["diverging"].sum()) if "diverging" in stats else 0,
+        "treedepth_saturation": (
+            float(stats["reached_max_treedepth"].mean()) if "reached_max_treedepth" in stats else 0.0
+        ),
+        "gradient_evaluations": int(stats["n_steps"].sum()) if "n_steps" in stats else None,
+        "min_ess_bulk": min(v["ess_bulk"] for v in variables.values()),
+        "min_ess_tail": min(v["ess_tail"] for v in variables.values()),
+        "max_r_hat": max((v["r_hat"] for v in variables.values() if v["r_hat"] is not None), default=None),
+        "variables": variables,
+    }
+    record["min_ess_bulk_per_second"] = record["min_ess_bulk"] / total
+    return record
+
+
+def append_record(path: str, record: Dict[str, object]) -> None:
+    # One write per line, so records from parallel workers do not interleave
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def sample(draws: int = 1000, model=None, label: Optional[str] = None, metrics_log: Optional[str] = None, **kwargs):
+    """
+    `pm.sample`, recording a metrics record when a metrics log is set.
+
+    Args:
+        draws: Draws per chain
+        model: The model (default: the one on the context stack)
+        label: Name of the model in the report (default: `model_label`)
+        metrics_log: JSON lines file to append to (default: `SAMPLER_METRICS`)
+        **kwargs: Passed to `pm.sample`; a `callback` is still called
+
+    Returns:
+        az.InferenceData: The trace
+    """
+    import pymc as pm
+
+    path = metrics_log or metrics_path()
+    if path is None:
+        return pm.sample(draws, model=model, **kwargs)
+    model = pm.modelcontext(model)
+    timer = PhaseTimer(kwargs.pop("callback", None))
+    trace = pm.sample(draws, model=model, callback=timer, **kwargs)
+    append_record(path, fit_metrics(trace, timer, time.perf_counter(), label or model_label(model)))
+    return trace
+
+
+def load_records(path: str) -> List[Dict[str, object]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def rank_models(records: List[Dict[str, object]]):
+    """
+    Cost of every model label over its recorded fits, most expensive first.
+
+    The cost is the wall time per effective draw of the worst variable,
+    `total_seconds / min_ess_bulk`, so slow samplers and poorly mixing models
+    both rank high.
+
+    Returns:
+        pd.DataFrame: One row per label with the number of fits, mean phase
+         times, cost, worst ESS per second, divergences, tree-depth
+         saturation and r-hat
+    """
+    import pandas as pd
+
+    df = pd.DataFrame([{k: v for k, v in r.items() if k != "variables"} for r in records])
+    df["seconds_per_effective_draw"] = df["total_seconds"] / df["min_ess_bulk"]
+    summary = df.groupby("label").agg(
+        fits=("total_seconds", "size"),
+        total_seconds=("total_seconds", "mean"),
+        compile_seconds=("compile_seconds", "mean"),
+        tune_seconds=("tune_seconds", "mean"),
+        draw_seconds=("draw_seconds", "mean"),
+        seconds_per_effective_draw=("seconds_per_effective_draw", "mean"),
+        min_ess_bulk_per_second=("min_ess_bulk_per_second", "min"),
+        divergences=("divergences", "sum"),
+        treedepth_saturation=("treedepth_saturation", "mean"),
+        max_r_hat=("max_r_hat", "max"),
+    )
+    return summary.sort_values("seconds_per_effective_draw", ascending=False)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rank the models in a sampler metrics log by cost")
+    parser.add_argument("log", nargs="?", default=metrics_path(), help=f"JSON lines file (default: ${METRICS_ENV})")
+    args = parser.parse_args()
+    if args.log is None:
+        parser.error(f"no metrics log given and {METRICS_ENV} is not set")
+
+    report = rank_models(load_records(args.log))
+    print(report.to_string(float_format=lambda v: f"{v:.4g}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Build report figures as PNG files in a process pool, from precomputed data.
+
+A figure is a `FigureSpec`: a renderer name and the small arrays it draws.
+The expensive part, reducing a trace of possibly millions of draws, happens
+once in the calling process when the spec is made:
+
+* densities are Gaussian KDEs computed on a fine histogram of all draws
+  (one O(draws) pass, then a convolution over the bins),
+* trace lines are thinned to at most `max_points` per chain,
+* HDIs come from at most `max_draws` evenly spaced draws.
+
+`build_report` hashes every spec, skips figures whose hash matches the one
+recorded in `output_dir` on the last run, and renders the rest on Agg
+canvases across worker processes, without touching the pyplot backend.
+
+Example:
+
+    from report import axes_figure, build_report, posterior_figure, trace_figure
+
+    specs = [
+        trace_figure("trace", trace, ["population_mean"], "Trace"),
+        posterior_figure("posterior", trace, ["method_probabilities"], "Posteriors"),
+        axes_figure("rates", [("bar", (x, means), {"yerr": stds})], title="Rates"),
+    ]
+    paths = build_report(specs, "figures")
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Bump when a renderer changes, so every figure is redrawn once
+RENDER_VERSION = 1
+MANIFEST = ".report.json"
+KDE_GRID = 512
+DEFAULT_MAX_POINTS = 2000
+DEFAULT_MAX_DRAWS = 100_000
+
+
+@dataclass(frozen=True)
+class FigureSpec:
+    """One figure: `kind` names a renderer and `data` holds everything it draws"""
+    name: str
+    kind: str
+    data: dict
+
+
+def binned_kde(samples, grid: int = KDE_GRID) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gaussian KDE of `samples` on `grid` points over their range, with
+    Silverman's bandwidth, computed by smoothing a histogram instead of summing
+    one kernel per draw. Mass is reflected at the ends of the range.
+    """
+    samples = np.asarray(samples, dtype=np.float64).ravel()
+    std = samples.std()
+    if samples.size < 2 or std == 0.0:
+        center = samples.mean() if samples.size else 0.0
+        return np.array([center, center]), np.array([0.0, 0.0])
+    bandwidth = 1.06 * std * samples.size ** -0.2
+    counts, edges = np.histogram(samples, bins=grid)
+    width = edges[1] - edges[0]
+    sigma = bandwidth / width
+    half = int(np.ceil(4 * sigma))
+    kernel = np.exp(-0.5 * (np.arange(-half, half + 1) / sigma) ** 2)
+    # Reflect the counts at the sample range, so no mass leaks past a bound
+    padded = np.pad(counts.astype(np.float64), half, mode="symmetric")
+    density = np.convolve(padded, kernel / kernel.sum(), mode="valid") / (samples.size * width)
+    return (edges[:-1] + edges[1:]) / 2, density
+
+
+def thin(values: np.ndarray, max_points: int = DEFAULT_MAX_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """Every k-th draw of a (chain, draw) array so that at most `max_points` remain per chain"""
+    step = max(1, int(np.ceil(values.shape[1] / max_points)))
+    return np.arange(0, values.shape[1], step), values[:, ::step]
+
+
+def hdi(samples, prob: float, max_draws: int = DEFAULT_MAX_DRAWS) -> Tuple[float, float]:
+    """Narrowest interval holding `prob` of (at most `max_draws` evenly spaced) samples"""
+    samples = np.asarray(samples).ravel()
+    ordered = np.sort(samples[::max(1, samples.size // max_draws)])
+    k = max(1, int(np.floor(prob * ordered.size)))
+    if k >= ordered.size:
+        return float(ordered[0]), float(ordered[-1])
+    start = int(np.argmin(ordered[k:] - ordered[:-k]))
+    return float(ordered[start]), float(ordered[start + k])
+
+
+def _elements(trace, var_names: Sequence[str]):
+    """(label, (chain, draw) values) of every scalar element of `var_names`"""
+    for name in var_names:
+        values = trace.posterior[name]
+        extra = [d for d in values.dims if d not in ("chain", "draw")]
+        if not extra:
+            yield name, values.values
+            continue
+        stacked = values.stack(element=extra)
+        for i, coord in enumerate(stacked["element"].values):
+            label = coord if not isinstance(coord, tuple) else ", ".join(map(str, coord))
+            yield f"{name}\n{label}", stacked.values[..., i]
+
+
+def axes_figure(
+    name: str,
+    calls: List[Tuple[str, tuple, dict]],
+    figsize: Tuple[float, float] = (10, 6),
+    title: Optional[str] = None,
+    xlabel: Optional[str] = None,
+    ylabel: Optional[str] = None,
+    xticks: Optional[Tuple[Sequence, Sequence]] = None,
+    legend: bool = True,
+    grid: bool = True,
+) -> FigureSpec:
+    """
+    A single-axes figure given as `(Axes method, args, kwargs)` calls, e.g.
+    `("plot", (x, y), {"label": "Posterior"})`.
+    """
+    return FigureSpec(name, "axes", {
+        "calls": calls, "figsize": figsize, "title": title, "xlabel": xlabel, "ylabel": ylabel,
+        "xticks": xticks, "legend": legend, "grid": grid,
+    })
+
+
+def trace_figure(name: str, trace, var_names: Sequence[str], title: str, max_points: int = DEFAULT_MAX_POINTS) -> FigureSpec:
+    """Per-chain densities (left) and thinned draws (right) of every element, like `az.plot_trace`"""
+    rows = []
+    for label, values in _elements(trace, var_names):
+        index, thinned = thin(values, max_points)
+        rows.append({"label": label, "kdes": [binned_kde(chain) for chain in values], "index": index, "draws": thinned})
+    return FigureSpec(name, "trace", {"rows": rows, "title": title})
+
+
+def posterior_figure(name: str, trace, var_names: Sequence[str], title: str, hdi_prob: float = 0.94) -> FigureSpec:
+    """Density, mean and HDI of every element, like `az.plot_posterior`"""
+    panels = [
+        {"label": label, "kde": binned_kde(values), "mean": float(values.mean()), "hdi": hdi(values, hdi_prob)}
+        for label, values in _elements(trace, var_names)
+    ]
+    return FigureSpec(name, "posterior", {"panels": panels, "title": title, "hdi_prob": hdi_prob})
+
+
+def forest_figure(
+    name: str, trace, var_name: str, title: str, labels: Optional[Sequence[str]] = None, hdi_prob: float = 0.94
+) -> FigureSpec:
+    """Mean, 50% and `hdi_prob` HDIs of every element of `var_name`, like `az.plot_forest`"""
+    rows = [
+        {"label": label, "mean": float(values.mean()), "inner": hdi(values, 0.5), "outer": hdi(values, hdi_prob)}
+        for label, values in _elements(trace, [var_name])
+    ]
+    if labels is not None:
+        for row, label in zip(rows, labels):
+            row["label"] = label
+    return FigureSpec(name, "forest", {"rows": rows, "title": title, "hdi_prob": hdi_prob})
+
+
+def _render_axes(figure, data):
+    fig = figure(data["figsize"])
+    ax = fig.subplots()
+    for method, args, kwargs in data["calls"]:
+        getattr(ax, method)(*args, **kwargs)
+    if data["xticks"] is not None:
+        ax.set_xticks(data["xticks"][0])
+        ax.set_xticklabels(data["xticks"][1], rotation=45, ha="right")
+    ax.set_title(data["title"], fontsize=14)
+    ax.set_xlabel(data["xlabel"] or "")
+    ax.set_ylabel(data["ylabel"] or "")
+    # Only with labeled artists; matplotlib warns about an empty legend
+    if data["legend"] and ax.get_legend_handles_labels()[0]:
+        ax.legend()
+    if data["grid"]:
+        ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    return fig
+
+
+def _render_trace(figure, data):
+    rows = data["rows"]
+    fig = figure((12, 2.5 * len(rows)))
+    axes = fig.subplots(len(rows), 2, squeeze=False)
+    for (left, right), row in zip(axes, rows):
+        for chain, (x, y) in enumerate(row["kdes"]):
+            left.plot(x, y, color=f"C{chain}", alpha=0.8)
+            right.plot(row["index"], row["draws"][chain], color=f"C{chain}", alpha=0.6, linewidth=0.6)
+        left.set_title(row["label"])
+        right.set_title(row["label"])
+    fig.suptitle(data["title"], fontsize=14)
+    fig.tight_layout()
+    return fig
+
+
+def _render_posterior(figure, data):
+    panels = data["panels"]
+    cols = min(3, len(panels))
+    n_rows = int(np.ceil(len(panels) / cols))
+    fig = figure((4.5 * cols, 3.5 * n_rows))
+    axes = fig.subplots(n_rows, cols, squeeze=False)
+    for ax, panel in zip(axes.flat, panels):
+        x, y = panel["kde"]
+        lo, hi = panel["hdi"]
+        ax.plot(x, y, color="C0")
+        ax.plot([lo, hi], [0, 0], color="k", linewidth=4)
+        ax.text(panel["mean"], y.max() * 1.02, f"mean={panel['mean']:.3g}", ha="center")
+        ax.text(lo, 0, f"{lo:.3g}", ha="center", va="bottom")
+        ax.text(hi, 0, f"{hi:.3g}", ha="center", va="bottom")
+        ax.set_title(panel["label"])
+        ax.set_yticks([])
+        ax.set_xlabel(f"{data['hdi_prob']:.0%} HDI")
+    for ax in axes.flat[len(panels):]:
+        ax.axis("off")
+    fig.suptitle(data["title"], fontsize=14)
+    fig.tight_layout()
+    return fig
+
+
+def _render_forest(figure, data):
+    rows = data["rows"]
+    fig = figure((8, 1 + 0.6 * len(rows)))
+    ax = fig.subplots()
+    y = np.arange(len(rows))[::-1]
+    for yi, row in zip(y, rows):
+        ax.plot(row["outer"], [yi, yi], color="C0", linewidth=1.5)
+        ax.plot(row["inner"], [yi, yi], color="C0", linewidth=4)
+        ax.plot(row["mean"], yi, "o", color="C0", markerfacecolor="white")
+    ax.set_yticks(y)
+    ax.set_yticklabels([row["label"] for row in rows])
+    ax.set_title(data["title"], fontsize=14)
+    ax.set_xlabel(f"Mean, 50% and {data['hdi_prob']:.0%} HDI")
+    ax.grid(True, axis="x", alpha=0.3)
+    fig.tight_layout()
+    return fig
+
+
+_RENDERERS = {
+    "axes": _render_axes,
+    "trace": _render_trace,
+    "posterior": _render_posterior,
+    "forest": _render_forest,
+}
+
+
+def render(spec: FigureSpec):
+    """Draw `spec` with the current pyplot backend and return the figure"""
+    import matplotlib.pyplot as plt
+
+    return _RENDERERS[spec.kind](lambda figsize: plt.figure(figsize=figsize), spec.data)
+
+
+def spec_digest(spec: FigureSpec) -> str:
+    payload = pickle.dumps((RENDER_VERSION, spec.kind, spec.data), protocol=4)
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _agg_figure(figsize):
+    # A figure on its own Agg canvas, outside pyplot: rendering in the calling
+    # process leaves its backend and open figures alone
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _render_file(spec: FigureSpec, path: str, dpi: int) -> str:
+    fig = _RENDERERS[spec.kind](_agg_figure, spec.data)
+    fig.savefig(path, dpi=dpi, bbox_inches="tight")
+    return path
+
+
+def _load_manifest(path: str) -> Dict[str, str]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_report(
+    specs: Sequence[FigureSpec],
+    output_dir: str,
+    workers: Optional[int] = None,
+    force: bool = False,
+    dpi: int = 100,
+) -> List[str]:
+    """
+    Write every figure to `output_dir/<name>.png`.
+
+    Args:
+        specs: Figures to write
+        output_dir: Created if missing
+        workers: Rendering processes (default: one per figure, up to the CPU
+         count); 1 renders in this process
+        force: Redraw figures whose inputs are unchanged
+        dpi: Resolution of the PNGs
+
+    Returns:
+        list: Paths of all figures, in `specs` order, whether redrawn or not
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    manifest = _load_manifest(manifest_path)
+    paths = [os.path.join(output_dir, f"{spec.name}.png") for spec in specs]
+    digests = [spec_digest(spec) for spec in specs]
+    pending = [
+        (spec, path) for spec, path, digest in zip(specs, paths, digests)
+        if force or manifest.get(spec.name) != digest or not os.path.exists(path)
+    ]
+
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    if workers <= 1:
+        for spec, path in pending:
+            _render_file(spec, path, dpi)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_render_file, spec, path, dpi) for spec, path in pending]
+            for future in futures:
+                future.result()
+
+    manifest.update({spec.name: digest for spec, digest in zip(specs, digests)})
+    tmp = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, manifest_path)
+    return paths
@@ -0,0 +1,185 @@
+"""
+Streaming Beta-Binomial updates of per-method detection rates.
+
+`StreamingBetaBinomial` keeps, for every method, the (optionally discounted)
+success and failure counts seen so far. A batch of (method, attempts,
+successes) rows is applied in O(1) per row, and the posterior of any method is
+available at any time as a `conjugate.BetaPosterior`, without refitting.
+
+With `forgetting = λ < 1` the evidence of every method is multiplied by λ per
+batch, so a method's posterior tracks drift with an effective memory of about
+1 / (1 - λ) batches. The discount is applied lazily when a method is next
+touched or queried, so methods that do not appear in a batch cost nothing.
+
+Example:
+
+    from streaming import StreamingBetaBinomial
+
+    rates = StreamingBetaBinomial(BetaPrior(2, 3), forgetting=0.99)
+    for batch in stream:
+        rates.update(batch["method"], batch["attempts"], batch["successes"])
+        rates.save("rates.json")
+    rates.posterior(["Transit"]).mean
+"""
+
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from conjugate import BetaPosterior, BetaPrior, validate_counts
+
+_FORMAT_VERSION = 1
+
+
+class StreamingBetaBinomial:
+    """
+    Incremental Beta posteriors for a growing set of methods.
+
+    Args:
+        prior: Beta prior shared by every method
+        forgetting: Per-batch discount λ in (0, 1] of past evidence; 1 keeps
+         everything
+    """
+
+    def __init__(self, prior: BetaPrior = BetaPrior(), forgetting: float = 1.0, capacity: int = 16):
+        if not 0.0 < forgetting <= 1.0:
+            raise ValueError("forgetting must be in (0, 1]")
+        self.prior = prior
+        self.forgetting = forgetting
+        self.batches = 0
+        self._index: Dict[object, int] = {}
+        self._successes = np.zeros(capacity)
+        self._failures = np.zeros(capacity)
+        self._last = np.zeros(capacity, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, method) -> bool:
+        return method in self._index
+
+    @property
+    def methods(self) -> List[object]:
+        return list(self._index)
+
+    def _grow(self, size: int) -> None:
+        # Doubling keeps adding methods amortized O(1)
+        capacity = max(size, 2 * self._successes.size)
+        for name in ("_successes", "_failures", "_last"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:old.size] = old
+            setattr(self, name, new)
+
+    def _indices(self, methods: Iterable, add: bool) -> np.ndarray:
+        index = self._index
+        out = []
+        for method in methods:
+            i = index.get(method)
+            if i is None:
+                if not add:
+                    raise KeyError(method)
+                i = index[method] = len(index)
+            out.append(i)
+        if len(index) > self._successes.size:
+            self._grow(len(index))
+        return np.asarray(out, dtype=np.int64)
+
+    def _decay(self, idx: np.ndarray) -> np.ndarray:
+        """Discount still owed by `idx` since its last update"""
+        if self.forgetting == 1.0:
+            return np.ones(idx.size)
+        return self.forgetting ** (self.batches - self._last[idx])
+
+    def update(self, methods: Sequence, attempts, successes) -> None:
+        """
+        Apply one batch of observations.
+
+        Args:
+            methods: Method of every row; a method may appear more than once
+            attempts: Attempts per row
+            successes: Successes per row
+        """
+        attempts, successes = validate_counts(np.atleast_1d(attempts), np.atleast_1d(successes))
+        if isinstance(methods, (str, bytes)) or np.ndim(methods) == 0:
+            methods = [methods]
+        if len(methods) != attempts.size or attempts.shape != successes.shape:
+            raise ValueError("methods, attempts and successes must have the same length")
+
+        self.batches += 1
+        idx = self._indices(methods, add=True)
+        touched = np.unique(idx)
+        # Settle the pending discount (including this batch) before adding
+        decay = self._decay(touched)
+        self._successes[touched] *= decay
+        self._failures[touched] *= decay
+        self._last[touched] = self.batches
+        np.add.at(self._successes, idx, successes)
+        np.add.at(self._failures, idx, attempts - successes)
+
+    def evidence(self, methods: Optional[Sequence] = None) -> pd.DataFrame:
+        """Discounted success and failure counts per method"""
+        methods = self.methods if methods is None else list(methods)
+        idx = self._indices(methods, add=False)
+        decay = self._decay(idx)
+        return pd.DataFrame(
+            {"successes": self._successes[idx] * decay, "failures": self._failures[idx] * decay},
+            index=pd.Index(methods, name="method"),
+        )
+
+    def posterior(self, methods: Optional[Sequence] = None) -> BetaPosterior:
+        """Current posteriors of `methods` (default: all, in order of first appearance)"""
+        counts = self.evidence(methods)
+        return BetaPosterior(
+            self.prior.alpha + counts["successes"].to_numpy(),
+            self.prior.beta + counts["failures"].to_numpy(),
+        )
+
+    def summary(self, prob: float = 0.95) -> pd.DataFrame:
+        """`BetaPosterior.summary` of every method as a DataFrame"""
+        return pd.DataFrame(self.posterior().summary(prob), index=pd.Index(self.methods, name="method"))
+
+    def state(self) -> dict:
+        """JSON-serializable state; the counts are stored with the discount settled"""
+        counts = self.evidence()
+        return {
+            "version": _FORMAT_VERSION,
+            "prior": [self.prior.alpha, self.prior.beta],
+            "forgetting": self.forgetting,
+            "batches": self.batches,
+            "methods": self.methods,
+            "successes": counts["successes"].tolist(),
+            "failures": counts["failures"].tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "StreamingBetaBinomial":
+        if state.get("version") != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {state.get('version')!r}")
+        rates = cls(BetaPrior(*state["prior"]), state["forgetting"], capacity=max(len(state["methods"]), 16))
+        n = len(state["methods"])
+        rates.batches = state["batches"]
+        rates._index = {method: i for i, method in enumerate(state["methods"])}
+        rates._successes[:n] = state["successes"]
+        rates._failures[:n] = state["failures"]
+        rates._last[:n] = rates.batches
+        return rates
+
+    def save(self, path: os.PathLike) -> None:
+        """Checkpoint to a JSON file, atomically replacing any previous one"""
+        tmp = f"{os.fspath(path)}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.state(), f)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @classmethod
+    def load(cls, path: os.PathLike) -> "StreamingBetaBinomial":
+        with open(path) as f:
+            return cls.from_state(json.load(f))
@@ -0,0 +1,176 @@
+"""
+Seeded synthetic detection records for load testing the models.
+
+`SyntheticDetections` draws a hierarchical ground truth once, the group rates
+
+    rate_g ~ Beta(mean * concentration, (1 - mean) * concentration)
+
+and then streams any number of `(group, attempts, successes)` records: the
+group of a record is uniform over the groups, its attempts are log-uniform
+between `min_attempts` and `max_attempts` and its successes are
+Binomial(attempts, rate_group). Records come in chunks of arrays, so millions
+of them never need to be in memory at once, and `write` appends the chunks to a
+CSV or Parquet file (Parquet needs pyarrow).
+
+The same seed gives the same rates and, for the same `chunk_size`, the same
+records. `aggregate` sums the counts per group, which is all a Binomial model
+of the records needs.
+
+Example:
+
+    from synthetic import GroundTruth, SyntheticDetections
+
+    data = SyntheticDetections(n_groups=1000, truth=GroundTruth(mean=0.2), random_seed=1)
+    for chunk in data.chunks(10_000_000):
+        ...                                  # dict of group, attempts, successes arrays
+    data.write("detections.parquet", 10_000_000)
+
+or from the command line
+
+    python synthetic.py detections.csv --records 10000000 --groups 1000
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, Tuple
+
+import numpy as np
+
+COLUMNS = ("group", "attempts", "successes")
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+@dataclass(frozen=True)
+class GroundTruth:
+    """Population the group rates are drawn from, and the spread of attempts per record"""
+    mean: float = 0.3
+    concentration: float = 10.0
+    min_attempts: int = 10
+    max_attempts: int = 1000
+
+    def __post_init__(self):
+        if not 0.0 < self.mean < 1.0:
+            raise ValueError("mean must be in (0, 1)")
+        if self.concentration <= 0:
+            raise ValueError("concentration must be positive")
+        if not 1 <= self.min_attempts <= self.max_attempts:
+            raise ValueError("need 1 <= min_attempts <= max_attempts")
+
+
+class SyntheticDetections:
+    """
+    Records from a hierarchical ground truth.
+
+    Args:
+        n_groups: Number of groups (detection methods, survey fields, ...)
+        truth: Population of the group rates and range of attempts
+        random_seed: Seeds the rates and the records
+    """
+
+    def __init__(self, n_groups: int = 100, truth: GroundTruth = GroundTruth(), random_seed: int = 0):
+        if n_groups < 1:
+            raise ValueError("n_groups must be at least 1")
+        self.n_groups = n_groups
+        self.truth = truth
+        rates_seed, self._records_seed = np.random.SeedSequence(random_seed).spawn(2)
+        a = truth.mean * truth.concentration
+        b = (1.0 - truth.mean) * truth.concentration
+        self.rates = np.random.default_rng(rates_seed).beta(a, b, n_groups)
+
+    def _chunk(self, size: int, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+        group = rng.integers(0, self.n_groups, size)
+        log_lo, log_hi = np.log(self.truth.min_attempts), np.log(self.truth.max_attempts + 1)
+        attempts = np.exp(rng.uniform(log_lo, log_hi, size)).astype(np.int64)
+        np.clip(attempts, self.truth.min_attempts, self.truth.max_attempts, out=attempts)
+        return {"group": group, "attempts": attempts, "successes": rng.binomial(attempts, self.rates[group])}
+
+    def chunks(self, n_records: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, np.ndarray]]:
+        """`n_records` records as dicts of `COLUMNS` arrays of at most `chunk_size` rows"""
+        root = self._records_seed
+        for i, start in enumerate(range(0, n_records, chunk_size)):
+            # The i-th child of `root`, without `spawn`'s counter, so every call
+            # yields the same records
+            seed = np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + (i,))
+            yield self._chunk(min(chunk_size, n_records - start), np.random.default_rng(seed))
+
+    def frame(self, n_records: int, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """All records in one DataFrame"""
+        import pandas as pd
+
+        return pd.concat([pd.DataFrame(c) for c in self.chunks(n_records, chunk_size)], ignore_index=True)
+
+    def write(self, path: str, n_records: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+        """
+        Write the records chunk by chunk.
+
+        Args:
+            path: ".parquet" writes Parquet (one row group per chunk); anything
+             else CSV, compressed if the suffix asks for it (".csv.gz", ...)
+            n_records: Number of records
+            chunk_size: Records per chunk
+
+        Returns:
+            str: `path`
+        """
+        import pandas as pd
+
+        chunks = (pd.DataFrame(c) for c in self.chunks(n_records, chunk_size))
+        if path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            writer = None
+            try:
+                for df in chunks:
+                    table = pa.Table.from_pandas(df, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema)
+                    writer.write_table(table)
+            finally:
+                if writer is not None:
+                    writer.close()
+            return path
+
+        if os.path.exists(path):
+            os.remove(path)
+        for i, df in enumerate(chunks):
+            df.to_csv(path, mode="a", header=i == 0, index=False)
+        return path
+
+
+def aggregate(chunks: Iterable[Dict[str, np.ndarray]], n_groups: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Total attempts and successes per group over all chunks"""
+    attempts = np.zeros(n_groups, dtype=np.int64)
+    successes = np.zeros(n_groups, dtype=np.int64)
+    for chunk in chunks:
+        attempts += np.bincount(chunk["group"], weights=chunk["attempts"], minlength=n_groups).astype(np.int64)
+        successes += np.bincount(chunk["group"], weights=chunk["successes"], minlength=n_groups).astype(np.int64)
+    return attempts, successes
+
+
+def main() -> None:
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Write synthetic detection records to CSV or Parquet")
+    parser.add_argument("path", help="Output file; .parquet for Parquet, otherwise CSV")
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--groups", type=int, default=100)
+    parser.add_argument("--mean", type=float, default=GroundTruth.mean)
+    parser.add_argument("--concentration", type=float, default=GroundTruth.concentration)
+    parser.add_argument("--min-attempts", type=int, default=GroundTruth.min_attempts)
+    parser.add_argument("--max-attempts", type=int, default=GroundTruth.max_attempts)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    truth = GroundTruth(args.mean, args.concentration, args.min_attempts, args.max_attempts)
+    data = SyntheticDetections(args.groups, truth, args.seed)
+    start = time.perf_counter()
+    data.write(args.path, args.records, args.chunk_size)
+    seconds = time.perf_counter() - start
+    print(f"{args.records} records in {seconds:.2f} s ({args.records / seconds:,.0f} records/s) -> {args.path}")
+
+
+if __name__ == "__main__":
+    main()
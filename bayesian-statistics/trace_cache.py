@@ -0,0 +1,355 @@
+"""
+Content-addressed on-disk cache for MCMC traces and posterior predictive samples.
+
+The cache key is a SHA-256 over
+
+* the model graph (random variables, deterministics and potentials) with the
+  full value of every constant, `pm.Data` container and observed array in it,
+  so both priors and data count,
+* the sampler settings (draws, tune, chains, random_seed, ...), including the
+  configuration of an HMC / NUTS `step` object, and
+* the installed numpy / pymc / pytensor / arviz versions.
+
+Entries are InferenceData netCDF files named by their key. Reading an entry
+touches it, and once the directory holds more than `max_bytes` the least
+recently used entries are deleted.
+
+Example:
+
+    from trace_cache import TraceCache
+
+    cache = TraceCache()
+    with model:
+        trace = cache.sample(2000, tune=1000, chains=2, random_seed=42)
+        ppc = cache.sample_posterior_predictive(trace, random_seed=42)
+
+Set `TRACE_CACHE_DIR` to move the cache and `TRACE_CACHE=0` to bypass it;
+`python trace_cache.py --clear` empties it.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import arviz as az
+import numpy as np
+import pymc as pm
+import pytensor
+from pymc.step_methods.compound import BlockedStep
+from pymc.step_methods.hmc.base_hmc import BaseHMC
+from pytensor.compile.sharedvalue import SharedVariable
+from pytensor.graph.basic import Constant
+from pytensor.graph.traversal import graph_inputs, io_toposort
+from pytensor.tensor.random.type import RandomType
+
+import metrics
+
+DEFAULT_DIR = Path(os.environ.get("TRACE_CACHE_DIR", Path.home() / ".cache" / "bayesian-statistics" / "traces"))
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+_SUFFIX = ".nc"
+# Sampler arguments that do not change the draws
+_IGNORED_SETTINGS = frozenset(
+    {"progressbar", "cores", "blas_cores", "mp_ctx", "compile_kwargs", "label", "metrics_log"}
+)
+# Attributes that configure an HMC step method, and the starting values of its
+# mass matrix adaptation
+_HMC_SETTINGS = ("target_accept", "max_treedepth", "Emax", "adapt_step_size", "integrator")
+_POTENTIAL_START = ("_initial_mean", "_initial_diag", "_initial_cov", "_initial_weight")
+
+
+def library_versions() -> Dict[str, str]:
+    return {
+        "numpy": np.__version__,
+        "pymc": pm.__version__,
+        "pytensor": pytensor.__version__,
+        "arviz": az.__version__,
+    }
+
+
+def _update_array(digest, value) -> None:
+    value = np.asarray(value)
+    digest.update(f"{value.dtype.str}{value.shape}".encode())
+    if value.dtype.hasobject:
+        # Object constants (e.g. a `None` size) would hash their addresses
+        digest.update(repr(value.tolist()).encode())
+    else:
+        digest.update(np.ascontiguousarray(value).tobytes())
+
+
+def _update_graph(digest, outputs) -> None:
+    """Hash the structure of a PyTensor graph and the full value of its leaves"""
+    index = {}
+
+    def number(var) -> int:
+        if var not in index:
+            index[var] = len(index)
+            if var.owner is None:
+                _update_leaf(digest, var)
+        return index[var]
+
+    for node in io_toposort(list(graph_inputs(outputs)), outputs):
+        args = [number(var) for var in node.inputs]
+        digest.update(f"{node.op}{args}".encode())
+        for var in node.outputs:
+            digest.update(f"{number(var)}:{var.name}:{var.type}".encode())
+    digest.update(repr([number(var) for var in outputs]).encode())
+
+
+def _update_leaf(digest, var) -> None:
+    if isinstance(var, Constant):
+        _update_array(digest, var.data)
+    elif isinstance(var, SharedVariable):
+        # Random generator states advance with every draw and are not part of
+        # the model definition
+        if isinstance(var.type, RandomType):
+            digest.update(b"rng")
+        else:
+            digest.update(f"shared:{var.name}".encode())
+            _update_array(digest, var.get_value(borrow=True))
+    else:
+        digest.update(f"input:{var.name}:{var.type}".encode())
+
+
+def model_fingerprint(model: pm.Model) -> str:
+    """SHA-256 of the model graph, its constants, data containers and coords"""
+    # Deduplicated: pm.sample_posterior_predictive can register an observed
+    # variable a second time on the model it runs in
+    outputs = list(dict.fromkeys([*model.basic_RVs, *model.deterministics, *model.potentials]))
+    digest = hashlib.sha256()
+    _update_graph(digest, outputs)
+    for rv in dict.fromkeys(model.observed_RVs):
+        value = model.rvs_to_values[rv]
+        digest.update(rv.name.encode())
+        if isinstance(value, SharedVariable):
+            value = value.get_value(borrow=True)
+        _update_array(digest, getattr(value, "data", value))
+    for rv, transform in model.rvs_to_transforms.items():
+        digest.update(f"{rv.name}:{type(transform).__name__}".encode())
+    for name, values in sorted(model.coords.items()):
+        digest.update(name.encode())
+        digest.update(repr(None if values is None else list(values)).encode())
+    return digest.hexdigest()
+
+
+def trace_fingerprint(trace: az.InferenceData) -> str:
+    """SHA-256 of the posterior draws of `trace`"""
+    digest = hashlib.sha256()
+    for name in sorted(trace.posterior.data_vars):
+        digest.update(name.encode())
+        _update_array(digest, trace.posterior[name].values)
+    return digest.hexdigest()
+
+
+def step_settings(step) -> Optional[Dict[str, object]]:
+    """
+    What an HMC / NUTS step draws with, or None for steps this cannot describe.
+
+    `pm.sample` resets the adapted step size and mass matrix of a step before
+    every run (`reset_tuning`), so a reused step (see `models.ReusableModel`)
+    is described by the values it starts from, not by its adapted state.
+    """
+    if not isinstance(step, BaseHMC):
+        return None
+    settings = {name: repr(getattr(step, name)) for name in _HMC_SETTINGS if hasattr(step, name)}
+    digest = hashlib.sha256()
+    for name in _POTENTIAL_START:
+        if getattr(step.potential, name, None) is not None:
+            digest.update(name.encode())
+            _update_array(digest, getattr(step.potential, name))
+    settings.update(
+        type=type(step).__name__,
+        vars=[var.name for var in step.vars],
+        initial_step_size=repr(float(step.step_adapt._initial_step)),
+        potential=type(step.potential).__name__,
+        potential_start=digest.hexdigest(),
+    )
+    return settings
+
+
+def _cacheable_step(step) -> bool:
+    steps = step if isinstance(step, (list, tuple)) else [step]
+    return all(s is None or step_settings(s) is not None for s in steps)
+
+
+def _setting_repr(value):
+    # A step method is identified by its configuration, not by its address
+    if isinstance(value, BlockedStep):
+        return step_settings(value) or type(value).__name__
+    return repr(value)
+
+
+class TraceCache:
+    """
+    Size-bounded LRU cache of InferenceData objects on local disk.
+
+    Args:
+        directory: Cache directory (created on first write)
+        max_bytes: Total size above which the least recently used entries are evicted
+        enabled: When False every lookup misses and nothing is written
+    """
+
+    def __init__(
+        self,
+        directory: Optional[os.PathLike] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        enabled: Optional[bool] = None,
+    ):
+        self.directory = Path(directory) if directory is not None else DEFAULT_DIR
+        self.max_bytes = max_bytes
+        self.enabled = os.environ.get("TRACE_CACHE", "1") != "0" if enabled is None else enabled
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, model: pm.Model, kind: str = "posterior", trace: Optional[az.InferenceData] = None, **settings) -> str:
+        """
+        Cache key for sampling `model` with `settings`.
+
+        Args:
+            model: The PyMC model
+            kind: What is being cached ("posterior", "posterior_predictive", ...)
+            trace: Posterior the result is conditioned on, for predictive samples
+            **settings: Sampler arguments; must be JSON-serializable
+
+        Returns:
+            str: Hex digest
+        """
+        payload = {
+            "kind": kind,
+            "model": model_fingerprint(model),
+            "trace": None if trace is None else trace_fingerprint(trace),
+            "settings": {k: v for k, v in settings.items() if k not in _IGNORED_SETTINGS},
+            "versions": library_versions(),
+        }
+        blob = json.dumps(payload, sort_keys=True, default=_setting_repr).encode()
+        return hashlib.sha256(blob).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}{_SUFFIX}"
+
+    def get(self, key: str) -> Optional[az.InferenceData]:
+        """Return the stored InferenceData for `key`, or None on a miss"""
+        path = self.path(key)
+        if not self.enabled or not path.exists():
+            self.misses += 1
+            return None
+        try:
+            # Load into memory so the file is closed and can be evicted later
+            trace = az.from_netcdf(path)
+            for group in trace.groups():
+                trace[group].load()
+        except (OSError, ValueError):
+            # Truncated or unreadable entry (e.g. interrupted write): drop it
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return trace
+
+    def put(self, key: str, trace: az.InferenceData) -> None:
+        """Store `trace` under `key`, then evict down to `max_bytes`"""
+        if not self.enabled:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            trace.to_netcdf(str(tmp))
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        self.evict(keep=key)
+
+    def entries(self) -> List[Path]:
+        """Cache files, least recently used first"""
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob(f"*{_SUFFIX}"), key=lambda p: p.stat().st_mtime)
+
+    def size(self) -> int:
+        return sum(p.stat().st_size for p in self.entries())
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """Delete least recently used entries until the cache fits in `max_bytes`"""
+        entries = self.entries()
+        total = sum(p.stat().st_size for p in entries)
+        removed = []
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            if path.stem == keep:
+                continue
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+            removed.append(path.stem)
+        return removed
+
+    def invalidate(self, key: Optional[str] = None) -> int:
+        """Delete the entry for `key`, or every entry when `key` is None; returns the count"""
+        paths = self.entries() if key is None else [self.path(key)]
+        count = 0
+        for path in paths:
+            if path.exists():
+                path.unlink()
+                count += 1
+        return count
+
+    def sample(self, draws: int = 1000, model: Optional[pm.Model] = None, **kwargs) -> az.InferenceData:
+        """
+        `pm.sample` through the cache. Takes the same arguments; the model
+        defaults to the one on the context stack. Unseeded runs are not
+        reproducible, so they always sample and are not stored; neither are
+        runs with a `step` other than HMC / NUTS (see `step_settings`).
+        """
+        model = pm.modelcontext(model)
+        if kwargs.get("random_seed") is None or not _cacheable_step(kwargs.get("step")):
+            return metrics.sample(draws, model=model, **kwargs)
+        key = self.key(model, "posterior", draws=draws, **kwargs)
+        trace = self.get(key)
+        if trace is None:
+            trace = metrics.sample(draws, model=model, **kwargs)
+            self.put(key, trace)
+        return trace
+
+    def sample_posterior_predictive(
+        self, trace: az.InferenceData, model: Optional[pm.Model] = None, **kwargs
+    ) -> az.InferenceData:
+        """
+        `pm.sample_posterior_predictive` through the cache, keyed on the
+        posterior draws; like `sample`, only seeded runs are cached.
+        """
+        model = pm.modelcontext(model)
+        if kwargs.get("random_seed") is None:
+            return pm.sample_posterior_predictive(trace, model=model, **kwargs)
+        key = self.key(model, "posterior_predictive", trace=trace, **kwargs)
+        ppc = self.get(key)
+        if ppc is None:
+            ppc = pm.sample_posterior_predictive(trace, model=model, **kwargs)
+            self.put(key, ppc)
+        return ppc
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the trace cache")
+    parser.add_argument("--dir", default=None, help=f"Cache directory (default: {DEFAULT_DIR})")
+    parser.add_argument("--clear", action="store_true", help="Delete every entry")
+    parser.add_argument("--max-bytes", type=int, default=None, help="Evict least recently used entries down to this size")
+    args = parser.parse_args()
+
+    cache = TraceCache(args.dir)
+    if args.clear:
+        print(f"Removed {cache.invalidate()} entries")
+    elif args.max_bytes is not None:
+        cache.max_bytes = args.max_bytes
+        print(f"Evicted {len(cache.evict())} entries")
+    for path in cache.entries():
+        print(f"{path.stem}  {path.stat().st_size / 1024:10.1f} KiB")
+    print(f"{cache.directory}: {cache.size() / 1024 ** 2:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
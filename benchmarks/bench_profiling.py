@@ -0,0 +1,66 @@
+"""
+Per-call cost of the profiling hooks: never enabled, enabled then disabled,
+enabled, and enabled with tracemalloc.
+
+Run with
+
+    python -m benchmarks.bench_profiling [--number 200000]
+"""
+
+import argparse
+import timeit
+
+from fundamentals import profiling
+from fundamentals.ml_data_structures import Dataset, Layer, Neuron, Vector
+from fundamentals.testing import Linear
+
+
+def hot_paths():
+    a, b = Vector([1.0, 2.0, 3.0]), Vector([4.0, 5.0, 6.0])
+    layer = Layer([Neuron(Vector([0.5, -0.5, 1.0]), 0.0, Linear()) for _ in range(4)])
+    dataset = Dataset([a, b], [0.0, 1.0])
+    return {
+        "Vector.dot": lambda: a.dot(b),
+        "Vector.__add__": lambda: a + b,
+        "Layer.forward": lambda: layer.forward(a),
+        "Dataset.__getitem__": lambda: dataset[0],
+    }
+
+
+def per_call_ns(fn, repeat: int, number: int) -> float:
+    return 1e9 * min(timeit.repeat(fn, repeat=repeat, number=number)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    paths = hot_paths()
+    modes = ["off", "off after use", "on", "on + memory"]
+    results = {name: {} for name in paths}
+    for name, fn in paths.items():
+        results[name]["off"] = per_call_ns(fn, args.repeat, args.number)
+    classes = (Vector, Layer, Dataset)
+    originals = {(cls, name): value for cls in classes for name, value in vars(cls).items()}
+    with profiling.profile():
+        pass
+    restored = all(vars(cls).get(name) is value for (cls, name), value in originals.items())
+    for name, fn in paths.items():
+        results[name]["off after use"] = per_call_ns(fn, args.repeat, args.number)
+    # tracemalloc makes calls about 10x slower, so time fewer of them
+    for mode, memory, number in (("on", False, args.number), ("on + memory", True, max(1, args.number // 10))):
+        with profiling.profile(memory=memory):
+            for name, fn in paths.items():
+                results[name][mode] = per_call_ns(fn, args.repeat, number)
+
+    print(f"{'ns per call':<22}" + "".join(f"{m:>15}" for m in modes) + f"{'off overhead':>15}")
+    for name, row in results.items():
+        overhead = row["off after use"] / row["off"] - 1
+        print(f"{name:<22}" + "".join(f"{row[m]:>15.1f}" for m in modes) + f"{overhead:>14.1%}")
+    print(f"\nOriginal methods restored after disable: {'yes' if restored else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
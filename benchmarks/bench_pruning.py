@@ -0,0 +1,57 @@
+"""
+Forward latency of a pruned (sparse) layer against the dense packed layer.
+
+Run with
+
+    python -m benchmarks.bench_pruning [--inputs 1024] [--neurons 256]
+"""
+
+import argparse
+import random
+import timeit
+
+from fundamentals.ml_data_structures import Layer, Neuron, Vector
+from fundamentals.packed import PackedLayer
+from fundamentals.pruning import prune_layer
+from fundamentals.testing import Linear
+
+SPARSITIES = (0.0, 0.5, 0.75, 0.9, 0.95, 0.99)
+
+
+def random_layer(n_inputs: int, n_neurons: int, seed: int = 0) -> Layer:
+    rng = random.Random(seed)
+    activation = Linear()
+    return Layer([
+        Neuron(Vector([rng.gauss(0.0, 1.0) for _ in range(n_inputs)]), 0.0, activation)
+        for _ in range(n_neurons)
+    ])
+
+
+def best_of(fn, repeat: int, number: int) -> float:
+    return min(timeit.repeat(fn, repeat=repeat, number=number)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--inputs", type=int, default=1024)
+    parser.add_argument("--neurons", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    layer = random_layer(args.inputs, args.neurons)
+    dense = PackedLayer.from_layer(layer)
+    x = [random.Random(1).gauss(0.0, 1.0) for _ in range(args.inputs)]
+    dense_time = best_of(lambda: dense.forward_values(x), args.repeat, args.number)
+
+    print(f"layer: {args.inputs} inputs x {args.neurons} neurons")
+    print(f"{'sparsity':>9}{'nnz':>10}{'forward (ms)':>15}{'speedup':>10}")
+    print(f"{'dense':>9}{args.inputs * args.neurons:>10}{dense_time * 1e3:>15.3f}{1.0:>10.2f}")
+    for sparsity in SPARSITIES:
+        sparse = prune_layer(dense, sparsity)
+        t = best_of(lambda: sparse.forward_values(x), args.repeat, args.number)
+        print(f"{sparsity:>9.2f}{sparse.nnz:>10}{t * 1e3:>15.3f}{dense_time / t:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Throughput and latency of the micro-batching server against one forward per request.
+
+Concurrent clients send single-row `/predict` requests over keep-alive
+connections to an `InferenceServer` in the same process; `--max-batch-size 1`
+is the unbatched baseline.
+
+Run with
+
+    python -m benchmarks.bench_serving [--clients 64] [--requests 50] [--inputs 64] [--hidden 64]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from fundamentals.ml_data_structures import Layer, Neuron, Vector
+from fundamentals.packed import PackedNetwork
+from fundamentals.serving import InferenceServer, request
+from fundamentals.testing import Linear
+
+
+def random_network(sizes, seed: int = 0) -> PackedNetwork:
+    rng = random.Random(seed)
+    activation = Linear()
+    layers = [
+        Layer([Neuron(Vector([rng.gauss(0.0, 1.0) for _ in range(n_in)]), 0.0, activation) for _ in range(n_out)])
+        for n_in, n_out in zip(sizes, sizes[1:])
+    ]
+    return PackedNetwork.from_layers(layers)
+
+
+async def client(address, rows, n_requests: int) -> None:
+    reader, writer = await asyncio.open_connection(*address[:2])
+    for i in range(n_requests):
+        status, _ = await request(reader, writer, "POST", "/predict", {"inputs": rows[i % len(rows)]})
+        assert status == 200
+    writer.close()
+
+
+async def run(network, max_batch_size: int, max_wait: float, args) -> dict:
+    rng = random.Random(1)
+    rows = [[rng.gauss(0.0, 1.0) for _ in range(args.inputs)] for _ in range(100)]
+    async with InferenceServer(network, port=0, max_batch_size=max_batch_size, max_wait=max_wait) as server:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(server.address, rows, args.requests) for _ in range(args.clients)))
+        seconds = time.perf_counter() - start
+        stats = server.stats.snapshot()
+    return {
+        "max_batch_size": max_batch_size,
+        "max_wait_ms": 1000 * max_wait,
+        "requests_per_second": stats["requests"] / seconds,
+        "mean_batch_size": stats["mean_batch_size"],
+        "p50_ms": stats["p50_ms"],
+        "p99_ms": stats["p99_ms"],
+        "forward_seconds": stats["forward_seconds"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=50, help="Requests per client")
+    parser.add_argument("--inputs", type=int, default=64)
+    parser.add_argument("--hidden", type=int, default=64)
+    parser.add_argument("--outputs", type=int, default=8)
+    args = parser.parse_args()
+
+    network = random_network([args.inputs, args.hidden, args.outputs])
+    print(f"{args.clients} clients x {args.requests} requests, network {args.inputs}-{args.hidden}-{args.outputs}")
+    print(f"{'batch':>6} {'wait ms':>8} {'req/s':>9} {'mean batch':>11} {'p50 ms':>8} {'p99 ms':>8} {'forward s':>10}")
+    for max_batch_size, max_wait in [(1, 0.0), (16, 0.001), (64, 0.002), (256, 0.005)]:
+        row = asyncio.run(run(network, max_batch_size, max_wait, args))
+        print(
+            f"{row['max_batch_size']:>6} {row['max_wait_ms']:>8.1f} {row['requests_per_second']:>9.0f} "
+            f"{row['mean_batch_size']:>11.1f} {row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['forward_seconds']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,44 @@
-from .testing import *
-from .testing import MathTest, MathTestVariable
+"""
+Submodules and the names re-exported here are loaded on first access (PEP 562),
+so `import fundamentals` itself imports nothing; `tests/test_imports.py` keeps
+it within an import-time budget.
+"""
+
+_SUBMODULES = frozenset({
+    "differential",
+    "gradcheck",
+    "ml_data_structures",
+    "operators",
+    "packed",
+    "parallel",
+    "precision",
+    "profiling",
+    "pruning",
+    "serialization",
+    "serving",
+    "testing",
+})
+
+# Names the package used to re-export with `from .testing import *`
+_EXPORTS = {
+    name: "testing"
+    for name in ("MathTest", "MathTestVariable", "A", "Callable", "Generic", "Iterable", "Tuple", "TypeVar")
+}
+
+__all__ = sorted(_EXPORTS) + ["operators", "testing"]
+
+
+def __getattr__(name):
+    from importlib import import_module
+
+    if name in _SUBMODULES:
+        return import_module(f".{name}", __name__)
+    if name in _EXPORTS:
+        value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES | set(_EXPORTS))
@@ -0,0 +1,274 @@
+"""
+Vectorized differential testing of the `MathTest` functions.
+
+A `Backend` says how to evaluate the `MathTest` functions: which `MathTest`
+subclass supplies them and how to move a NumPy array in and out of the
+backend's value type. `differential_test` pairs the functions of two backends
+by name, the same way `MathTest._comp_testing` pairs `MathTest` with a variable
+implementation. It then calls each function once per backend on a large batch
+of random inputs, and reports the maximum error and the throughput of each call.
+
+The default reference is `NUMPY`, which runs `MathTestVariable` on
+`ArrayTensor`, a thin tensor-like wrapper over a float64 array. `SCALAR` runs
+the plain `MathTest` functions (and so `operators`) one element at a time; it
+is slow, so use it on small batches to check `NUMPY` itself.
+
+Run from the repository root with
+
+    python -m fundamentals.differential --points 10000000
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple, Type
+
+import numpy as np
+
+from .testing import MathTest, MathTestVariable
+
+# Reductions over the whole input rather than along dimension 0
+FULL_REDUCTIONS = ("mean_full_red",)
+
+
+class ArrayTensor:
+    """
+    A minimal tensor over a NumPy array, providing the operations `MathTestVariable` uses.
+
+    Comparisons return tensors of 1.0 / 0.0, matching `operators.lt` and `operators.eq`.
+    """
+    __slots__ = ("data",)
+    __hash__ = None
+
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float64)
+
+    @staticmethod
+    def _unwrap(other):
+        return other.data if isinstance(other, ArrayTensor) else other
+
+    def __add__(self, other):
+        return ArrayTensor(self.data + self._unwrap(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return ArrayTensor(self.data - self._unwrap(other))
+
+    def __rsub__(self, other):
+        return ArrayTensor(self._unwrap(other) - self.data)
+
+    def __mul__(self, other):
+        return ArrayTensor(self.data * self._unwrap(other))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return ArrayTensor(self.data / self._unwrap(other))
+
+    def __rtruediv__(self, other):
+        return ArrayTensor(self._unwrap(other) / self.data)
+
+    def __neg__(self):
+        return ArrayTensor(-self.data)
+
+    def __lt__(self, other):
+        return ArrayTensor(self.data < self._unwrap(other))
+
+    def __gt__(self, other):
+        return ArrayTensor(self.data > self._unwrap(other))
+
+    def __eq__(self, other):
+        return ArrayTensor(self.data == self._unwrap(other))
+
+    def sigmoid(self):
+        # Same split as operators.sigmoid: never exponentiate a positive number
+        e = np.exp(-np.abs(self.data))
+        return ArrayTensor(np.where(self.data >= 0, 1.0 / (1.0 + e), e / (1.0 + e)))
+
+    def relu(self):
+        return ArrayTensor(np.where(self.data > 0, self.data, 0.0))
+
+    def log(self):
+        return ArrayTensor(np.log(self.data))
+
+    def exp(self):
+        return ArrayTensor(np.exp(self.data))
+
+    def sum(self, dim: Optional[int] = None):
+        return ArrayTensor(self.data.sum(axis=dim))
+
+    def mean(self, dim: Optional[int] = None):
+        return ArrayTensor(self.data.mean(axis=dim))
+
+
+@dataclass
+class Backend:
+    """
+    How to evaluate the `MathTest` functions on a batch.
+
+    If `elementwise` is set the functions are scalar and are mapped over the
+    batch; otherwise each function is called once on the wrapped batch.
+    """
+    name: str
+    functions: Type[MathTest]
+    wrap: Callable[[np.ndarray], Any] = lambda a: a
+    unwrap: Callable[[Any], np.ndarray] = np.asarray
+    elementwise: bool = False
+
+
+SCALAR = Backend("scalar", MathTest, elementwise=True)
+NUMPY = Backend("numpy", MathTestVariable, wrap=ArrayTensor, unwrap=lambda t: t.data)
+
+
+@dataclass
+class DiffResult:
+    """Comparison of one function between a reference and a candidate backend"""
+    name: str
+    kind: str
+    points: int
+    max_abs_error: float = float("nan")
+    max_rel_error: float = float("nan")
+    mismatched_nonfinite: int = 0
+    reference_rate: float = float("nan")
+    candidate_rate: float = float("nan")
+    error: Optional[str] = None
+
+    def ok(self, atol: float = 1e-6, rtol: float = 1e-6) -> bool:
+        """Whether the candidate agrees with the reference within tolerance"""
+        return (
+            self.error is None
+            and self.mismatched_nonfinite == 0
+            and (self.max_abs_error <= atol or self.max_rel_error <= rtol)
+        )
+
+
+def _pairs(reference: Type[MathTest], candidate: Type[MathTest]):
+    """Pair up functions by name and kind, as `MathTest._comp_testing` does"""
+    pairs = []
+    for kind, ref_fns, cand_fns in zip(("one", "two", "red"), reference._tests(), candidate._tests()):
+        cand = dict(cand_fns)
+        pairs.extend((kind, name, fn, cand[name]) for name, fn in ref_fns if name in cand)
+    return pairs
+
+
+def _evaluate(backend: Backend, kind: str, name: str, fn, args: Tuple[np.ndarray, ...]) -> np.ndarray:
+    if backend.elementwise:
+        if kind == "red":
+            (a,) = args
+            if name in FULL_REDUCTIONS:
+                return np.asarray(fn(a.ravel().tolist()), dtype=np.float64)
+            return np.array([fn(col) for col in a.T.tolist()], dtype=np.float64)
+        n = args[0].size
+        return np.fromiter(map(fn, *(a.tolist() for a in args)), dtype=np.float64, count=n)
+    return np.asarray(backend.unwrap(fn(*(backend.wrap(a) for a in args))), dtype=np.float64)
+
+
+def _timed(backend, kind, name, fn, args):
+    start = time.perf_counter()
+    out = _evaluate(backend, kind, name, fn, args)
+    return out, time.perf_counter() - start
+
+
+def _compare(result: DiffResult, expected: np.ndarray, got: np.ndarray) -> None:
+    if expected.shape != got.shape:
+        raise ValueError(f"shape mismatch: reference {expected.shape}, candidate {got.shape}")
+    finite = np.isfinite(expected) & np.isfinite(got)
+    same_nonfinite = ~finite & ((expected == got) | (np.isnan(expected) & np.isnan(got)))
+    result.mismatched_nonfinite = int(np.count_nonzero(~finite & ~same_nonfinite))
+    if finite.any():
+        diff = np.abs(expected[finite] - got[finite])
+        scale = np.maximum(np.abs(expected[finite]), np.finfo(np.float64).tiny)
+        result.max_abs_error = float(diff.max())
+        result.max_rel_error = float((diff / scale).max())
+    else:
+        result.max_abs_error = result.max_rel_error = 0.0
+
+
+def differential_test(
+    candidate: Backend,
+    reference: Backend = NUMPY,
+    points: int = 10 ** 6,
+    reduce_size: int = 8,
+    low: float = -100.0,
+    high: float = 100.0,
+    seed: int = 0,
+) -> List[DiffResult]:
+    """
+    Compare every one-arg, two-arg and reduction `MathTest` function of two backends.
+
+    Args:
+        candidate: Backend under test
+        reference: Backend defining the expected values
+        points: Number of input points per function
+        reduce_size: Length of each reduction; reductions see `points // reduce_size`
+         independent columns of this length
+        low: Smallest input value
+        high: Largest input value
+        seed: Seed for the input generator
+
+    Returns:
+        List[DiffResult]: One result per function, in `MathTest._tests` order
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.uniform(low, high, points)
+    b = rng.uniform(low, high, points)
+    columns = max(1, points // reduce_size)
+    red = rng.uniform(low, high, (reduce_size, columns))
+    inputs = {"one": (a,), "two": (a, b), "red": (red,)}
+
+    results = []
+    for kind, name, ref_fn, cand_fn in _pairs(reference.functions, candidate.functions):
+        args = inputs[kind]
+        result = DiffResult(name, kind, args[0].size)
+        with np.errstate(all="ignore"):
+            try:
+                expected, ref_time = _timed(reference, kind, name, ref_fn, args)
+                got, cand_time = _timed(candidate, kind, name, cand_fn, args)
+                _compare(result, expected, got)
+            except Exception as exc:
+                result.error = f"{type(exc).__name__}: {exc}"
+            else:
+                result.reference_rate = result.points / ref_time if ref_time > 0 else float("inf")
+                result.candidate_rate = result.points / cand_time if cand_time > 0 else float("inf")
+        results.append(result)
+    return results
+
+
+def format_results(results: List[DiffResult], atol: float = 1e-6, rtol: float = 1e-6) -> str:
+    """Render `differential_test` results as a fixed-width table"""
+    lines = [
+        f"{'function':<15}{'kind':<5}{'points':>10}{'max abs err':>13}{'max rel err':>13}"
+        f"{'ref pts/s':>12}{'cand pts/s':>12}  status"
+    ]
+    for r in results:
+        if r.error is not None:
+            status = r.error
+        else:
+            status = "ok" if r.ok(atol, rtol) else "FAIL"
+            if r.mismatched_nonfinite:
+                status += f" ({r.mismatched_nonfinite} non-finite mismatches)"
+        lines.append(
+            f"{r.name:<15}{r.kind:<5}{r.points:>10}{r.max_abs_error:>13.3e}{r.max_rel_error:>13.3e}"
+            f"{r.reference_rate:>12.3e}{r.candidate_rate:>12.3e}  {status}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Differential test of the MathTest functions")
+    parser.add_argument("--points", type=int, default=10 ** 6)
+    parser.add_argument("--scalar-points", type=int, default=10 ** 4,
+                        help="points for the (slow) scalar-vs-numpy check; 0 to skip")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"numpy vs numpy, {args.points} points")
+    print(format_results(differential_test(NUMPY, NUMPY, points=args.points, seed=args.seed)))
+    if args.scalar_points:
+        print(f"\nscalar operators vs numpy, {args.scalar_points} points")
+        print(format_results(differential_test(SCALAR, NUMPY, points=args.scalar_points, seed=args.seed)))
+
+
+if __name__ == "__main__":
+    main()
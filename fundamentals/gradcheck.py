@@ -0,0 +1,300 @@
+"""
+Batched numerical gradient checking.
+
+Derivatives are estimated by central differences, evaluated for a whole batch
+of points in one call, and compared with an analytic gradient:
+
+* `check_backward` checks a backward kernel such as `operators.log_back`,
+  which computes `d * f'(x)`, against its forward function.
+* `check_mathtest` checks the one-argument `MathTest` functions (`complex`,
+  `explog`, ...) of a `differential.Backend` against `MATHTEST_DERIVATIVES`,
+  or against gradients supplied by the backend itself (e.g. from autodiff).
+
+Scalar functions are vectorized with `np.frompyfunc`, so they can be checked
+too, only more slowly. Points where the left and right one-sided differences
+disagree (kinks such as relu at 0) are skipped and counted, not reported as
+failures.
+
+Run from the repository root with
+
+    python -m fundamentals.gradcheck --points 1000000
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import operators
+from .differential import NUMPY, Backend
+
+ArrayFn = Callable[[np.ndarray], np.ndarray]
+
+
+def vectorize(fn: Callable, nin: int = 1) -> Callable[..., np.ndarray]:
+    """
+    Make `fn` accept float arrays.
+
+    `fn` is first called on arrays directly; if that fails (e.g. it branches on
+    `x > 0` or calls `math.log`) every later call maps it over the elements.
+    """
+    scalar = np.frompyfunc(fn, nin, 1)
+    state = {"array": None}
+
+    def call(*args):
+        if state["array"] is not False:
+            try:
+                out = np.asarray(fn(*args), dtype=np.float64)
+                if out.shape == np.broadcast(*args).shape:
+                    state["array"] = True
+                    return out
+            except NotImplementedError:
+                raise
+            except Exception:
+                if state["array"]:
+                    raise
+            state["array"] = False
+        return scalar(*args).astype(np.float64)
+
+    return call
+
+
+def _step(x: np.ndarray, h: float) -> np.ndarray:
+    # Relative step for large |x|, absolute step near 0; rounded so x + step is exact
+    step = h * np.maximum(1.0, np.abs(x))
+    return (x + step) - x
+
+
+@dataclass
+class GradCheckResult:
+    """Outcome of checking one gradient on a batch of points"""
+    name: str
+    points: int
+    checked: int = 0
+    skipped: int = 0
+    failures: int = 0
+    max_abs_error: float = float("nan")
+    max_rel_error: float = float("nan")
+    worst_x: float = float("nan")
+    points_per_second: float = float("nan")
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.failures == 0
+
+
+def _compare(
+    result: GradCheckResult,
+    f: ArrayFn,
+    analytic: np.ndarray,
+    x: np.ndarray,
+    d: np.ndarray,
+    h: float,
+    atol: float,
+    rtol: float,
+) -> None:
+    step = _step(x, h)
+    fx, fp, fm = f(x), f(x + step), f(x - step)
+    numeric = d * (fp - fm) / (2 * step)
+
+    # Non-differentiable points: one-sided slopes disagree beyond tolerance
+    right, left = (fp - fx) / step, (fx - fm) / step
+    smooth = np.abs(right - left) <= 10 * (atol + rtol * np.maximum(np.abs(right), np.abs(left)))
+    valid = smooth & np.isfinite(numeric) & np.isfinite(analytic)
+
+    err = np.abs(analytic - numeric)
+    bad = valid & (err > atol + rtol * np.abs(numeric))
+    result.checked = int(np.count_nonzero(valid))
+    result.skipped = int(x.size - result.checked)
+    result.failures = int(np.count_nonzero(bad))
+    if result.checked:
+        verr = np.where(valid, err, 0.0)
+        worst = int(np.argmax(verr))
+        result.max_abs_error = float(verr[worst])
+        # Relative error is only meaningful where the derivative is not ~0
+        scaled = valid & (np.abs(numeric) > atol)
+        result.max_rel_error = float(np.max(np.where(scaled, err / np.where(scaled, np.abs(numeric), 1.0), 0.0)))
+        result.worst_x = float(x[worst])
+
+
+def check_backward(
+    name: str,
+    fn: Callable[[float], float],
+    fn_back: Callable[[float, float], float],
+    x: np.ndarray,
+    d: Optional[np.ndarray] = None,
+    h: float = 1e-5,
+    atol: float = 1e-6,
+    rtol: float = 1e-4,
+) -> GradCheckResult:
+    """
+    Check a backward kernel `fn_back(x, d) = d * f'(x)` against central differences of `fn`.
+
+    Args:
+        name: Label for the result
+        fn: Forward function (scalar or array)
+        fn_back: Backward kernel (scalar or array)
+        x: Points to check
+        d: Upstream gradients (default: random in [-2, 2])
+        h: Relative finite-difference step
+        atol: Absolute tolerance
+        rtol: Relative tolerance
+
+    Returns:
+        GradCheckResult: Summary over all points
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if d is None:
+        d = np.random.default_rng(0).uniform(-2.0, 2.0, x.shape)
+    result = GradCheckResult(name, x.size)
+    start = time.perf_counter()
+    with np.errstate(all="ignore"):
+        try:
+            analytic = vectorize(fn_back, 2)(x, d)
+            _compare(result, vectorize(fn), analytic, x, d, h, atol, rtol)
+        except Exception as exc:
+            result.error = f"{type(exc).__name__}: {exc}"
+        else:
+            result.points_per_second = _rate(x.size, start)
+    return result
+
+
+def _rate(points: int, start: float) -> float:
+    elapsed = time.perf_counter() - start
+    return points / elapsed if elapsed > 0 else float("inf")
+
+
+def _relu_mask(t):
+    return t > 0
+
+
+def _complex_grad(a):
+    u1 = a * 10 + 7
+    u2 = u1.relu() * 6 + 5
+    s = (u2.relu() * 10).sigmoid()
+    # d/da log(s) / 50 = (1 - s) * 10 / 50, times the relu chain 6 * 10
+    return (1 - s) * 12 * _relu_mask(u2) * _relu_mask(u1)
+
+
+# Analytic derivatives of the one-argument MathTest functions, written against
+# the tensor interface used by MathTestVariable
+MATHTEST_DERIVATIVES: Dict[str, Callable[[Any], Any]] = {
+    "neg": lambda a: a * 0 - 1,
+    "addConstant": lambda a: a * 0 + 1,
+    "square": lambda a: a * 2,
+    "cube": lambda a: a * a * 3,
+    "subConstant": lambda a: a * 0 + 1,
+    "multConstant": lambda a: a * 0 + 5,
+    "div": lambda a: a * 0 + 0.2,
+    "inv": lambda a: -1.0 / ((a + 3.5) * (a + 3.5)),
+    "sig": lambda a: a.sigmoid() * (1 - a.sigmoid()),
+    "log": lambda a: 1.0 / (a + 100000),
+    "relu": lambda a: _relu_mask(a + 5.5),
+    "exp": lambda a: (a - 200).exp(),
+    "explog": lambda a: 1.0 / (a + 100000) + (a - 200).exp(),
+    "complex": _complex_grad,
+}
+
+
+def check_mathtest(
+    backend: Backend = NUMPY,
+    x: Optional[np.ndarray] = None,
+    gradient: Optional[Callable[[str, np.ndarray], np.ndarray]] = None,
+    h: float = 1e-5,
+    atol: float = 1e-6,
+    rtol: float = 1e-4,
+) -> List[GradCheckResult]:
+    """
+    Check the derivatives of the one-argument `MathTest` functions of a backend.
+
+    Args:
+        backend: Backend whose functions are differentiated numerically
+        x: Points to check (default: 10^5 points uniform in [-100, 100])
+        gradient: `gradient(name, x)` returning the analytic derivative of the
+         named function, e.g. computed by the backend's autodiff. Defaults to
+         evaluating `MATHTEST_DERIVATIVES` on the backend.
+        h: Relative finite-difference step
+        atol: Absolute tolerance
+        rtol: Relative tolerance
+
+    Returns:
+        List[GradCheckResult]: One result per function
+    """
+    if x is None:
+        x = np.random.default_rng(0).uniform(-100.0, 100.0, 10 ** 5)
+    x = np.asarray(x, dtype=np.float64)
+    ones = np.ones_like(x)
+
+    def evaluate(fn) -> ArrayFn:
+        if backend.elementwise:
+            return vectorize(fn)
+        return lambda v: np.asarray(backend.unwrap(fn(backend.wrap(v))), dtype=np.float64)
+
+    if gradient is None:
+        def gradient(name, v):
+            return np.broadcast_to(evaluate(MATHTEST_DERIVATIVES[name])(v), v.shape)
+
+    one_arg, _, _ = backend.functions._tests()
+    results = []
+    for name, fn in one_arg:
+        if name not in MATHTEST_DERIVATIVES:
+            continue
+        result = GradCheckResult(name, x.size)
+        start = time.perf_counter()
+        with np.errstate(all="ignore"):
+            try:
+                _compare(result, evaluate(fn), gradient(name, x), x, ones, h, atol, rtol)
+            except Exception as exc:
+                result.error = f"{type(exc).__name__}: {exc}"
+            else:
+                result.points_per_second = _rate(x.size, start)
+        results.append(result)
+    return results
+
+
+def operator_kernels(rng: np.random.Generator, points: int) -> List[Tuple[str, Callable, Callable, np.ndarray]]:
+    """The backward kernels in `operators` with a sample of valid inputs for each"""
+    magnitudes = rng.uniform(0.1, 100.0, points)
+    signs = rng.choice([-1.0, 1.0], points)
+    return [
+        ("log_back", operators.log, operators.log_back, magnitudes),
+        ("inv_back", operators.inv, operators.inv_back, signs * magnitudes),
+        ("relu_back", operators.relu, operators.relu_back, signs * magnitudes),
+    ]
+
+
+def format_results(results: List[GradCheckResult]) -> str:
+    """Render gradient-check results as a fixed-width table"""
+    lines = [
+        f"{'function':<14}{'points':>10}{'skipped':>9}{'failures':>10}{'max abs err':>13}"
+        f"{'max rel err':>13}{'worst x':>12}{'pts/s':>11}  status"
+    ]
+    for r in results:
+        status = r.error if r.error is not None else ("ok" if r.ok else "FAIL")
+        lines.append(
+            f"{r.name:<14}{r.points:>10}{r.skipped:>9}{r.failures:>10}{r.max_abs_error:>13.3e}"
+            f"{r.max_rel_error:>13.3e}{r.worst_x:>12.4g}{r.points_per_second:>11.3e}  {status}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Numerical gradient check")
+    parser.add_argument("--points", type=int, default=10 ** 6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print("operators backward kernels")
+    print(format_results([
+        check_backward(name, fn, back, x) for name, fn, back, x in operator_kernels(rng, args.points)
+    ]))
+    print("\nMathTest functions (numpy backend)")
+    print(format_results(check_mathtest(NUMPY, rng.uniform(-100.0, 100.0, args.points))))
+
+
+if __name__ == "__main__":
+    main()
@@ -154,3 +154,8 @@ class Dataset:
         # 3. Create and return two new Dataset objects
         pass
 
+    def parallel_map(self, fn: Callable[[Vector], Union[float, Vector]], workers: Optional[int] = None,
+                     chunk_size: Optional[int] = None, max_retries: int = 1) -> 'Dataset':
+        """Apply `fn` to every feature vector in a pool of worker processes (see `parallel.parallel_map`)"""
+        from .parallel import parallel_map
+        return parallel_map(self, fn, workers=workers, chunk_size=chunk_size, max_retries=max_retries)
@@ -0,0 +1,181 @@
+"""
+Packed (structure-of-arrays) representations of layers and networks.
+
+A `Layer` is a list of `Neuron` dataclasses, each holding its own `Vector` of
+weights and its own activation object. A `PackedLayer` holds the same model as
+one contiguous row-major weight buffer, one bias buffer and a list of
+activations, which is the form used for serialization and batched inference.
+"""
+
+from array import array
+from dataclasses import dataclass, field
+from functools import cached_property
+from operator import mul
+from typing import TYPE_CHECKING, List, Sequence, Union
+
+from .ml_data_structures import ActivationFunction, Layer, Neuron, Vector
+
+if TYPE_CHECKING:
+    from .precision import QuantizedLayer
+    from .pruning import SparseLayer
+
+# Smallest batch for which `PackedLayer.forward_batch` unpacks the weight rows
+_UNPACK_MIN_ROWS = 4
+
+
+@dataclass
+class PackedLayer:
+    """
+    A layer stored as a flat `n_neurons x n_inputs` weight buffer and a bias buffer.
+
+    `weights` and `biases` may be any float sequence supporting slicing, e.g. an
+    `array.array` or a `memoryview` over a memory-mapped file.
+    """
+    n_inputs: int
+    weights: Sequence[float]
+    biases: Sequence[float]
+    activations: List[ActivationFunction]
+
+    def __post_init__(self):
+        if len(self.biases) != len(self.activations):
+            raise ValueError("biases and activations must have the same length")
+        if len(self.weights) != self.n_inputs * len(self.biases):
+            raise ValueError("weights must have n_inputs * n_neurons entries")
+
+    @classmethod
+    def from_layer(cls, layer: Layer) -> "PackedLayer":
+        """
+        Pack the neurons of `layer` into contiguous buffers.
+
+        Args:
+            layer: Layer whose neurons all have the same number of weights
+
+        Returns:
+            PackedLayer: The packed layer
+        """
+        if not layer.neurons:
+            raise ValueError("Cannot pack a layer without neurons")
+        n_inputs = len(layer.neurons[0].weights.values)
+        weights = array("d")
+        for neuron in layer.neurons:
+            if len(neuron.weights.values) != n_inputs:
+                raise ValueError("All neurons in a layer must have the same number of weights")
+            weights.extend(neuron.weights.values)
+        biases = array("d", (neuron.bias for neuron in layer.neurons))
+        activations = [neuron.activation for neuron in layer.neurons]
+        return cls(n_inputs, weights, biases, activations)
+
+    def __len__(self):
+        return len(self.biases)
+
+    def row(self, idx: int) -> Sequence[float]:
+        """Return the weights of neuron `idx` as a slice of the weight buffer"""
+        return self.weights[idx * self.n_inputs:(idx + 1) * self.n_inputs]
+
+    def neuron(self, idx: int) -> Neuron:
+        """Build a `Neuron` for unit `idx`"""
+        return Neuron(Vector(list(self.row(idx))), float(self.biases[idx]), self.activations[idx])
+
+    @cached_property
+    def neurons(self) -> List[Neuron]:
+        """The layer as a list of `Neuron` objects, built on first access"""
+        return [self.neuron(i) for i in range(len(self))]
+
+    def to_layer(self) -> Layer:
+        """Unpack into a regular `Layer`"""
+        return Layer(list(self.neurons))
+
+    def forward_values(self, values: Sequence[float]) -> List[float]:
+        """
+        Compute the outputs of all neurons for a plain sequence of inputs.
+
+        Args:
+            values: Sequence of `n_inputs` floats
+
+        Returns:
+            List[float]: One output per neuron
+        """
+        if len(values) != self.n_inputs:
+            raise ValueError(
+                f"Expected {self.n_inputs} inputs, got {len(values)}"
+            )
+        n = self.n_inputs
+        weights = self.weights
+        return [
+            activation(sum(map(mul, weights[i * n:(i + 1) * n], values)) + bias)
+            for i, (bias, activation) in enumerate(zip(self.biases, self.activations))
+        ]
+
+    def forward(self, inputs: Vector) -> Vector:
+        """
+        Compute the outputs of all neurons in the layer.
+        """
+        return Vector(self.forward_values(inputs.values))
+
+    def forward_batch(self, batch: Sequence[Sequence[float]]) -> List[List[float]]:
+        """
+        Compute the layer outputs for every row of `batch`.
+
+        Args:
+            batch: Sequence of input rows
+
+        Returns:
+            List[List[float]]: One output row per input row
+        """
+        if len(batch) < _UNPACK_MIN_ROWS:
+            return [self.forward_values(values) for values in batch]
+        n = self.n_inputs
+        for values in batch:
+            if len(values) != n:
+                raise ValueError(f"Expected {n} inputs, got {len(values)}")
+        # Unpack every weight row to a list once per batch instead of slicing
+        # the buffer once per row and neuron
+        units = [
+            (list(self.row(i)), bias, activation)
+            for i, (bias, activation) in enumerate(zip(self.biases, self.activations))
+        ]
+        return [[activation(sum(map(mul, row, values)) + bias) for row, bias, activation in units] for values in batch]
+
+
+@dataclass
+class PackedNetwork:
+    """
+    A feed-forward stack of packed (or quantized) layers applied one after another.
+    """
+    layers: List[Union[PackedLayer, "QuantizedLayer", "SparseLayer"]] = field(default_factory=list)
+
+    def __post_init__(self):
+        for prev, layer in zip(self.layers, self.layers[1:]):
+            if len(prev) != layer.n_inputs:
+                raise ValueError(
+                    f"Layer with {layer.n_inputs} inputs cannot follow a layer with {len(prev)} outputs"
+                )
+
+    @classmethod
+    def from_layers(cls, layers: Sequence[Layer]) -> "PackedNetwork":
+        """Pack every layer of a network"""
+        return cls([PackedLayer.from_layer(layer) for layer in layers])
+
+    def __len__(self):
+        return len(self.layers)
+
+    def __getitem__(self, idx):
+        return self.layers[idx]
+
+    def forward_values(self, values: Sequence[float]) -> List[float]:
+        """Run plain input values through every layer"""
+        for layer in self.layers:
+            values = layer.forward_values(values)
+        return list(values)
+
+    def forward(self, inputs: Vector) -> Vector:
+        """
+        Compute the output of the last layer for the given inputs.
+        """
+        return Vector(self.forward_values(inputs.values))
+
+    def forward_batch(self, batch: Sequence[Sequence[float]]) -> List[List[float]]:
+        """Run every row of `batch` through the network, one layer at a time"""
+        for layer in self.layers:
+            batch = layer.forward_batch(batch)
+        return [list(values) for values in batch]
@@ -0,0 +1,215 @@
+"""
+Parallel row transforms for `Dataset` over a pool of worker processes.
+
+The feature rows are copied once into a `multiprocessing.shared_memory` block
+as a dense float64 matrix. Workers attach to that block (and to a second block
+for the outputs) when they start, so a task is just a `(start, stop)` row range:
+neither input rows nor results are pickled. Each worker writes its outputs at
+their row index, which keeps the result in dataset order no matter in which
+order the chunks finish.
+"""
+
+import math
+import os
+from array import array
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .ml_data_structures import Dataset, Vector
+
+RowFn = Callable[[Vector], Union[float, Vector, Sequence[float]]]
+
+# Per-worker state, filled in by `_init_worker`
+_worker: Dict[str, object] = {}
+
+
+def _output_values(result) -> Sequence[float]:
+    if isinstance(result, Vector):
+        return result.values
+    if isinstance(result, (int, float)):
+        return (float(result),)
+    return result
+
+
+def _init_worker(in_name: str, out_name: str, n_features: int, n_outputs: int, fn: RowFn) -> None:
+    # Workers share the parent's resource tracker, so attaching here does not
+    # register a second owner; the parent unlinks both blocks when it is done.
+    in_shm = shared_memory.SharedMemory(name=in_name)
+    out_shm = shared_memory.SharedMemory(name=out_name)
+    _worker.update(
+        in_shm=in_shm,
+        out_shm=out_shm,
+        n_features=n_features,
+        n_outputs=n_outputs,
+        fn=fn,
+    )
+
+
+def _run_chunk(start: int, stop: int) -> Tuple[int, int]:
+    n_in, n_out, fn = _worker["n_features"], _worker["n_outputs"], _worker["fn"]
+    # The typed views are released after every chunk so that the blocks can be
+    # closed cleanly when the worker exits.
+    with _worker["in_shm"].buf.cast("d") as inputs, _worker["out_shm"].buf.cast("d") as outputs:
+        for i in range(start, stop):
+            values = _output_values(fn(Vector(inputs[i * n_in:(i + 1) * n_in].tolist())))
+            if len(values) != n_out:
+                raise ValueError(
+                    f"Row {i}: expected {n_out} outputs, got {len(values)}"
+                )
+            outputs[i * n_out:(i + 1) * n_out] = array("d", values)
+    return start, stop
+
+
+def _chunks(n_rows: int, chunk_size: int) -> List[Tuple[int, int]]:
+    return [(start, min(start + chunk_size, n_rows)) for start in range(1, n_rows, chunk_size)]
+
+
+def parallel_map(
+    dataset: Dataset,
+    fn: RowFn,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    max_retries: int = 1,
+) -> Dataset:
+    """
+    Apply `fn` to every feature vector of `dataset` in a pool of processes.
+
+    `fn` must be picklable (a module-level function or a picklable object such as
+    a `Layer`). It may return a float, a `Vector` or a sequence of floats, but
+    every row must produce the same number of outputs.
+
+    Args:
+        dataset: Dataset whose feature vectors all have the same length
+        fn: Row transform
+        workers: Number of worker processes (default: `os.cpu_count()`)
+        chunk_size: Rows per task (default: about four tasks per worker)
+        max_retries: How many times a failed chunk is retried, including after
+         a worker process dies, before giving up with a `RuntimeError`; the
+         first row, which runs in this process, fails the same way
+
+    Returns:
+        Dataset: New dataset with the transformed features and the same labels
+    """
+    features = dataset.features
+    n_rows = len(features)
+    if n_rows == 0:
+        return Dataset([], list(dataset.labels), dataset.name, dataset.description)
+    n_features = len(features[0].values)
+    if any(len(v.values) != n_features for v in features):
+        raise ValueError("All feature vectors must have the same length")
+
+    # The first row runs in the parent to find the output width (and to fail
+    # fast on a broken transform before any process is started). It fails
+    # like a chunk in a worker does, after the same number of retries.
+    for attempt in range(max_retries + 1):
+        try:
+            first = array("d", _output_values(fn(features[0])))
+            break
+        except Exception as exc:
+            if attempt == max_retries:
+                raise RuntimeError(f"parallel_map failed on rows 0-0 after {attempt + 1} attempts") from exc
+    n_outputs = len(first)
+    if n_rows == 1:
+        return Dataset([Vector(first.tolist())], list(dataset.labels), dataset.name, dataset.description)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil((n_rows - 1) / (workers * 4)))
+
+    in_shm = shared_memory.SharedMemory(create=True, size=max(1, n_rows * n_features * 8))
+    out_shm = shared_memory.SharedMemory(create=True, size=max(1, n_rows * n_outputs * 8))
+    inputs = outputs = None
+    try:
+        inputs = in_shm.buf.cast("d")
+        for i, vector in enumerate(features):
+            inputs[i * n_features:(i + 1) * n_features] = array("d", vector.values)
+        outputs = out_shm.buf.cast("d")
+        outputs[0:n_outputs] = first
+
+        initargs = (in_shm.name, out_shm.name, n_features, n_outputs, fn)
+        rest = _chunks(n_rows, chunk_size)
+        attempts = {chunk: 0 for chunk in rest}
+        suspects = []
+        while suspects or rest:
+            if suspects:
+                # A dead worker takes the whole pool down without saying which
+                # chunk killed it: run the chunks that were in flight one at a
+                # time until one breaks the pool on its own, then go back to
+                # running everything in parallel
+                lost, queued = _run_pool(suspects, attempts, workers, initargs, max_retries, 1)
+                suspects, rest = [], lost + queued + rest
+            else:
+                lost, queued = _run_pool(rest, attempts, workers, initargs, max_retries, workers)
+                suspects, rest = (lost, queued) if len(lost) > 1 else ([], lost + queued)
+
+        results = [Vector(outputs[i * n_outputs:(i + 1) * n_outputs].tolist()) for i in range(n_rows)]
+    finally:
+        for view in (inputs, outputs):
+            if view is not None:
+                view.release()
+        for shm in (in_shm, out_shm):
+            shm.close()
+            shm.unlink()
+
+    return Dataset(results, list(dataset.labels), dataset.name, dataset.description)
+
+
+def _run_pool(pending, attempts, workers, initargs, max_retries, max_in_flight):
+    """
+    Run `pending` chunks in a fresh pool, at most `max_in_flight` at a time.
+    When a worker dies and takes the pool down with it, returns the chunks
+    that were in flight and the ones not yet submitted; both need to run again.
+
+    A chunk is charged an attempt when it raises, or when the pool breaks while
+    it is the only chunk in flight; otherwise the chunk that killed the worker
+    is unknown and none of the lost chunks are charged.
+    """
+    def retry(chunk, exc):
+        attempts[chunk] += 1
+        if attempts[chunk] > max_retries:
+            raise RuntimeError(
+                f"parallel_map failed on rows {chunk[0]}-{chunk[1] - 1} after {attempts[chunk]} attempts"
+            ) from exc
+
+    queue = deque(pending)
+    futures = {}
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+    try:
+        while queue or futures:
+            while queue and len(futures) < max_in_flight:
+                try:
+                    future = pool.submit(_run_chunk, *queue[0])
+                except BrokenProcessPool:
+                    # The chunks in flight fail with BrokenProcessPool as well,
+                    # which is handled below
+                    if not futures:
+                        return [], list(queue)
+                    break
+                futures[future] = queue.popleft()
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = futures.pop(future)
+                exc = future.exception()
+                if exc is None:
+                    continue
+                if isinstance(exc, BrokenProcessPool):
+                    # Every unfinished chunk is lost with the pool and is
+                    # retried in a new one.
+                    lost = [chunk] + [
+                        c for f, c in futures.items()
+                        if not f.done() or f.cancelled() or f.exception() is not None
+                    ]
+                    if len(lost) == 1:
+                        retry(chunk, exc)
+                    return lost, list(queue)
+                retry(chunk, exc)
+                queue.append(chunk)
+        return [], []
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,267 @@
+"""
+Reduced-precision storage for layer weights.
+
+Supported precisions:
+
+* ``float64`` - the reference, identical to `PackedLayer`
+* ``float32`` - weights stored as 32-bit floats; inputs and pre-activations are
+  rounded to float32 as well
+* ``float16`` - weights stored as IEEE half floats and decoded row by row
+* ``int8``    - symmetric per-neuron quantization, ``w ~= scale * q`` with
+  ``q`` in [-127, 127]; the dot product is accumulated in floats and scaled once
+
+Biases are kept in float64 in every mode; they are one value per neuron and
+contribute nothing noticeable to the memory footprint.
+"""
+
+import struct
+from array import array
+from dataclasses import dataclass
+from operator import mul
+from typing import Dict, List, Optional, Sequence, Union
+
+from .ml_data_structures import ActivationFunction, Layer, Vector
+from .packed import PackedLayer, PackedNetwork
+
+PRECISIONS = ("float64", "float32", "float16", "int8")
+
+_FLOAT32 = struct.Struct("f")
+
+
+def _round32(x: float) -> float:
+    return _FLOAT32.unpack(_FLOAT32.pack(x))[0]
+
+
+@dataclass
+class QuantizedLayer:
+    """
+    A packed layer whose weights are stored at reduced precision.
+
+    `weights` holds float64 or float32 values, raw float16 bytes, or int8 codes
+    depending on `precision`. `scales` is only used for ``int8``.
+    """
+    n_inputs: int
+    precision: str
+    weights: Union[array, bytes]
+    biases: Sequence[float]
+    activations: List[ActivationFunction]
+    scales: Optional[array] = None
+
+    def __post_init__(self):
+        if self.precision not in PRECISIONS:
+            raise ValueError(
+                f"Unknown precision {self.precision!r}, expected one of {PRECISIONS}"
+            )
+        n_neurons = len(self.biases)
+        if len(self.activations) != n_neurons:
+            raise ValueError("biases and activations must have the same length")
+        # float16 weights are raw bytes, two per weight
+        n_weights = len(self.weights) / 2 if self.precision == "float16" else len(self.weights)
+        if n_weights != self.n_inputs * n_neurons:
+            raise ValueError("weights must have n_inputs * n_neurons entries")
+        if self.precision == "int8" and (self.scales is None or len(self.scales) != n_neurons):
+            raise ValueError("int8 layers need one scale per neuron")
+        self._row_f16 = struct.Struct(f"<{self.n_inputs}e")
+
+    @classmethod
+    def from_layer(cls, layer: Union[Layer, PackedLayer, "QuantizedLayer"], precision: str) -> "QuantizedLayer":
+        """
+        Convert a layer to the given precision.
+
+        Args:
+            layer: Layer or PackedLayer holding float64 weights, or a
+             QuantizedLayer, whose dequantized weights are converted
+            precision: One of `PRECISIONS`
+
+        Returns:
+            QuantizedLayer: The converted layer
+        """
+        if isinstance(layer, QuantizedLayer):
+            packed = layer.dequantize()
+        elif isinstance(layer, PackedLayer):
+            packed = layer
+        else:
+            packed = PackedLayer.from_layer(layer)
+        n = packed.n_inputs
+        biases = array("d", packed.biases)
+        activations = list(packed.activations)
+        scales = None
+        if precision == "float64":
+            weights = array("d", packed.weights)
+        elif precision == "float32":
+            weights = array("f", packed.weights)
+        elif precision == "float16":
+            weights = struct.pack(f"<{len(packed.weights)}e", *packed.weights)
+        elif precision == "int8":
+            weights = array("b")
+            scales = array("d")
+            for i in range(len(packed)):
+                row = packed.row(i)
+                largest = max((abs(w) for w in row), default=0.0)
+                scale = largest / 127.0 if largest > 0.0 else 1.0
+                scales.append(scale)
+                weights.extend(round(w / scale) for w in row)
+        else:
+            raise ValueError(
+                f"Unknown precision {precision!r}, expected one of {PRECISIONS}"
+            )
+        return cls(n, precision, weights, biases, activations, scales)
+
+    def __len__(self):
+        return len(self.biases)
+
+    def dequantize(self) -> PackedLayer:
+        """The layer with its (dequantized) weights in float64"""
+        weights = array("d")
+        for i in range(len(self)):
+            weights.fromlist(list(self.row(i)))
+        return PackedLayer(self.n_inputs, weights, array("d", self.biases), list(self.activations))
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the weight, bias and scale buffers"""
+        weights = len(self.weights) if isinstance(self.weights, bytes) else (
+            len(self.weights) * self.weights.itemsize
+        )
+        scales = 0 if self.scales is None else len(self.scales) * self.scales.itemsize
+        return weights + len(self.biases) * 8 + scales
+
+    def row(self, idx: int) -> Sequence[float]:
+        """Return the (dequantized) weights of neuron `idx`"""
+        n = self.n_inputs
+        if self.precision == "float16":
+            return self._row_f16.unpack_from(self.weights, idx * n * 2)
+        row = self.weights[idx * n:(idx + 1) * n]
+        if self.precision == "int8":
+            scale = self.scales[idx]
+            return [q * scale for q in row]
+        return row
+
+    def forward_values(self, values: Sequence[float]) -> List[float]:
+        """
+        Compute the outputs of all neurons for a plain sequence of inputs.
+
+        Args:
+            values: Sequence of `n_inputs` floats
+
+        Returns:
+            List[float]: One output per neuron
+        """
+        if len(values) != self.n_inputs:
+            raise ValueError(
+                f"Expected {self.n_inputs} inputs, got {len(values)}"
+            )
+        n = self.n_inputs
+        weights = self.weights
+        units = zip(self.biases, self.activations)
+        if self.precision == "float64":
+            return [
+                activation(sum(map(mul, weights[i * n:(i + 1) * n], values)) + bias)
+                for i, (bias, activation) in enumerate(units)
+            ]
+        if self.precision == "float32":
+            values = array("f", values)
+            return [
+                activation(_round32(sum(map(mul, weights[i * n:(i + 1) * n], values)) + bias))
+                for i, (bias, activation) in enumerate(units)
+            ]
+        if self.precision == "float16":
+            unpack = self._row_f16.unpack_from
+            return [
+                activation(sum(map(mul, unpack(weights, i * n * 2), values)) + bias)
+                for i, (bias, activation) in enumerate(units)
+            ]
+        scales = self.scales
+        return [
+            activation(sum(map(mul, weights[i * n:(i + 1) * n], values)) * scales[i] + bias)
+            for i, (bias, activation) in enumerate(units)
+        ]
+
+    def forward(self, inputs: Vector) -> Vector:
+        """
+        Compute the outputs of all neurons in the layer.
+        """
+        return Vector(self.forward_values(inputs.values))
+
+    def forward_batch(self, batch: Sequence[Sequence[float]]) -> List[List[float]]:
+        """Compute the layer outputs for every row of `batch`"""
+        return [self.forward_values(values) for values in batch]
+
+
+def quantize_network(
+    layers: Union[Sequence[Union[Layer, PackedLayer, QuantizedLayer]], PackedNetwork], precision: str
+) -> PackedNetwork:
+    """
+    Convert every layer of a network to the given precision.
+
+    Args:
+        layers: Layers in forward order (a `PackedNetwork` also works);
+         quantized layers are dequantized and converted again
+        precision: One of `PRECISIONS`
+
+    Returns:
+        PackedNetwork: Network of `QuantizedLayer` objects
+    """
+    if isinstance(layers, PackedNetwork):
+        layers = layers.layers
+    return PackedNetwork([QuantizedLayer.from_layer(layer, precision) for layer in layers])
+
+
+def _nbytes(network: PackedNetwork) -> int:
+    return sum(layer.nbytes for layer in network.layers)
+
+
+def precision_report(
+    layers: Sequence[Union[Layer, PackedLayer]],
+    inputs: Sequence[Sequence[float]],
+    precisions: Sequence[str] = PRECISIONS,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Compare each precision against the float64 reference on `inputs`.
+
+    Args:
+        layers: Layers in forward order
+        inputs: Rows to evaluate
+        precisions: Precisions to include in the report
+
+    Returns:
+        Dict mapping precision to ``nbytes``, ``compression`` (reference bytes
+        over mode bytes), ``max_abs_error``, ``mean_abs_error`` and
+        ``max_rel_error`` over all outputs
+    """
+    reference = quantize_network(layers, "float64")
+    expected = reference.forward_batch(inputs)
+    reference_bytes = _nbytes(reference)
+
+    report = {}
+    for precision in precisions:
+        network = quantize_network(layers, precision)
+        errors = []
+        rel_errors = []
+        for want_row, got_row in zip(expected, network.forward_batch(inputs)):
+            for want, got in zip(want_row, got_row):
+                err = abs(got - want)
+                errors.append(err)
+                rel_errors.append(err / abs(want) if want != 0.0 else err)
+        nbytes = _nbytes(network)
+        report[precision] = {
+            "nbytes": nbytes,
+            "compression": reference_bytes / nbytes,
+            "max_abs_error": max(errors, default=0.0),
+            "mean_abs_error": sum(errors) / len(errors) if errors else 0.0,
+            "max_rel_error": max(rel_errors, default=0.0),
+        }
+    return report
+
+
+def format_report(report: Dict[str, Dict[str, float]]) -> str:
+    """Render a `precision_report` as a fixed-width table"""
+    lines = [
+        f"{'precision':<10}{'bytes':>12}{'ratio':>8}{'max abs err':>14}{'mean abs err':>14}{'max rel err':>14}"
+    ]
+    for precision, row in report.items():
+        lines.append(
+            f"{precision:<10}{row['nbytes']:>12d}{row['compression']:>8.2f}"
+            f"{row['max_abs_error']:>14.3e}{row['mean_abs_error']:>14.3e}{row['max_rel_error']:>14.3e}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,242 @@
+"""
+Opt-in profiling hooks for the hot paths of the package.
+
+    from fundamentals import profiling
+
+    with profiling.profile(memory=True, trace=True) as profiler:
+        layer.forward(x)
+    print(profiler.report())                     # sorted by cumulative time
+    profiler.export_chrome_trace("trace.json")   # open in chrome://tracing or Perfetto
+
+`enable` replaces every target, a module function or a class attribute, with
+a timing wrapper, and `disable` puts the original objects back. While
+profiling is off nothing is wrapped, so calls cost exactly what they cost
+without this module (`python -m benchmarks.bench_profiling` checks it). Only
+calls made through the patched attribute are seen: a function imported by
+name (`from .operators import mul`) before `enable` keeps the original.
+
+Recorded per target: calls, cumulative time, own time (without the time of
+profiled callees) and, with `memory=True`, the net bytes allocated during the
+calls as traced by `tracemalloc`, which slows every allocation down, so it is
+off by default. With `trace=True` every call is also kept as a Chrome trace
+event, up to `max_events`.
+"""
+
+import functools
+import importlib
+import inspect
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# "module:name" for a function, "module:Class.name" for a method and "*" for
+# everything defined in the module or class itself
+DEFAULT_TARGETS = (
+    "fundamentals.operators:*",
+    "fundamentals.ml_data_structures:Vector.__add__",
+    "fundamentals.ml_data_structures:Vector.__mul__",
+    "fundamentals.ml_data_structures:Vector.dot",
+    "fundamentals.ml_data_structures:Vector.magnitude",
+    "fundamentals.ml_data_structures:Neuron.forward",
+    "fundamentals.ml_data_structures:Layer.forward",
+    "fundamentals.ml_data_structures:Dataset.__len__",
+    "fundamentals.ml_data_structures:Dataset.__getitem__",
+    "fundamentals.ml_data_structures:Dataset.split",
+)
+
+SORT_KEYS = ("total", "own", "calls", "bytes", "name")
+
+_active: Optional["Profiler"] = None
+
+
+def _resolve(target: str) -> List[Tuple[object, str, str]]:
+    """(owner, attribute, label) of every attribute a target names"""
+    module_name, _, path = target.partition(":")
+    module = importlib.import_module(module_name)
+    owner, _, attr = path.rpartition(".")
+    obj = module
+    for part in owner.split(".") if owner else []:
+        obj = getattr(obj, part)
+    prefix = f"{module_name.rsplit('.', 1)[-1]}.{owner + '.' if owner else ''}"
+    if attr != "*":
+        return [(obj, attr, prefix + attr)]
+    if inspect.ismodule(obj):
+        names = [n for n, v in vars(obj).items() if inspect.isfunction(v) and v.__module__ == module_name]
+    else:
+        names = [n for n, v in vars(obj).items() if inspect.isfunction(v) or isinstance(v, (staticmethod, classmethod))]
+    return [(obj, name, prefix + name) for name in names]
+
+
+class Profiler:
+    """
+    Counters and trace events of the wrapped targets.
+
+    Use `enable` / `profile` rather than creating one directly.
+    """
+
+    def __init__(self, memory: bool = False, trace: bool = False, max_events: int = 1_000_000):
+        self.memory = memory
+        self.trace = trace
+        self.max_events = max_events
+        # name -> [calls, total seconds, own seconds, bytes]
+        self.stats: Dict[str, List[float]] = {}
+        self.events: List[dict] = []
+        self.dropped_events = 0
+        self._local = threading.local()
+        self._patched: List[Tuple[object, str, object, bool]] = []
+        self._started_tracemalloc = False
+        self._origin = time.perf_counter()
+
+    def _wrap(self, label: str, fn):
+        stat = self.stats.setdefault(label, [0, 0.0, 0.0, 0])
+        local, perf_counter, events = self._local, time.perf_counter, self.events
+        memory, trace = self.memory, self.trace
+        traced = tracemalloc.get_traced_memory
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            stack = getattr(local, "stack", None)
+            if stack is None:
+                stack = local.stack = []
+            stack.append(0.0)
+            before = traced()[0] if memory else 0
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                stat[0] += 1
+                stat[1] += elapsed
+                stat[2] += elapsed - children
+                if memory:
+                    stat[3] += traced()[0] - before
+                if trace:
+                    if len(events) < self.max_events:
+                        events.append({
+                            "name": label, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                            "ts": 1e6 * (start - self._origin), "dur": 1e6 * elapsed,
+                        })
+                    else:
+                        self.dropped_events += 1
+
+        return wrapper
+
+    def _install(self, targets: Sequence[str]) -> None:
+        for target in targets:
+            for owner, attr, label in _resolve(target):
+                own = attr in vars(owner)
+                raw = vars(owner)[attr] if own else getattr(owner, attr)
+                if isinstance(raw, staticmethod):
+                    patched = staticmethod(self._wrap(label, raw.__func__))
+                elif isinstance(raw, classmethod):
+                    patched = classmethod(self._wrap(label, raw.__func__))
+                elif callable(raw):
+                    patched = self._wrap(label, raw)
+                else:
+                    raise TypeError(f"{target}: {label} is not callable")
+                setattr(owner, attr, patched)
+                self._patched.append((owner, attr, raw, own))
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def _uninstall(self) -> None:
+        # In reverse, so a target listed twice ends up with its original
+        for owner, attr, raw, own in reversed(self._patched):
+            if own:
+                setattr(owner, attr, raw)
+            else:
+                delattr(owner, attr)
+        self._patched.clear()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def rows(self, sort: str = "total") -> List[Dict[str, float]]:
+        """One dict per called target, sorted by `sort` (one of `SORT_KEYS`), largest first"""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key {sort!r}; expected one of {SORT_KEYS}")
+        rows = [
+            {"name": name, "calls": int(calls), "total": total, "own": own, "bytes": int(nbytes)}
+            for name, (calls, total, own, nbytes) in self.stats.items()
+            if calls
+        ]
+        return sorted(rows, key=lambda r: r[sort], reverse=sort != "name")
+
+    def report(self, sort: str = "total", limit: Optional[int] = None) -> str:
+        """The counters as a text table"""
+        lines = [f"{'name':<40} {'calls':>10} {'total ms':>10} {'own ms':>10} {'us/call':>9} {'KiB':>10}"]
+        for r in self.rows(sort)[:limit]:
+            kib = f"{r['bytes'] / 1024:10.1f}" if self.memory else f"{'-':>10}"
+            lines.append(
+                f"{r['name']:<40} {r['calls']:>10} {1000 * r['total']:>10.3f} {1000 * r['own']:>10.3f} "
+                f"{1e6 * r['total'] / r['calls']:>9.2f} {kib}"
+            )
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path: str) -> None:
+        """Write the recorded calls in the Chrome trace event format"""
+        if not self.trace:
+            raise ValueError("Enable profiling with trace=True to record trace events")
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+
+def enable(
+    targets: Sequence[str] = DEFAULT_TARGETS, memory: bool = False, trace: bool = False, max_events: int = 1_000_000
+) -> Profiler:
+    """
+    Start profiling `targets`.
+
+    Args:
+        targets: "module:function", "module:Class.method" or "module:*" /
+         "module:Class.*" strings; by default the operators prelude, `Vector`
+         arithmetic, `Neuron`/`Layer.forward` and `Dataset` access
+        memory: Also record allocated bytes with tracemalloc
+        trace: Also keep every call as a Chrome trace event
+        max_events: Trace events kept; later calls are counted in `dropped_events`
+
+    Returns:
+        Profiler: Collects until `disable`
+    """
+    global _active
+    if _active is not None:
+        raise RuntimeError("Profiling is already enabled")
+    profiler = Profiler(memory, trace, max_events)
+    try:
+        profiler._install(targets)
+    except BaseException:
+        profiler._uninstall()
+        raise
+    _active = profiler
+    return profiler
+
+
+def disable() -> Optional[Profiler]:
+    """Restore the original functions; returns the profiler that was active, if any"""
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None:
+        profiler._uninstall()
+    return profiler
+
+
+def is_enabled() -> bool:
+    return _active is not None
+
+
+@contextmanager
+def profile(targets: Sequence[str] = DEFAULT_TARGETS, memory: bool = False, trace: bool = False) -> Iterator[Profiler]:
+    """`enable` for the duration of a `with` block"""
+    profiler = enable(targets, memory, trace)
+    try:
+        yield profiler
+    finally:
+        disable()
@@ -0,0 +1,228 @@
+"""
+Magnitude pruning with sparse execution for neurons and layers.
+
+Pruning zeroes the smallest-magnitude weights until a target fraction of them
+is zero. The survivors are stored in a sparse form (index and value arrays; CSR
+for whole layers), and the forward pass only visits those connections.
+"""
+
+from array import array
+from dataclasses import dataclass
+from functools import cached_property
+from operator import itemgetter, mul
+from typing import Callable, List, Sequence, Tuple, Union
+
+from .ml_data_structures import ActivationFunction, Layer, Neuron, Vector
+from .packed import PackedLayer
+
+
+def _check_sparsity(sparsity: float) -> None:
+    if not 0.0 <= sparsity <= 1.0:
+        raise ValueError(f"sparsity must be between 0 and 1, got {sparsity}")
+
+
+def _gather(indices: Sequence[int]) -> Callable[[Sequence[float]], Sequence[float]]:
+    """Return a function picking `indices` out of an input sequence"""
+    if len(indices) == 1:
+        idx = indices[0]
+        return lambda values: (values[idx],)
+    if not indices:
+        return lambda values: ()
+    return itemgetter(*indices)
+
+
+def _keep_mask(weights: Sequence[float], sparsity: float) -> List[bool]:
+    """Keep the `len(weights) - round(sparsity * len(weights))` largest magnitudes"""
+    n_keep = len(weights) - round(sparsity * len(weights))
+    order = sorted(range(len(weights)), key=lambda i: abs(weights[i]), reverse=True)
+    keep = [False] * len(weights)
+    for i in order[:n_keep]:
+        keep[i] = weights[i] != 0.0
+    return keep
+
+
+@dataclass
+class SparseNeuron:
+    """
+    A neuron that stores only its non-zero weights as `(indices, values)` pairs.
+    """
+    n_inputs: int
+    indices: array
+    values: array
+    bias: float
+    activation: ActivationFunction
+
+    @classmethod
+    def from_neuron(cls, neuron: Neuron, sparsity: float = 0.0) -> "SparseNeuron":
+        """
+        Prune a neuron to the target sparsity and store it sparsely.
+
+        Args:
+            neuron: Dense neuron
+            sparsity: Fraction of weights to zero, between 0 and 1
+
+        Returns:
+            SparseNeuron: The pruned neuron
+        """
+        _check_sparsity(sparsity)
+        weights = neuron.weights.values
+        keep = _keep_mask(weights, sparsity)
+        indices = array("l", (i for i, k in enumerate(keep) if k))
+        values = array("d", (weights[i] for i in indices))
+        return cls(len(weights), indices, values, neuron.bias, neuron.activation)
+
+    @property
+    def sparsity(self) -> float:
+        """Fraction of weights that are zero"""
+        return 1.0 - len(self.values) / self.n_inputs if self.n_inputs else 0.0
+
+    def to_neuron(self) -> Neuron:
+        """Expand back into a dense `Neuron`"""
+        weights = [0.0] * self.n_inputs
+        for i, w in zip(self.indices, self.values):
+            weights[i] = w
+        return Neuron(Vector(weights), self.bias, self.activation)
+
+    def forward(self, inputs: Vector) -> float:
+        """
+        Compute the output of the neuron for the given inputs.
+        """
+        values = inputs.values
+        if len(values) != self.n_inputs:
+            raise ValueError(
+                f"Expected {self.n_inputs} inputs, got {len(values)}"
+            )
+        return self.activation(sum(map(mul, self.values, self._gather(values))) + self.bias)
+
+    @cached_property
+    def _gather(self) -> Callable[[Sequence[float]], Sequence[float]]:
+        return _gather(self.indices)
+
+
+@dataclass
+class SparseLayer:
+    """
+    A layer whose weights are stored in compressed sparse row (CSR) form.
+
+    The weights of neuron `i` are `values[indptr[i]:indptr[i + 1]]` at input
+    positions `indices[indptr[i]:indptr[i + 1]]`.
+    """
+    n_inputs: int
+    indptr: array
+    indices: array
+    values: array
+    biases: array
+    activations: List[ActivationFunction]
+
+    @classmethod
+    def from_layer(
+        cls, layer: Union[Layer, PackedLayer], sparsity: float = 0.0, per_neuron: bool = False
+    ) -> "SparseLayer":
+        """
+        Prune a layer to the target sparsity and store it in CSR form.
+
+        Args:
+            layer: Dense Layer or PackedLayer
+            sparsity: Fraction of weights to zero, between 0 and 1
+            per_neuron: Prune every neuron to `sparsity` separately instead of
+             ranking all weights of the layer together
+
+        Returns:
+            SparseLayer: The pruned layer
+        """
+        _check_sparsity(sparsity)
+        packed = layer if isinstance(layer, PackedLayer) else PackedLayer.from_layer(layer)
+        n = packed.n_inputs
+        if per_neuron:
+            keep = []
+            for i in range(len(packed)):
+                keep.extend(_keep_mask(packed.row(i), sparsity))
+        else:
+            keep = _keep_mask(packed.weights, sparsity)
+
+        indptr, indices, values = array("l", [0]), array("l"), array("d")
+        for i in range(len(packed)):
+            for j in range(n):
+                if keep[i * n + j]:
+                    indices.append(j)
+                    values.append(packed.weights[i * n + j])
+            indptr.append(len(indices))
+        return cls(n, indptr, indices, values, array("d", packed.biases), list(packed.activations))
+
+    def __len__(self):
+        return len(self.biases)
+
+    @property
+    def nnz(self) -> int:
+        """Number of stored (non-zero) weights"""
+        return len(self.values)
+
+    @property
+    def sparsity(self) -> float:
+        """Fraction of weights that are zero"""
+        total = self.n_inputs * len(self)
+        return 1.0 - self.nnz / total if total else 0.0
+
+    @cached_property
+    def _rows(self) -> List[Tuple[List[float], Callable[[Sequence[float]], Sequence[float]]]]:
+        # Per-neuron weight lists and input gathers, built once so the forward
+        # pass does no index arithmetic or slicing.
+        rows = []
+        for i in range(len(self)):
+            start, stop = self.indptr[i], self.indptr[i + 1]
+            rows.append((self.values[start:stop].tolist(), _gather(self.indices[start:stop])))
+        return rows
+
+    def neuron(self, idx: int) -> SparseNeuron:
+        """Return neuron `idx` as a `SparseNeuron`"""
+        start, stop = self.indptr[idx], self.indptr[idx + 1]
+        return SparseNeuron(
+            self.n_inputs, self.indices[start:stop], self.values[start:stop], self.biases[idx], self.activations[idx]
+        )
+
+    def to_layer(self) -> Layer:
+        """Expand back into a dense `Layer`"""
+        return Layer([self.neuron(i).to_neuron() for i in range(len(self))])
+
+    def forward_values(self, values: Sequence[float]) -> List[float]:
+        """
+        Compute the outputs of all neurons for a plain sequence of inputs.
+
+        Args:
+            values: Sequence of `n_inputs` floats
+
+        Returns:
+            List[float]: One output per neuron
+        """
+        if len(values) != self.n_inputs:
+            raise ValueError(
+                f"Expected {self.n_inputs} inputs, got {len(values)}"
+            )
+        return [
+            activation(sum(map(mul, weights, gather(values))) + bias)
+            for (weights, gather), bias, activation in zip(self._rows, self.biases, self.activations)
+        ]
+
+    def forward(self, inputs: Vector) -> Vector:
+        """
+        Compute the outputs of all neurons in the layer.
+        """
+        return Vector(self.forward_values(inputs.values))
+
+    def forward_batch(self, batch: Sequence[Sequence[float]]) -> List[List[float]]:
+        """Compute the layer outputs for every row of `batch`"""
+        return [self.forward_values(values) for values in batch]
+
+
+def prune_neuron(neuron: Neuron, sparsity: float) -> SparseNeuron:
+    """
+    Magnitude-prune a neuron. See `SparseNeuron.from_neuron`.
+    """
+    return SparseNeuron.from_neuron(neuron, sparsity)
+
+
+def prune_layer(layer: Union[Layer, PackedLayer], sparsity: float, per_neuron: bool = False) -> SparseLayer:
+    """
+    Magnitude-prune a layer. See `SparseLayer.from_layer`.
+    """
+    return SparseLayer.from_layer(layer, sparsity, per_neuron=per_neuron)
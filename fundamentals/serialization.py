@@ -0,0 +1,188 @@
+"""
+Compact binary save/load for layers and networks.
+
+File layout (all integers little-endian):
+
+    magic      4 bytes   b"FNDM"
+    version    uint16
+    reserved   uint16
+    hlen       uint32    length of the JSON header in bytes
+    header     hlen      UTF-8 JSON, padded with spaces to an 8 byte boundary
+    data                 raw little-endian float64 weight and bias arrays
+
+The header names the activation of every neuron and gives the offset of each
+layer's weight and bias arrays inside the data block. Loading memory-maps the
+file and exposes those arrays directly as `memoryview` objects, so no `Neuron`,
+`Vector` or per-neuron activation object is built until something asks for one.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, List, Sequence, Type, Union
+
+from .ml_data_structures import ActivationFunction, Layer, ReLU, Sigmoid
+from .packed import PackedLayer, PackedNetwork
+
+MAGIC = b"FNDM"
+VERSION = 1
+_PREAMBLE = struct.Struct("<4sHHI")
+_ALIGN = 8
+
+ACTIVATIONS: Dict[str, Type[ActivationFunction]] = {
+    "ReLU": ReLU,
+    "Sigmoid": Sigmoid,
+}
+
+PathLike = Union[str, os.PathLike]
+LayerLike = Union[Layer, PackedLayer]
+
+
+def register_activation(cls: Type[ActivationFunction]) -> Type[ActivationFunction]:
+    """
+    Make an activation class loadable by name. Usable as a class decorator.
+
+    Args:
+        cls: ActivationFunction subclass constructible without arguments
+
+    Returns:
+        The class itself
+    """
+    ACTIVATIONS[cls.__name__] = cls
+    return cls
+
+
+def _activation_name(activation: ActivationFunction) -> str:
+    name = type(activation).__name__
+    if ACTIVATIONS.get(name) is not type(activation):
+        raise ValueError(
+            f"Activation {name!r} is not registered; use register_activation first"
+        )
+    return name
+
+
+def _pack(layer: LayerLike) -> PackedLayer:
+    return layer if isinstance(layer, PackedLayer) else PackedLayer.from_layer(layer)
+
+
+def _as_le_bytes(values: Sequence[float]) -> bytes:
+    buf = array("d", values)
+    if sys.byteorder != "little":
+        buf.byteswap()
+    return buf.tobytes()
+
+
+def save_network(layers: Sequence[LayerLike], path: PathLike) -> None:
+    """
+    Write a stack of layers to `path` in the compact binary format.
+
+    Args:
+        layers: Layers (or packed layers) in forward order
+        path: Destination file
+
+    Returns:
+        None
+    """
+    packed = [_pack(layer) for layer in layers]
+    PackedNetwork(packed)  # validates that consecutive layer shapes line up
+
+    entries = []
+    offset = 0
+    for layer in packed:
+        n_weights = len(layer.weights) * 8
+        n_biases = len(layer.biases) * 8
+        entries.append({
+            "n_inputs": layer.n_inputs,
+            "n_neurons": len(layer),
+            "weights_offset": offset,
+            "biases_offset": offset + n_weights,
+            "activations": [_activation_name(a) for a in layer.activations],
+        })
+        offset += n_weights + n_biases
+
+    header = json.dumps({"layers": entries}, separators=(",", ":")).encode("utf-8")
+    pad = -(_PREAMBLE.size + len(header)) % _ALIGN
+    header += b" " * pad
+
+    with open(path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, 0, len(header)))
+        f.write(header)
+        for layer in packed:
+            f.write(_as_le_bytes(layer.weights))
+            f.write(_as_le_bytes(layer.biases))
+
+
+def save_layer(layer: LayerLike, path: PathLike) -> None:
+    """
+    Write a single layer to `path`. See `save_network`.
+    """
+    save_network([layer], path)
+
+
+def _read_view(data: memoryview, start: int, count: int) -> Sequence[float]:
+    view = data[start:start + count * 8]
+    if sys.byteorder == "little":
+        return view.cast("d")
+    buf = array("d", view.tobytes())
+    buf.byteswap()
+    return buf
+
+
+def load_network(path: PathLike, use_mmap: bool = True) -> PackedNetwork:
+    """
+    Load a network written by `save_network`.
+
+    Args:
+        path: File to load
+        use_mmap: Memory-map the file (default) instead of reading it into memory
+
+    Returns:
+        PackedNetwork: Layers whose weights and biases are views into the file
+    """
+    with open(path, "rb") as f:
+        if use_mmap:
+            raw = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            raw = memoryview(f.read())
+
+    if len(raw) < _PREAMBLE.size:
+        raise ValueError(f"{path} is too small to be a model file")
+    magic, version, _, hlen = _PREAMBLE.unpack_from(raw)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a model file")
+    if version != VERSION:
+        raise ValueError(f"Unsupported model file version {version}")
+
+    data_start = _PREAMBLE.size + hlen
+    header = json.loads(bytes(raw[_PREAMBLE.size:data_start]).decode("utf-8"))
+    data = raw[data_start:]
+
+    # One activation instance per distinct name, shared by every neuron using it
+    shared: Dict[str, ActivationFunction] = {}
+    layers: List[PackedLayer] = []
+    for entry in header["layers"]:
+        n_inputs, n_neurons = entry["n_inputs"], entry["n_neurons"]
+        activations = []
+        for name in entry["activations"]:
+            if name not in shared:
+                if name not in ACTIVATIONS:
+                    raise ValueError(f"Unknown activation {name!r} in {path}")
+                shared[name] = ACTIVATIONS[name]()
+            activations.append(shared[name])
+        weights = _read_view(data, entry["weights_offset"], n_inputs * n_neurons)
+        biases = _read_view(data, entry["biases_offset"], n_neurons)
+        layers.append(PackedLayer(n_inputs, weights, biases, activations))
+    return PackedNetwork(layers)
+
+
+def load_layer(path: PathLike, use_mmap: bool = True) -> PackedLayer:
+    """
+    Load a file written by `save_layer`. See `load_network`.
+    """
+    network = load_network(path, use_mmap=use_mmap)
+    if len(network) != 1:
+        raise ValueError(f"{path} holds {len(network)} layers, expected 1")
+    return network[0]
@@ -0,0 +1,432 @@
+"""
+Local inference server with dynamic micro-batching, using only the standard library.
+
+`MicroBatcher` queues input rows from concurrent callers and runs them through
+the model's `forward_batch` together: a batch is flushed as soon as
+`max_batch_size` rows are waiting or the oldest row has waited `max_wait`
+seconds. Under load, thousands of single-row forwards become a few large
+batches (see `PackedLayer.forward_batch`). The forward pass runs in a worker
+thread, so the event loop keeps accepting requests and filling the next batch
+meanwhile.
+
+`InferenceServer` exposes a batcher over HTTP/1.1 with keep-alive, on a TCP
+port or a Unix socket:
+
+    POST /predict   {"inputs": [0.5, 1.0]}               -> {"outputs": [...]}
+                    {"inputs": [[0.5, 1.0], [2.0, 0.1]]} -> {"outputs": [[...], [...]]}
+    GET  /stats     request and batch counters, p50/p99 latency, throughput
+    GET  /health    {"status": "ok"}
+
+From the command line, serving a file written by `serialization.save_network`:
+
+    python -m fundamentals.serving model.bin --port 8000 --max-batch-size 64 --max-wait-ms 2
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from .ml_data_structures import Layer
+from .packed import PackedLayer, PackedNetwork
+
+MAX_BODY_BYTES = 16 * 2**20
+
+
+def as_model(model):
+    """
+    A model with `forward_batch`: packed, quantized and sparse layers and
+    networks are used as they are, a `Layer` is packed and a sequence of
+    layers becomes a `PackedNetwork`.
+    """
+    if isinstance(model, Layer):
+        return PackedLayer.from_layer(model)
+    if isinstance(model, (list, tuple)):
+        return PackedNetwork([PackedLayer.from_layer(x) if isinstance(x, Layer) else x for x in model])
+    if not hasattr(model, "forward_batch"):
+        raise TypeError(f"{type(model).__name__} has no forward_batch")
+    return model
+
+
+def _n_inputs(model) -> Optional[int]:
+    if isinstance(model, PackedNetwork):
+        return model.layers[0].n_inputs if model.layers else None
+    return getattr(model, "n_inputs", None)
+
+
+class LatencyStats:
+    """
+    Request and batch counters, and the latencies of the last `window` requests.
+
+    Latency is measured from the moment a row is queued until its output is
+    ready, so it includes the wait for the batch to fill.
+    """
+
+    def __init__(self, window: int = 10_000):
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.rows = 0
+        self.forward_seconds = 0.0
+        self.started = time.perf_counter()
+
+    def record(self, seconds: float) -> None:
+        self.requests += 1
+        self.latencies.append(seconds)
+
+    def record_batch(self, size: int, seconds: float) -> None:
+        self.batches += 1
+        self.rows += size
+        self.forward_seconds += seconds
+
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentile (0-100) of the recorded latencies, in seconds"""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = max(1, -(-len(ordered) * q // 100))
+        return ordered[int(rank) - 1]
+
+    def snapshot(self) -> Dict[str, float]:
+        uptime = time.perf_counter() - self.started
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "batches": self.batches,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "p50_ms": 1000 * self.percentile(50),
+            "p99_ms": 1000 * self.percentile(99),
+            "max_ms": 1000 * max(self.latencies, default=0.0),
+            "requests_per_second": self.requests / uptime if uptime > 0 else 0.0,
+            "forward_seconds": self.forward_seconds,
+            "uptime_seconds": uptime,
+        }
+
+
+class MicroBatcher:
+    """
+    Collect single rows into batches for `model.forward_batch`.
+
+    Args:
+        model: Anything accepted by `as_model`
+        max_batch_size: Flush as soon as this many rows are waiting
+        max_wait: Flush when the oldest waiting row has waited this long (seconds)
+        stats: Counters to update (default: a new `LatencyStats`)
+
+    Use it as an async context manager inside a running event loop:
+
+        async with MicroBatcher(network, max_batch_size=64) as batcher:
+            outputs = await batcher.predict([0.5, 1.0])
+    """
+
+    def __init__(self, model, max_batch_size: int = 64, max_wait: float = 0.002, stats: Optional[LatencyStats] = None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait < 0:
+            raise ValueError("max_wait must not be negative")
+        self.model = as_model(model)
+        self.n_inputs = _n_inputs(self.model)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.stats = stats if stats is not None else LatencyStats()
+        self._pending: List[Tuple[Sequence[float], asyncio.Future, float]] = []
+        self._ready: Optional[asyncio.Event] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: List[Tuple[Sequence[float], asyncio.Future, float]] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def start(self) -> None:
+        self._ready = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="forward")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop batching; rows still waiting or in the running batch fail with `CancelledError`"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for _, future, _ in self._in_flight + self._pending:
+            future.cancel()
+        self._in_flight = []
+        self._pending.clear()
+        if self._executor is not None:
+            # Wait for a forward pass still running in a thread of the default
+            # executor, so the event loop keeps serving meanwhile
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    async def __aenter__(self) -> "MicroBatcher":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def predict(self, values: Sequence[float]) -> List[float]:
+        """Outputs of the model for one input row, computed in the next batch"""
+        if self._task is None:
+            raise RuntimeError("MicroBatcher is not running; use start() or 'async with'")
+        if self.n_inputs is not None and len(values) != self.n_inputs:
+            raise ValueError(f"Expected {self.n_inputs} inputs, got {len(values)}")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        start = loop.time()
+        self._pending.append((values, future, start))
+        self._schedule(loop)
+        outputs = await future
+        self.stats.record(loop.time() - start)
+        return outputs
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Wake the batching task now if a batch is full, otherwise when the
+        # oldest waiting row is due
+        if len(self._pending) >= self.max_batch_size:
+            self._ready.set()
+        elif self._pending and self._timer is None and not self._ready.is_set():
+            due = self._pending[0][2] + self.max_wait
+            self._timer = loop.call_at(due, self._ready.set)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            self._schedule(loop)
+            if batch:
+                # Kept until resolved, so `stop` can cancel a batch mid-forward
+                self._in_flight = batch
+                await self._flush(loop, batch)
+                self._in_flight = []
+
+    def _forward(self, rows: List[Sequence[float]]) -> List[Tuple[Optional[List[float]], Optional[Exception]]]:
+        """(outputs, None) or (None, error) per row; one bad row only fails itself"""
+        try:
+            return [(list(output), None) for output in self.model.forward_batch(rows)]
+        except Exception as e:
+            if len(rows) == 1:
+                return [(None, e)]
+        # Models only need forward_batch (see `as_model`)
+        forward_values = getattr(self.model, "forward_values", None) or (lambda row: self.model.forward_batch([row])[0])
+        results = []
+        for row in rows:
+            try:
+                results.append((list(forward_values(row)), None))
+            except Exception as e:
+                results.append((None, e))
+        return results
+
+    async def _flush(self, loop: asyncio.AbstractEventLoop, batch) -> None:
+        rows = [values for values, _, _ in batch]
+        start = time.perf_counter()
+        results = await loop.run_in_executor(self._executor, self._forward, rows)
+        self.stats.record_batch(len(batch), time.perf_counter() - start)
+        for (_, future, _), (output, error) in zip(batch, results):
+            # A caller may have given up (cancelled) while the batch ran
+            if future.done():
+                continue
+            if error is not None:
+                self.stats.errors += 1
+                future.set_exception(error)
+            else:
+                future.set_result(output)
+
+
+def _response(status: int, payload: dict, keep_alive: bool) -> bytes:
+    body = json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+class InferenceServer:
+    """
+    HTTP front end of a `MicroBatcher`.
+
+    Args:
+        model: Anything accepted by `as_model`
+        host: Interface to listen on
+        port: TCP port; 0 picks a free one (see `address`)
+        path: Listen on this Unix socket instead of TCP
+        max_batch_size: See `MicroBatcher`
+        max_wait: See `MicroBatcher`
+    """
+
+    def __init__(
+        self,
+        model,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        path: Optional[str] = None,
+        max_batch_size: int = 64,
+        max_wait: float = 0.002,
+    ):
+        self.batcher = MicroBatcher(model, max_batch_size, max_wait)
+        self.host, self.port, self.path = host, port, path
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def stats(self) -> LatencyStats:
+        return self.batcher.stats
+
+    @property
+    def address(self) -> Union[str, Tuple[str, int]]:
+        """The Unix socket path, or the bound (host, port)"""
+        return self._server.sockets[0].getsockname()
+
+    async def start(self) -> None:
+        await self.batcher.start()
+        if self.path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self.batcher.stop()
+
+    async def __aenter__(self) -> "InferenceServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def serve_forever(self) -> None:
+        async with self:
+            await self._server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    writer.write(_response(400, {"error": "malformed request"}, False))
+                    break
+                if length > MAX_BODY_BYTES:
+                    writer.write(_response(413, {"error": f"body larger than {MAX_BODY_BYTES} bytes"}, False))
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._route(method, target, body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, target: str, body: bytes) -> Tuple[int, dict]:
+        routes = {"/predict": "POST", "/stats": "GET", "/health": "GET"}
+        path = target.split("?", 1)[0]
+        if path not in routes:
+            return 404, {"error": f"no route {path}"}
+        if method != routes[path]:
+            return 405, {"error": f"use {routes[path]} for {path}"}
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/stats":
+            return 200, self.stats.snapshot()
+        try:
+            inputs = json.loads(body)["inputs"]
+            if inputs and isinstance(inputs[0], list):
+                outputs = await asyncio.gather(*(self.batcher.predict([float(x) for x in row]) for row in inputs))
+            else:
+                outputs = await self.batcher.predict([float(x) for x in inputs])
+        except (ValueError, TypeError, KeyError, IndexError) as e:
+            return 400, {"error": str(e) or type(e).__name__}
+        except Exception as e:
+            # Anything else the model raised (OverflowError, ...) still gets a response
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+        return 200, {"outputs": outputs}
+
+
+async def request(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, target: str, payload=None
+) -> Tuple[int, dict]:
+    """
+    Send one request over an open keep-alive connection to an `InferenceServer`.
+
+    Returns:
+        (status, payload): The HTTP status and the decoded JSON response
+    """
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(
+        f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+def main() -> None:
+    import argparse
+
+    from .serialization import load_network
+
+    parser = argparse.ArgumentParser(description="Serve a saved network over HTTP with micro-batching")
+    parser.add_argument("model", help="File written by serialization.save_network")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--unix", help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    server = InferenceServer(
+        load_network(args.model), args.host, args.port, args.unix, args.max_batch_size, args.max_wait_ms / 1000
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@
 from typing import Callable, Generic, Iterable, Tuple, TypeVar
 
 import fundamentals.operators as operators
+from fundamentals.ml_data_structures import ActivationFunction
 
 A = TypeVar("A")
 
@@ -212,3 +213,13 @@ class MathTestVariable(MathTest):
     @staticmethod
     def complex(a):
         return (((a * 10 + 7).relu() * 6 + 5).relu() * 10).sigmoid().log() / 50
+
+
+class Linear(ActivationFunction):
+    "Identity activation, so layer tests and benchmarks do not depend on ReLU / Sigmoid"
+
+    def __call__(self, x: float) -> float:
+        return x
+
+    def derivative(self, x: float) -> float:
+        return 1.0
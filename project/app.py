@@ -0,0 +1,267 @@
+"""
+Dashboard for the Beta-Binomial detection models of `bayesian-statistics/`.
+
+    streamlit run project/app.py
+
+Load a detection table (the exoplanet example, a CSV upload or synthetic
+records), pick a Beta prior and compare the methods' posteriors. Every
+expensive step sits behind `st.cache_data`, keyed on its inputs:
+
+* loading and aggregating the data,
+* the closed-form posteriors, densities and P(best) of each prior,
+* hierarchical fits, which also go through the on-disk `TraceCache`.
+
+The prior sliders live in a fragment, so moving them reruns only the
+closed-form section (milliseconds), never `pm.sample`. MCMC runs only when the
+fit form is submitted.
+"""
+
+import io
+import os
+import sys
+
+import altair as alt
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bayesian-statistics"))
+
+from beta_binomial_model import ALPHA_PRIOR, BETA_PRIOR, DETECTION_DATA  # noqa: E402
+from conjugate import BetaPosterior, BetaPrior  # noqa: E402
+
+HDI_PROB = 0.95
+DENSITY_POINTS = 400
+MAX_DENSITY_METHODS = 12
+
+# Fragments (Streamlit >= 1.37) rerun alone when their widgets change
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda f: f)
+
+
+@st.cache_data(show_spinner=False)
+def example_data() -> pd.DataFrame:
+    return pd.DataFrame(DETECTION_DATA)[["method", "attempts", "successes"]]
+
+
+@st.cache_data(show_spinner=False)
+def csv_columns(content: bytes) -> list:
+    return list(pd.read_csv(io.BytesIO(content), nrows=0).columns)
+
+
+@st.cache_data(show_spinner="Loading data...")
+def csv_data(content: bytes, label: str, attempts: str, successes: str) -> pd.DataFrame:
+    """Counts summed per label, in order of first appearance"""
+    df = pd.read_csv(io.BytesIO(content), usecols=[label, attempts, successes])
+    df = df.groupby(label, sort=False)[[attempts, successes]].sum().reset_index()
+    df.columns = ["method", "attempts", "successes"]
+    df["method"] = df["method"].astype(str)
+    return df
+
+
+@st.cache_data(show_spinner="Generating records...")
+def synthetic_data(n_records: int, n_groups: int, mean: float, concentration: float, seed: int) -> pd.DataFrame:
+    """Synthetic records summed per group, with the true rate of every group"""
+    from synthetic import GroundTruth, SyntheticDetections, aggregate
+
+    data = SyntheticDetections(n_groups, GroundTruth(mean, concentration), seed)
+    attempts, successes = aggregate(data.chunks(n_records), n_groups)
+    df = pd.DataFrame({
+        "method": [f"group {i}" for i in range(n_groups)],
+        "attempts": attempts,
+        "successes": successes,
+        "true_rate": data.rates,
+    })
+    return df[df["attempts"] > 0].reset_index(drop=True)
+
+
+@st.cache_data(show_spinner=False)
+def conjugate_summary(df: pd.DataFrame, alpha: float, beta: float) -> pd.DataFrame:
+    posterior = BetaPosterior.from_counts(df["attempts"], df["successes"], BetaPrior(alpha, beta))
+    summary = pd.DataFrame(posterior.summary(HDI_PROB))
+    summary.insert(0, "method", df["method"].to_numpy())
+    summary["observed_rate"] = df["successes"].to_numpy() / df["attempts"].to_numpy()
+    return summary
+
+
+@st.cache_data(show_spinner=False)
+def conjugate_densities(df: pd.DataFrame, alpha: float, beta: float, methods: tuple) -> pd.DataFrame:
+    """Prior and posterior densities of `methods` on a grid, long format"""
+    rows = df[df["method"].isin(methods)]
+    posterior = BetaPosterior.from_counts(rows["attempts"], rows["successes"], BetaPrior(alpha, beta))
+    x = np.linspace(0.0, 1.0, DENSITY_POINTS)[1:-1]
+    density = posterior.pdf(x[:, None])
+    prior = BetaPosterior(np.array([alpha]), np.array([beta])).pdf(x[:, None])
+    curves = np.column_stack([prior, density])
+    names = ["prior"] + list(rows["method"])
+    return pd.DataFrame({
+        "method": np.repeat(names, x.size),
+        "rate": np.tile(x, len(names)),
+        "density": curves.T.ravel(),
+    })
+
+
+@st.cache_data(show_spinner=False)
+def probability_best(df: pd.DataFrame, alpha: float, beta: float, draws: int = 4000, seed: int = 0) -> np.ndarray:
+    """Share of joint posterior draws in which each method has the highest rate"""
+    posterior = BetaPosterior.from_counts(df["attempts"], df["successes"], BetaPrior(alpha, beta))
+    rng = np.random.default_rng(seed)
+    best = np.concatenate([
+        np.argmax(posterior.sample(min(500, draws - start), rng), axis=1) for start in range(0, draws, 500)
+    ])
+    return np.bincount(best, minlength=len(df)) / draws
+
+
+@st.cache_data(show_spinner="Fitting the hierarchical model...", max_entries=16)
+def hierarchical_fit(
+    df: pd.DataFrame, fit_mode: str, parameterization: str, draws: int, tune: int, chains: int
+) -> dict:
+    """
+    Posterior summary and binned densities of the method rates under the
+    hierarchical model; seeded NUTS fits are also cached on disk.
+    """
+    from beta_binomial_model import fit_hierarchical
+    from report import binned_kde, hdi
+    from trace_cache import TraceCache
+
+    cache = TraceCache() if fit_mode == "nuts" else None
+    settings = dict(draws=draws, random_seed=42)
+    if fit_mode == "nuts":
+        settings.update(tune=tune, chains=chains, cores=1, progressbar=False)
+    _, trace, results = fit_hierarchical(df, cache, fit_mode, parameterization, **settings)
+    draws_by_method = trace.posterior["method_probabilities"].values.reshape(-1, len(df))
+
+    summary = pd.DataFrame({
+        "method": df["method"].to_numpy(),
+        "mean": [results[m]["mean"] for m in df["method"]],
+        "std": [results[m]["std"] for m in df["method"]],
+    })
+    bounds = np.array([hdi(draws_by_method[:, i], HDI_PROB) for i in range(len(df))])
+    summary["hdi_lower"], summary["hdi_upper"] = bounds[:, 0], bounds[:, 1]
+    curves = []
+    for i, method in enumerate(df["method"][:MAX_DENSITY_METHODS]):
+        x, y = binned_kde(draws_by_method[:, i], grid=128)
+        curves.append(pd.DataFrame({"method": method, "rate": x, "density": y}))
+    population = trace.posterior["population_mean"].values
+    return {
+        "summary": summary,
+        "densities": pd.concat(curves, ignore_index=True),
+        "population_mean": float(population.mean()),
+    }
+
+
+def density_chart(densities: pd.DataFrame, title: str) -> alt.Chart:
+    return alt.Chart(densities, title=title).mark_line().encode(
+        x=alt.X("rate:Q", title="Detection probability"),
+        y=alt.Y("density:Q", title="Density"),
+        color=alt.Color("method:N", title=None),
+        strokeDash=alt.condition(alt.datum.method == "prior", alt.value([4, 4]), alt.value([1, 0])),
+    )
+
+
+def interval_chart(summary: pd.DataFrame, title: str) -> alt.Chart:
+    """Posterior means with HDI bars, and the observed rates where known"""
+    base = alt.Chart(summary, title=title).encode(y=alt.Y("method:N", sort=None, title=None))
+    bars = base.mark_rule(strokeWidth=3).encode(
+        x=alt.X("hdi_lower:Q", title=f"Detection probability ({HDI_PROB:.0%} HDI)"), x2="hdi_upper:Q"
+    )
+    chart = bars + base.mark_point(filled=True, size=60).encode(x="mean:Q", tooltip=list(summary.columns))
+    if "observed_rate" in summary:
+        chart += base.mark_tick(color="darkred", thickness=2).encode(x="observed_rate:Q")
+    return chart
+
+
+def load_dataset():
+    """Dataset picked in the sidebar, or None while a CSV is incomplete"""
+    source = st.sidebar.radio("Dataset", ["Exoplanet example", "Upload CSV", "Synthetic"])
+    if source == "Exoplanet example":
+        return example_data()
+    if source == "Synthetic":
+        n_records = st.sidebar.select_slider("Records", [10**3, 10**4, 10**5, 10**6, 10**7], value=10**5)
+        n_groups = st.sidebar.number_input("Groups", 2, 10_000, 20)
+        mean = st.sidebar.slider("True population mean", 0.01, 0.99, 0.3)
+        concentration = st.sidebar.slider("True concentration", 1.0, 200.0, 10.0)
+        seed = st.sidebar.number_input("Seed", 0, 2**31 - 1, 0)
+        return synthetic_data(n_records, int(n_groups), mean, concentration, int(seed))
+
+    upload = st.sidebar.file_uploader("CSV with a label, attempts and successes column", type="csv")
+    if upload is None:
+        return None
+    content = upload.getvalue()
+    columns = csv_columns(content)
+    if len(columns) < 3:
+        st.error("The CSV needs at least three columns")
+        return None
+    label = st.sidebar.selectbox("Label column", columns, index=0)
+    attempts = st.sidebar.selectbox("Attempts column", columns, index=min(1, len(columns) - 1))
+    successes = st.sidebar.selectbox("Successes column", columns, index=min(2, len(columns) - 1))
+    try:
+        return csv_data(content, label, attempts, successes)
+    except (ValueError, KeyError) as e:
+        st.error(f"Could not read the counts: {e}")
+        return None
+
+
+@fragment
+def conjugate_section(df: pd.DataFrame) -> None:
+    st.subheader("Closed-form posteriors")
+    left, right = st.columns(2)
+    alpha = left.slider("Prior alpha", 0.1, 50.0, float(ALPHA_PRIOR), 0.1)
+    beta = right.slider("Prior beta", 0.1, 50.0, float(BETA_PRIOR), 0.1)
+    methods = st.multiselect(
+        "Methods to plot", list(df["method"]), default=list(df["method"][:MAX_DENSITY_METHODS])
+    )
+
+    summary = conjugate_summary(df, alpha, beta)
+    summary["p_best"] = probability_best(df, alpha, beta)
+    if "true_rate" in df:
+        summary["true_rate"] = df["true_rate"].to_numpy()
+    left, right = st.columns(2)
+    left.altair_chart(
+        density_chart(conjugate_densities(df, alpha, beta, tuple(methods)), "Prior and posterior densities"),
+        use_container_width=True,
+    )
+    right.altair_chart(
+        interval_chart(summary[summary["method"].isin(methods)], "Method comparison"), use_container_width=True
+    )
+    st.dataframe(summary, hide_index=True, use_container_width=True)
+
+
+def hierarchical_section(df: pd.DataFrame) -> None:
+    from fit_modes import FIT_MODES
+    from models import PARAMETERIZATIONS
+
+    st.subheader("Hierarchical model")
+    with st.form("fit"):
+        columns = st.columns(5)
+        fit_mode = columns[0].selectbox("Fit mode", FIT_MODES)
+        parameterization = columns[1].selectbox("Parameterization", PARAMETERIZATIONS)
+        draws = columns[2].number_input("Draws", 100, 20_000, 1000, step=100)
+        tune = columns[3].number_input("Tune", 100, 20_000, 1000, step=100)
+        chains = columns[4].number_input("Chains", 1, 8, 2)
+        if st.form_submit_button("Fit"):
+            st.session_state["fit_settings"] = (fit_mode, parameterization, int(draws), int(tune), int(chains))
+
+    if "fit_settings" not in st.session_state:
+        st.caption("Submit the form to fit; results are cached per dataset and settings.")
+        return
+    fit = hierarchical_fit(df[["method", "attempts", "successes"]], *st.session_state["fit_settings"])
+    st.metric("Population mean", f"{fit['population_mean']:.3f}")
+    left, right = st.columns(2)
+    left.altair_chart(density_chart(fit["densities"], "Posterior densities"), use_container_width=True)
+    right.altair_chart(interval_chart(fit["summary"], "Method comparison"), use_container_width=True)
+
+
+def main() -> None:
+    st.set_page_config(page_title="Detection rates", layout="wide")
+    st.title("Exoplanet detection rates")
+    df = load_dataset()
+    if df is None:
+        st.info("Upload a CSV to start.")
+        return
+    st.caption(f"{len(df)} methods, {int(df['attempts'].sum()):,} attempts, {int(df['successes'].sum()):,} successes")
+    conjugate_section(df)
+    hierarchical_section(df)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# The Bayesian statistics modules live in a script directory rather than a
+# package; make them importable as top-level modules.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "bayesian-statistics"))
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "scaling: checks that run time and memory grow linearly (deselect with '-m \"not scaling\"')"
+    )
@@ -0,0 +1,96 @@
+"""
+Helpers for empirical complexity tests.
+
+`measure_growth` runs an operation at geometrically growing input sizes and
+records the best wall time and the peak traced allocation of each run.
+`fit_exponent` fits `cost ~ c * n^k` by least squares in log-log space, so a
+linear operation has `k` close to 1 and an accidental O(n^2) one close to 2.
+"""
+
+import gc
+import math
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, List, Sequence
+
+
+@dataclass
+class Growth:
+    sizes: List[int]
+    seconds: List[float]
+    peak_bytes: List[int]
+
+    @property
+    def time_exponent(self) -> float:
+        return fit_exponent(self.sizes, self.seconds)
+
+    @property
+    def memory_exponent(self) -> float:
+        return fit_exponent(self.sizes, self.peak_bytes)
+
+
+def geometric_sizes(start: int, factor: int, count: int) -> List[int]:
+    "Sizes start, start * factor, start * factor^2, ..."
+    return [start * factor ** i for i in range(count)]
+
+
+def fit_exponent(sizes: Sequence[int], costs: Sequence[float]) -> float:
+    "Least-squares slope of log(cost) against log(size)"
+    # A run that allocates nothing (or finishes below timer resolution) still
+    # needs a finite logarithm
+    xs = [math.log(n) for n in sizes]
+    ys = [math.log(max(c, 1e-12)) for c in costs]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    sxx = sum((x - mx) ** 2 for x in xs)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sxx
+
+
+def measure_growth(
+    fn: Callable[[Any], Any],
+    make_input: Callable[[int], Any],
+    sizes: Sequence[int],
+    repeat: int = 3,
+) -> Growth:
+    """
+    Measure `fn(make_input(n))` for every `n` in `sizes`.
+
+    Time is the best of `repeat` runs without tracing; peak memory is measured
+    in a separate traced run and excludes the input itself.
+    """
+    seconds, peaks = [], []
+    for n in sizes:
+        data = make_input(n)
+        best = float("inf")
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            fn(data)
+            best = min(best, time.perf_counter() - start)
+        seconds.append(best)
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            result = fn(data)
+            peaks.append(max(tracemalloc.get_traced_memory()[1] - base, 1))
+            del result
+        finally:
+            tracemalloc.stop()
+    return Growth(list(sizes), seconds, peaks)
+
+
+def assert_at_most(growth: Growth, time_exponent: float, memory_exponent: float) -> None:
+    "Fail with the measured table if either fitted exponent is too large"
+    table = "\n".join(
+        f"  n={n:>8}  {t * 1e3:9.3f} ms  {m:>10} B"
+        for n, t, m in zip(growth.sizes, growth.seconds, growth.peak_bytes)
+    )
+    assert growth.time_exponent <= time_exponent, (
+        f"time grows as n^{growth.time_exponent:.2f} (limit n^{time_exponent})\n{table}"
+    )
+    assert growth.memory_exponent <= memory_exponent, (
+        f"peak memory grows as n^{growth.memory_exponent:.2f} (limit n^{memory_exponent})\n{table}"
+    )
@@ -2,12 +2,14 @@
 # Credit (initial version): Sasha Rush - MiniTorch
 #
 import os
+import random
 import sys
 
 from hypothesis import settings
-from hypothesis.strategies import floats, integers
+from hypothesis.strategies import builds, floats, integers
 
 import fundamentals
+from fundamentals.testing import Linear  # noqa: F401
 
 settings.register_profile("ci", deadline=None)
 settings.load_profile("ci")
@@ -17,6 +19,19 @@ small_ints = integers(min_value=1, max_value=3)
 small_floats = floats(min_value=-100, max_value=100, allow_nan=False)
 med_ints = integers(min_value=1, max_value=20)
 
+# Production-sized inputs, for tests that should not only see toy sizes.
+# Hypothesis cannot draw lists this long element by element, so large lists are
+# built from a drawn length and seed instead.
+large_ints = integers(min_value=1_000, max_value=100_000)
+
+
+def _seeded_floats(n: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [rng.uniform(-100, 100) for _ in range(n)]
+
+
+large_float_lists = builds(_seeded_floats, large_ints, integers(min_value=0, max_value=2 ** 32 - 1))
+
 
 def assert_close(a: float, b: float) -> None:
     assert fundamentals.operators.is_close(a, b), "Failure x=%f y=%f" % (a, b)
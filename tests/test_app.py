@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("altair")
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+APP = os.path.join(os.path.dirname(__file__), "..", "project", "app.py")
+
+
+def test_prior_change_reruns_closed_form_only():
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    assert not at.exception
+    assert at.slider[0].label == "Prior alpha"
+    at.slider[0].set_value(10.0).run()
+    assert not at.exception
+    # No fit form was submitted, so nothing was sampled
+    assert "fit_settings" not in at.session_state
+
+
+def test_synthetic_dataset_loads():
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    at.sidebar.radio[0].set_value("Synthetic").run()
+    assert not at.exception
+    assert "methods" in at.caption[0].value
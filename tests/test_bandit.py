@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+special = pytest.importorskip("scipy.special")
+
+from bandit import POLICIES, BetaBandit, simulate  # noqa: E402
+from conjugate import BetaPosterior, BetaPrior  # noqa: E402
+
+
+def test_from_counts_matches_conjugate_posterior():
+    bandit = BetaBandit.from_counts([1000, 800, 200], [450, 320, 25], BetaPrior(2, 3))
+    expected = BetaPosterior.from_counts([1000, 800, 200], [450, 320, 25], BetaPrior(2, 3))
+    np.testing.assert_array_equal(bandit.posterior.alpha, expected.alpha)
+    np.testing.assert_array_equal(bandit.posterior.beta, expected.beta)
+    assert bandit.pulls == 2000
+
+
+def test_update_adds_repeated_arms():
+    bandit = BetaBandit(3)
+    bandit.update([0, 0, 2], [1, 0, 3], attempts=[1, 1, 5])
+    np.testing.assert_array_equal(bandit.alpha, [2, 1, 4])
+    np.testing.assert_array_equal(bandit.beta, [2, 1, 3])
+    with pytest.raises(ValueError):
+        bandit.update([1], [2], attempts=[1])
+
+
+@pytest.mark.parametrize("policy", POLICIES)
+def test_allocation_favours_the_best_arm(policy):
+    bandit = BetaBandit.from_counts([500, 500, 500], [50, 250, 100], policy=policy, random_seed=0)
+    plan = bandit.allocate(1000)
+    assert plan.sum() == 1000
+    assert plan.argmax() == 1
+
+
+def test_top_two_plays_the_challenger():
+    # Arm 0 always leads, so every challenger is arm 1
+    bandit = BetaBandit.from_counts([10**6, 10], [9 * 10**5, 1], policy="top_two", top_two_prob=0.25, random_seed=0)
+    plan = bandit.allocate(4000)
+    assert plan[1] / plan.sum() == pytest.approx(0.75, abs=0.03)
+
+
+def test_ucb_only_refreshes_updated_arms():
+    bandit = BetaBandit.from_counts([100, 100, 100, 100], [10, 20, 30, 40], policy="ucb")
+    bandit.upper_bounds()
+    bandit.update([1], [1])
+    level = 1.0 - 2.0 ** -bandit._ucb_epoch
+    assert bandit._stale.tolist() == [False, True, False, False]
+    np.testing.assert_allclose(bandit.upper_bounds(), special.betaincinv(bandit.alpha, bandit.beta, level))
+
+
+def test_thousands_of_arms_in_one_draw():
+    bandit = BetaBandit(100_000, random_seed=0)
+    assert bandit.choose().shape == (1,)
+    assert bandit.choose(50).shape == (50,)
+
+
+def test_simulation_is_seeded_and_learns():
+    rates = np.array([0.1, 0.2, 0.8])
+    first = simulate(rates, "thompson", horizon=300, random_seed=3, record_every=100)
+    second = simulate(rates, "thompson", horizon=300, random_seed=3, record_every=100)
+    np.testing.assert_array_equal(first["regret"], second["regret"])
+    assert first["step"].tolist() == [100, 200, 300]
+    # Uniform play would lose (0.8 - 0.367) per attempt
+    assert first["regret"].iloc[-1] < 0.2 * 300
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("pymc")
+
+from batch import EXAMPLE_DATA, RESULT_COLUMNS, make_tasks, run_batch, split_cores  # noqa: E402
+
+SETTINGS = dict(draws=100, tune=100, chains=2, progress=None)
+
+
+def test_split_cores():
+    assert split_cores(64, 1) == 64
+    assert split_cores(64, 2) == 32
+    assert split_cores(3, 4) == 1
+    with pytest.raises(ValueError):
+        split_cores(8, 0)
+
+
+def test_seeds_depend_only_on_base_seed_and_order():
+    df = pd.DataFrame(EXAMPLE_DATA)
+    seeds = [t.seed for t in make_tasks(df, ["method"], seed=1)]
+    assert seeds == [t.seed for t in make_tasks(df, ["method"], seed=1)]
+    assert len(set(seeds)) == len(seeds)
+    assert seeds != [t.seed for t in make_tasks(df, ["method"], seed=2)]
+
+
+def test_pool_matches_in_process():
+    df = pd.DataFrame(EXAMPLE_DATA)
+    seen = []
+    serial = run_batch(df, workers=1, **{**SETTINGS, "progress": lambda done, total, row: seen.append(done)})
+    pooled = run_batch(df, workers=2, **SETTINGS)
+    assert seen == [1, 2, 3, 4]
+    assert list(serial.columns) == ["method", *RESULT_COLUMNS]
+    assert serial["method"].tolist() == EXAMPLE_DATA["method"]
+    assert serial["error"].isna().all()
+    pd.testing.assert_series_equal(serial["mean"], pooled["mean"])
+    assert serial["mean"].tolist() == pytest.approx([0.45, 0.40, 0.125, 0.12], abs=0.03)
+
+
+def test_errors_are_reported_per_row():
+    df = pd.DataFrame({"method": ["ok", "bad"], "attempts": [10, 10], "successes": [3, 11]})
+    summary = run_batch(df, workers=1, **SETTINGS)
+    assert summary["error"].isna().tolist() == [True, False]
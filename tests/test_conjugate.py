@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+stats = pytest.importorskip("scipy.stats")
+
+from conjugate import BetaPosterior, BetaPrior, SampledPosterior, posterior  # noqa: E402
+
+ATTEMPTS = [1000, 800, 200, 150]
+SUCCESSES = [450, 320, 25, 18]
+
+
+class TestBetaPosterior:
+    def test_update(self):
+        post = posterior(ATTEMPTS, SUCCESSES, BetaPrior(2, 3))
+        assert post.alpha.tolist() == [452, 322, 27, 20]
+        assert post.beta.tolist() == [553, 483, 178, 135]
+        assert post.mean[0] == pytest.approx(452 / 1005)
+        assert post.var[0] == pytest.approx(452 * 553 / (1005 ** 2 * 1006))
+
+    def test_invalid_counts(self):
+        with pytest.raises(ValueError):
+            posterior([10], [11])
+        with pytest.raises(ValueError):
+            BetaPrior(0, 1)
+
+    def test_hdi_matches_samples(self):
+        post = BetaPosterior.from_counts(ATTEMPTS, SUCCESSES, BetaPrior(2, 3))
+        lower, upper = post.hdi(0.9)
+        draws = SampledPosterior(post.sample(200_000, rng=np.random.default_rng(0)))
+        s_lower, s_upper = draws.hdi(0.9)
+        assert np.allclose(lower, s_lower, atol=2e-3)
+        assert np.allclose(upper, s_upper, atol=2e-3)
+        # Same mass as the equal-tailed interval, but never wider
+        e_lower, e_upper = post.interval(0.9)
+        assert np.all(upper - lower <= e_upper - e_lower + 1e-12)
+        mass = stats.beta.cdf(upper, post.alpha, post.beta) - stats.beta.cdf(lower, post.alpha, post.beta)
+        assert np.allclose(mass, 0.9)
+
+    def test_hdi_monotone_density(self):
+        # Beta(1, 5) is decreasing, so the HDI starts at 0
+        lower, upper = BetaPosterior(np.array([1.0]), np.array([5.0])).hdi(0.9)
+        assert lower[0] == pytest.approx(0.0, abs=1e-6)
+        assert upper[0] == pytest.approx(1 - 0.1 ** (1 / 5), abs=1e-6)
+
+    def test_predictive(self):
+        post = posterior(ATTEMPTS, SUCCESSES, BetaPrior(2, 3))
+        pred = post.predictive(100)
+        assert np.allclose(pred.mean, 100 * post.mean)
+        assert np.allclose(pred.var, pred.dist.var())
+        assert np.allclose(pred.pmf(np.arange(101)[:, None]).sum(axis=0), 1.0)
+
+    def test_vectorized_many_arms(self):
+        rng = np.random.default_rng(1)
+        attempts = rng.integers(1, 1000, 10_000)
+        successes = rng.binomial(attempts, 0.3)
+        summary = posterior(attempts, successes).summary()
+        assert summary["mean"].shape == (10_000,)
+        assert np.all(summary["hdi_lower"] <= summary["mean"])
+        assert np.all(summary["mean"] <= summary["hdi_upper"])
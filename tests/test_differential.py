@@ -0,0 +1,50 @@
+import numpy as np
+
+from fundamentals import MathTest, MathTestVariable
+from fundamentals.differential import NUMPY, SCALAR, ArrayTensor, Backend, differential_test, format_results
+
+
+class BrokenRelu(MathTestVariable):
+    @staticmethod
+    def relu(x):
+        return x + 5.5
+
+
+class TestArrayTensor:
+    def test_comparisons_are_floats(self):
+        t = ArrayTensor([1.0, 2.0, 3.0])
+        assert (t < 2.0).data.tolist() == [1.0, 0.0, 0.0]
+        assert (t == 2.0).data.tolist() == [0.0, 1.0, 0.0]
+
+    def test_sigmoid_is_stable(self):
+        with np.errstate(over="raise"):
+            out = ArrayTensor([-1000.0, 0.0, 1000.0]).sigmoid().data
+        assert out.tolist() == [0.0, 0.5, 1.0]
+
+    def test_reductions(self):
+        t = ArrayTensor([[1.0, 2.0], [3.0, 4.0]])
+        assert t.sum(0).data.tolist() == [4.0, 6.0]
+        assert t.mean().data == 2.5
+
+
+class TestDifferential:
+    def test_self_consistent(self):
+        results = differential_test(NUMPY, NUMPY, points=1000)
+        one, two, red = MathTest._tests()
+        assert [r.name for r in results] == [name for name, _ in one + two + red]
+        assert all(r.ok() for r in results)
+        assert all(r.candidate_rate > 0 for r in results)
+
+    def test_detects_broken_backend(self):
+        broken = Backend("broken", BrokenRelu, wrap=ArrayTensor, unwrap=lambda t: t.data)
+        results = {r.name: r for r in differential_test(broken, points=1000)}
+        assert not results["relu"].ok()
+        assert results["relu"].max_abs_error > 0
+        assert results["neg"].ok()
+        assert "FAIL" in format_results(list(results.values()))
+
+    def test_scalar_backend(self):
+        results = {r.name: r for r in differential_test(SCALAR, NUMPY, points=200)}
+        # These only use python arithmetic, not the operators module
+        for name in ("neg", "square", "add2", "div2"):
+            assert results[name].ok()
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip("pymc")
+
+from conjugate import BetaPosterior, BetaPrior  # noqa: E402
+from fit_modes import compare_fit_modes, fit, posterior_moments  # noqa: E402
+from models import beta_binomial_model, hierarchical_model  # noqa: E402
+
+ATTEMPTS = [1000, 800, 200, 150]
+SUCCESSES = [450, 320, 25, 18]
+
+
+@pytest.mark.parametrize("mode", ["laplace", "advi"])
+def test_close_to_closed_form(mode):
+    exact = BetaPosterior.from_counts(ATTEMPTS, SUCCESSES, BetaPrior(2, 3))
+    trace = fit(beta_binomial_model(ATTEMPTS, SUCCESSES, 2, 3), mode, draws=4000, random_seed=1, tune=500, chains=2)
+    mean, std = posterior_moments(trace, ["detection_probability"])["detection_probability"]
+    assert mean == pytest.approx(exact.mean, abs=0.01)
+    assert std == pytest.approx(exact.std, rel=0.25)
+
+
+def test_laplace_keeps_dims_and_deterministics():
+    trace = fit(hierarchical_model(ATTEMPTS, SUCCESSES, groups=list("wxyz")), "laplace", draws=100, random_seed=0)
+    probabilities = trace.posterior["method_probabilities"]
+    assert probabilities.dims == ("chain", "draw", "group")
+    assert list(probabilities["group"].values) == list("wxyz")
+    assert ((probabilities > 0) & (probabilities < 1)).all()
+    assert "population_concentration" in trace.posterior
+
+
+def test_unknown_mode_and_arguments():
+    model = beta_binomial_model(ATTEMPTS, SUCCESSES)
+    with pytest.raises(ValueError, match="Unknown fit mode"):
+        fit(model, "gibbs")
+    with pytest.raises(TypeError, match="step_size"):
+        fit(model, "laplace", step_size=0.1)
+
+
+def test_report_against_reference():
+    exact = BetaPosterior.from_counts(ATTEMPTS, SUCCESSES, BetaPrior())
+    report = compare_fit_modes(
+        lambda: beta_binomial_model(ATTEMPTS, SUCCESSES),
+        ["detection_probability"],
+        reference={"detection_probability": (exact.mean, exact.std)},
+        modes=["laplace"],
+        draws=1000,
+    )
+    assert report["mode"].tolist() == ["laplace"]
+    assert report["speedup"].isna().all()
+    assert report["max_mean_error"].iloc[0] < 0.01
@@ -0,0 +1,71 @@
+import math
+
+import numpy as np
+
+from fundamentals.gradcheck import check_backward, check_mathtest, format_results, vectorize
+
+
+def scalar_relu(x: float) -> float:
+    return x if x > 0 else 0.0
+
+
+def scalar_relu_back(x: float, d: float) -> float:
+    return d if x > 0 else 0.0
+
+
+class TestVectorize:
+    def test_array_function(self):
+        assert vectorize(np.exp)(np.zeros(3)).tolist() == [1.0, 1.0, 1.0]
+
+    def test_scalar_fallback(self):
+        out = vectorize(scalar_relu)(np.array([-1.0, 2.0]))
+        assert out.dtype == np.float64
+        assert out.tolist() == [0.0, 2.0]
+
+
+class TestCheckBackward:
+    def test_correct_kernel(self):
+        x = np.random.default_rng(0).uniform(0.1, 100.0, 10_000)
+        result = check_backward("log_back", np.log, lambda x, d: d / x, x)
+        assert result.ok
+        assert result.checked == x.size
+
+    def test_wrong_kernel(self):
+        x = np.random.default_rng(0).uniform(0.1, 100.0, 1_000)
+        result = check_backward("log_back", np.log, lambda x, d: d / (x + 1.0), x)
+        assert not result.ok
+        assert result.failures > 0
+        assert "FAIL" in format_results([result])
+
+    def test_scalar_kernel_and_kink(self):
+        x = np.array([-3.0, -1.0, 0.0, 1.0, 3.0])
+        result = check_backward("relu_back", scalar_relu, scalar_relu_back, x)
+        assert result.ok
+        assert result.skipped == 1
+
+        result = check_backward("log_back", math.log, lambda x, d: d / x, np.array([0.5, 2.0]))
+        assert result.ok
+
+    def test_error_is_reported(self):
+        def unimplemented(x, d):
+            raise NotImplementedError("not yet")
+
+        result = check_backward("inv_back", np.reciprocal, unimplemented, np.array([1.0]))
+        assert not result.ok
+        assert "not yet" in result.error
+
+
+class TestCheckMathTest:
+    def test_numpy_backend(self):
+        results = check_mathtest(x=np.random.default_rng(1).uniform(-100.0, 100.0, 20_000))
+        names = [r.name for r in results]
+        assert "complex" in names and "explog" in names
+        assert all(r.ok for r in results), format_results(results)
+
+    def test_custom_gradient(self):
+        def wrong(name, x):
+            return np.zeros_like(x)
+
+        results = {r.name: r for r in check_mathtest(x=np.linspace(-1.0, 1.0, 101), gradient=wrong)}
+        assert not results["square"].ok
+        assert results["subConstant"].failures == 101
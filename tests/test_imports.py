@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import fundamentals
+
+ROOT = os.path.join(os.path.dirname(__file__), os.pardir)
+
+# Cumulative `import fundamentals` time reported by `python -X importtime`.
+# The package imports nothing on its own (about 2.5 ms, mostly finding it on
+# sys.path); eagerly importing `testing` and `typing` took about 20 ms.
+IMPORT_BUDGET_US = 10_000
+
+
+def _import_time_us(module: str) -> int:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"; anything
+        # else on stderr (warnings, site customization) is skipped
+        fields = line.rsplit("|", 2)
+        if len(fields) == 3 and fields[2].strip() == module and fields[1].strip().isdigit():
+            return int(fields[1])
+    raise AssertionError(f"{module} not in the -X importtime output")
+
+
+def test_import_time_budget():
+    # Best of three, so a busy machine does not fail the test
+    cost = min(_import_time_us("fundamentals") for _ in range(3))
+    assert cost <= IMPORT_BUDGET_US, f"import fundamentals took {cost} us (budget {IMPORT_BUDGET_US} us)"
+
+
+def test_import_loads_no_submodules():
+    code = "import sys, fundamentals; print(sorted(m for m in sys.modules if m.startswith('fundamentals.')))"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert proc.stdout.strip() == "[]"
+
+
+def test_public_names_resolve_lazily():
+    from fundamentals import MathTest, MathTestVariable, operators
+    from fundamentals.testing import MathTest as direct
+
+    assert MathTest is direct and issubclass(MathTestVariable, MathTest)
+    assert operators is fundamentals.testing.operators
+    assert fundamentals.packed.PackedLayer.__name__ == "PackedLayer"
+    assert {"MathTest", "operators", "serving"} <= set(dir(fundamentals))
+    with pytest.raises(AttributeError, match="missing"):
+        fundamentals.missing
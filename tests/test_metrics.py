@@ -0,0 +1,87 @@
+from collections import namedtuple
+
+import pytest
+
+import metrics
+
+Draw = namedtuple("Draw", ["chain", "is_last", "draw_idx", "tuning", "stats", "point"])
+
+
+def test_phase_timer_splits_tuning_and_draws(monkeypatch):
+    clock = iter([10.0, 12.0, 12.5, 13.5, 14.0, 16.0])
+    monkeypatch.setattr(metrics.time, "perf_counter", lambda: next(clock))
+    seen = []
+    timer = metrics.PhaseTimer(lambda trace, draw: seen.append(draw.draw_idx))
+    for i, tuning in enumerate([True, True, True, False, False]):
+        timer(None, Draw(0, False, i, tuning, {}, {}))
+    assert timer.compile_seconds == 2.0
+    assert timer.tune_seconds == 1.5
+    assert timer.draw_seconds == 2.5
+    assert seen == [0, 1, 2, 3, 4]
+
+
+def test_rank_models_orders_by_cost():
+    records = [
+        {"label": "cheap", "total_seconds": 2.0, "min_ess_bulk": 2000.0, "min_ess_bulk_per_second": 1000.0},
+        {"label": "slow", "total_seconds": 20.0, "min_ess_bulk": 1000.0, "min_ess_bulk_per_second": 50.0},
+        {"label": "cheap", "total_seconds": 4.0, "min_ess_bulk": 2000.0, "min_ess_bulk_per_second": 500.0},
+    ]
+    for r in records:
+        r.update(compile_seconds=1.0, tune_seconds=0.5, draw_seconds=0.5, divergences=1,
+                 treedepth_saturation=0.0, max_r_hat=1.0, variables={})
+    report = metrics.rank_models(records)
+    assert report.index.tolist() == ["slow", "cheap"]
+    assert report.loc["cheap", "fits"] == 2
+    assert report.loc["cheap", "seconds_per_effective_draw"] == pytest.approx(0.0015)
+    assert report.loc["cheap", "divergences"] == 2
+
+
+def test_sample_appends_one_record_per_fit(tmp_path, monkeypatch):
+    pytest.importorskip("pymc")
+    from models import beta_binomial_model
+
+    log = tmp_path / "metrics.jsonl"
+    monkeypatch.setenv(metrics.METRICS_ENV, str(log))
+    model = beta_binomial_model([100, 50], [30, 10])
+    for seed in (1, 2):
+        metrics.sample(200, model=model, tune=200, chains=2, cores=1, random_seed=seed, progressbar=False)
+
+    records = metrics.load_records(str(log))
+    assert len(records) == 2
+    record = records[0]
+    assert record["label"] == "detection_probability"
+    assert (record["chains"], record["draws"], record["tune"]) == (2, 200, 200)
+    phases = sum(record[k] for k in ("compile_seconds", "tune_seconds", "draw_seconds", "postprocess_seconds"))
+    assert phases == pytest.approx(record["total_seconds"], rel=0.05)
+    variable = record["variables"]["detection_probability"]
+    assert variable["ess_bulk"] == record["min_ess_bulk"] > 0
+    assert variable["ess_bulk_per_second"] == pytest.approx(variable["ess_bulk"] / record["total_seconds"])
+    assert record["gradient_evaluations"] > 0
+    assert record["max_r_hat"] == variable["r_hat"] > 0
+
+
+def test_disabled_without_log(tmp_path, monkeypatch):
+    pytest.importorskip("pymc")
+    from models import beta_binomial_model
+
+    monkeypatch.delenv(metrics.METRICS_ENV, raising=False)
+    monkeypatch.chdir(tmp_path)
+    metrics.sample(50, model=beta_binomial_model([10], [3]), tune=50, chains=1, cores=1, random_seed=0, progressbar=False)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_conjugate_fallback_is_recorded(tmp_path, monkeypatch):
+    pm = pytest.importorskip("pymc")
+    from conjugate import sample_posterior
+
+    log = tmp_path / "metrics.jsonl"
+    monkeypatch.setenv(metrics.METRICS_ENV, str(log))
+    sample_posterior(
+        [100, 50], [30, 10], lambda k: pm.math.invlogit(pm.Normal("logit_p", 0, 1.5, shape=k)),
+        draws=100, tune=100, chains=1, cores=1,
+    )
+    (record,) = metrics.load_records(str(log))
+    assert "logit_p" in record["variables"]
+    # One chain has no r-hat
+    assert record["variables"]["logit_p"]["r_hat"] is None
+    assert record["max_r_hat"] is None
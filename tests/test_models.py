@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+pm = pytest.importorskip("pymc")
+
+from models import ReusableModel, beta_binomial_model, group_index, hierarchical_model, set_counts  # noqa: E402
+
+ATTEMPTS = [1000, 800, 200, 150]
+SUCCESSES = [450, 320, 25, 18]
+
+
+def test_group_index_keeps_first_appearance_order():
+    codes, names = group_index(["b", "a", "b", "c"], 4)
+    assert codes.tolist() == [0, 1, 0, 2]
+    assert names.tolist() == ["b", "a", "c"]
+
+
+def test_single_observed_node():
+    model = hierarchical_model(ATTEMPTS, SUCCESSES, groups=["w", "x", "y", "z"])
+    assert [rv.name for rv in model.observed_RVs] == ["detections"]
+    assert list(model.coords["group"]) == ["w", "x", "y", "z"]
+    assert len(model.free_RVs) == 3
+
+
+def test_matches_loop_logp():
+    point = {
+        "population_mean_logodds__": np.array(-0.5),
+        "population_concentration_log__": np.array(2.0),
+        "method_probabilities_logodds__": np.array([-0.2, -0.4, -2.0, -2.1]),
+    }
+    vectorized = hierarchical_model(ATTEMPTS, SUCCESSES)
+    with pm.Model() as loop:
+        mu = pm.Beta("population_mean", alpha=1, beta=1)
+        kappa = pm.Exponential("population_concentration", lam=0.1)
+        p = pm.Beta("method_probabilities", alpha=mu * kappa, beta=(1 - mu) * kappa, shape=4)
+        for i in range(4):
+            pm.Binomial(f"detections_{i}", n=ATTEMPTS[i], p=p[i], observed=SUCCESSES[i])
+    assert vectorized.compile_logp()(point) == pytest.approx(loop.compile_logp()(point))
+
+
+def test_non_centered_model():
+    model = hierarchical_model(ATTEMPTS, SUCCESSES, groups=["w", "x", "y", "z"], parameterization="non_centered")
+    assert [rv.name for rv in model.free_RVs] == ["population_logit_mean", "population_logit_sd", "method_offsets"]
+    assert [rv.name for rv in model.observed_RVs] == ["detections"]
+    point = model.initial_point()
+    point["method_offsets"] = np.array([1.0, 0.0, -1.0, 0.0])
+    point["population_logit_sd_log__"] = np.log(0.5)
+    [probabilities] = [v for v in model.unobserved_value_vars if v.name == "method_probabilities"]
+    p = model.compile_fn(probabilities, inputs=model.value_vars, on_unused_input="ignore")(point)
+    expected = 1.0 / (1.0 + np.exp(-0.5 * point["method_offsets"]))
+    np.testing.assert_allclose(p, expected)
+    with pytest.raises(ValueError, match="parameterization"):
+        hierarchical_model(ATTEMPTS, SUCCESSES, parameterization="funnel")
+
+
+def test_invalid_shapes():
+    with pytest.raises(ValueError):
+        hierarchical_model([10, 20], [1])
+    with pytest.raises(ValueError):
+        hierarchical_model([10, 20], [1, 2], groups=["a"])
+
+
+SAMPLE = dict(draws=100, tune=100, chains=1, cores=1, random_seed=1, progressbar=False, compute_convergence_checks=False)
+
+
+def test_set_counts_changes_logp_without_rebuild():
+    model = beta_binomial_model(ATTEMPTS, SUCCESSES, alpha_prior=2, beta_prior=3)
+    logp = model.compile_logp()
+    point = model.initial_point()
+    before = logp(point)
+    set_counts(model, ATTEMPTS, [400, 300, 30, 20])
+    assert logp(point) != before
+    with pytest.raises(ValueError):
+        set_counts(model, ATTEMPTS, SUCCESSES, groups=["a"] * 4)
+
+
+def test_set_counts_regroups_hierarchical_model():
+    model = hierarchical_model(ATTEMPTS, SUCCESSES, groups=["a", "b", "c", "d"])
+    set_counts(model, [10, 20, 30], [1, 2, 3], groups=["x", "y", "x"])
+    assert model["group_idx"].get_value().tolist() == [0, 1, 0]
+    assert list(model.coords["group"]) == ["x", "y"]
+
+
+def test_set_counts_regroups_non_centered_model():
+    model = hierarchical_model(ATTEMPTS, SUCCESSES, parameterization="non_centered")
+    set_counts(model, [10, 20, 30], [1, 2, 3], groups=["x", "y", "x"])
+    assert model.initial_point()["method_offsets"].shape == (2,)
+
+
+class TestReusableModel:
+    def test_compiles_once_per_shape(self):
+        fitter = ReusableModel(beta_binomial_model, alpha_prior=2, beta_prior=3)
+        first = fitter.fit([100], [80], **SAMPLE)
+        second = fitter.fit([100], [20], **SAMPLE)
+        assert fitter.compiles == 1
+        # The second fit sees the new data through the shared containers
+        assert float(first.posterior["detection_probability"].mean()) > 0.7
+        assert float(second.posterior["detection_probability"].mean()) < 0.3
+        fitter.fit([100, 50], [20, 10], **SAMPLE)
+        assert fitter.compiles == 2
+
+    def test_step_kwargs_configure_sampler(self):
+        fitter = ReusableModel(hierarchical_model)
+        fitter.fit(ATTEMPTS, SUCCESSES, target_accept=0.95, **SAMPLE)
+        model, step = fitter.prepare(ATTEMPTS, SUCCESSES, target_accept=0.95)
+        assert fitter.compiles == 1
+        assert step.target_accept == 0.95
+
+    def test_evicts_least_recently_used(self):
+        fitter = ReusableModel(beta_binomial_model, max_models=1)
+        fitter.prepare([10], [1])
+        fitter.prepare([10, 10], [1, 1])
+        fitter.prepare([10], [2])
+        assert fitter.compiles == 3
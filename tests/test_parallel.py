@@ -0,0 +1,119 @@
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from fundamentals.ml_data_structures import Dataset, Layer, Neuron, Vector
+from fundamentals.packed import PackedLayer
+from fundamentals.parallel import parallel_map
+
+from .strategies import Linear
+
+
+def row_sum(v: Vector) -> float:
+    return float(sum(v.values))
+
+
+def double(v: Vector) -> Vector:
+    return Vector([2.0 * x for x in v.values])
+
+
+def fail_on_row_zero(v: Vector) -> float:
+    if v.values[0] == 0.0:
+        raise ValueError("bad row")
+    return 0.0
+
+
+def fail_on_row_seven(v: Vector) -> float:
+    if v.values[0] == 7.0:
+        raise ValueError("bad row")
+    return 0.0
+
+
+def crash_on_row_seven(v: Vector) -> float:
+    if v.values[0] == 7.0:
+        os._exit(1)
+    return 0.0
+
+
+def fail_on_row_two_crash_on_row_seven(v: Vector) -> float:
+    if v.values[0] == 2.0:
+        raise ValueError("bad row")
+    return crash_on_row_seven(v)
+
+
+class CrashOnceOnRowSeven:
+    """Kills its worker on row 7 the first time; every row returns (pid, start, end)"""
+
+    def __init__(self, marker: str):
+        self.marker = marker
+
+    def __call__(self, v: Vector):
+        if v.values[0] == 7.0 and not os.path.exists(self.marker):
+            open(self.marker, "w").close()
+            os._exit(1)
+        start = time.time()
+        time.sleep(0.02)
+        return [float(os.getpid()), start, time.time()]
+
+
+def make_dataset(n=50):
+    return Dataset([Vector([float(i), float(i) / 2]) for i in range(n)], [float(i % 2) for i in range(n)], "rows")
+
+
+class TestParallelMap:
+    def test_ordering(self):
+        dataset = make_dataset()
+        result = dataset.parallel_map(double, workers=3, chunk_size=4)
+        assert [v.values for v in result.features] == [[2.0 * i, float(i)] for i in range(50)]
+        assert result.labels == dataset.labels
+        assert result.name == "rows"
+
+    def test_scalar_outputs(self):
+        result = parallel_map(make_dataset(10), row_sum, workers=2)
+        assert [v.values for v in result.features] == [[1.5 * i] for i in range(10)]
+
+    def test_layer_transform(self):
+        layer = PackedLayer.from_layer(Layer([Neuron(Vector([1.0, 1.0]), 1.0, Linear())]))
+        result = parallel_map(make_dataset(8), layer.forward, workers=2)
+        assert [v.values for v in result.features] == [[1.5 * i + 1.0] for i in range(8)]
+
+    def test_small_datasets(self):
+        assert parallel_map(make_dataset(0), double).features == []
+        assert parallel_map(make_dataset(1), double).features[0].values == [0.0, 0.0]
+
+    def test_worker_exception(self):
+        with pytest.raises(RuntimeError) as info:
+            parallel_map(make_dataset(20), fail_on_row_seven, workers=2, chunk_size=5)
+        assert isinstance(info.value.__cause__, ValueError)
+
+    def test_worker_crash(self):
+        with pytest.raises(RuntimeError):
+            parallel_map(make_dataset(20), crash_on_row_seven, workers=2, chunk_size=5)
+
+    def test_worker_crash_names_the_chunk(self):
+        # Chunks are rows 1-5, 6-10, 11-15 and 16-19; only 6-10 kills its worker
+        with pytest.raises(RuntimeError, match="rows 6-10") as info:
+            parallel_map(make_dataset(20), crash_on_row_seven, workers=2, chunk_size=5, max_retries=0)
+        assert isinstance(info.value.__cause__, BrokenProcessPool)
+
+    def test_exception_and_crash(self):
+        with pytest.raises(RuntimeError):
+            parallel_map(make_dataset(20), fail_on_row_two_crash_on_row_seven, workers=2, chunk_size=5, max_retries=2)
+
+    def test_first_row_error_is_wrapped(self):
+        with pytest.raises(RuntimeError, match="rows 0-0") as info:
+            parallel_map(make_dataset(20), fail_on_row_zero, workers=2)
+        assert isinstance(info.value.__cause__, ValueError)
+
+    def test_parallel_again_after_a_crash(self, tmp_path):
+        marker = str(tmp_path / "crashed")
+        result = parallel_map(make_dataset(40), CrashOnceOnRowSeven(marker), workers=2, chunk_size=2)
+        crashed = os.path.getmtime(marker)
+        rows = [v.values for v in result.features if v.values[1] > crashed]
+        # Chunks that ran after the crash still overlap in time in different workers
+        assert any(
+            a[0] != b[0] and a[1] < b[2] and b[1] < a[2] for i, a in enumerate(rows) for b in rows[i + 1:]
+        )
+
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from fundamentals.ml_data_structures import Layer, Neuron, Vector
+from fundamentals.precision import PRECISIONS, QuantizedLayer, format_report, precision_report, quantize_network
+
+from .strategies import Linear
+
+
+def random_layer(n_inputs, n_neurons, seed=0):
+    rng = random.Random(seed)
+    return Layer([
+        Neuron(Vector([rng.uniform(-1, 1) for _ in range(n_inputs)]), rng.uniform(-1, 1), Linear())
+        for _ in range(n_neurons)
+    ])
+
+
+class TestQuantizedLayer:
+    @pytest.mark.parametrize("precision,tol", [
+        ("float64", 1e-12), ("float32", 1e-5), ("float16", 1e-2), ("int8", 5e-2),
+    ])
+    def test_forward_close_to_reference(self, precision, tol):
+        layer = random_layer(16, 8)
+        inputs = Vector([random.Random(1).uniform(-1, 1) for _ in range(16)])
+        expected = QuantizedLayer.from_layer(layer, "float64").forward(inputs).values
+        got = QuantizedLayer.from_layer(layer, precision).forward(inputs).values
+        for want, have in zip(expected, got):
+            assert abs(want - have) < tol
+
+    def test_int8_codes(self):
+        layer = Layer([Neuron(Vector([0.5, -1.0, 0.25]), 0.0, Linear())])
+        quantized = QuantizedLayer.from_layer(layer, "int8")
+        assert list(quantized.weights) == [64, -127, 32]
+        assert quantized.scales[0] == 1.0 / 127.0
+
+    def test_invalid_precision(self):
+        with pytest.raises(ValueError):
+            QuantizedLayer.from_layer(random_layer(2, 2), "bfloat16")
+
+    @pytest.mark.parametrize("change", [
+        {"weights": b"\x00" * 6},
+        {"biases": [0.0]},
+        {"scales": None},
+    ])
+    def test_inconsistent_buffers(self, change):
+        layer = QuantizedLayer.from_layer(random_layer(2, 2), "int8")
+        fields = dict(vars(layer))
+        fields.pop("_row_f16")
+        if "weights" in change:
+            fields["precision"] = "float16"
+        fields.update(change)
+        with pytest.raises(ValueError):
+            QuantizedLayer(**fields)
+
+    def test_requantize(self):
+        layer = random_layer(16, 8)
+        float32 = QuantizedLayer.from_layer(layer, "float32")
+        int8 = QuantizedLayer.from_layer(float32, "int8")
+        direct = QuantizedLayer.from_layer(layer, "int8")
+        assert int8.precision == "int8"
+        # float32 rounding can only move a code across a rounding boundary
+        assert all(abs(a - b) <= 1 for a, b in zip(int8.weights, direct.weights))
+        assert quantize_network(quantize_network([layer], "float16"), "int8")[0].precision == "int8"
+
+    def test_memory(self):
+        layer = random_layer(64, 32)
+        sizes = {p: QuantizedLayer.from_layer(layer, p).nbytes for p in PRECISIONS}
+        assert sizes["float64"] > sizes["float32"] > sizes["float16"] > sizes["int8"]
+
+
+class TestPrecisionReport:
+    def test_report(self):
+        layers = [random_layer(8, 4, seed=0), random_layer(4, 2, seed=1)]
+        inputs = [[random.Random(i).uniform(-1, 1) for _ in range(8)] for i in range(5)]
+        report = precision_report(layers, inputs)
+
+        assert list(report) == list(PRECISIONS)
+        assert report["float64"]["max_abs_error"] == 0.0
+        assert report["float64"]["compression"] == 1.0
+        assert report["int8"]["max_abs_error"] >= report["float32"]["max_abs_error"]
+        assert "int8" in format_report(report)
+
+    def test_quantize_network(self):
+        network = quantize_network([random_layer(3, 2)], "float16")
+        assert network[0].precision == "float16"
+        assert len(network.forward(Vector([1.0, 2.0, 3.0])).values) == 2
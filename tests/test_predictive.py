@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy.stats")
+
+from conjugate import BetaPosterior, BetaPrior  # noqa: E402
+from predictive import predictive_summary  # noqa: E402
+
+ATTEMPTS = np.array([1000, 800, 200, 150])
+SUCCESSES = np.array([450, 320, 25, 18])
+
+
+@pytest.fixture(scope="module")
+def posterior():
+    return BetaPosterior.from_counts(ATTEMPTS, SUCCESSES, BetaPrior(2, 3))
+
+
+@pytest.fixture(scope="module")
+def draws(posterior):
+    return posterior.sample(200_000, rng=np.random.default_rng(0))
+
+
+def test_draws_match_beta_binomial_moments(posterior, draws):
+    exact = predictive_summary(posterior, ATTEMPTS, observed=SUCCESSES)
+    estimate = predictive_summary(draws, ATTEMPTS, observed=SUCCESSES)
+    np.testing.assert_allclose(estimate["mean"], exact["mean"], rtol=1e-3)
+    np.testing.assert_allclose(estimate["std"], exact["std"], rtol=1e-2)
+    np.testing.assert_allclose(estimate["p_value"], exact["p_value"], atol=5e-3)
+
+
+def test_sampling_agrees_with_analytical(draws):
+    analytical = predictive_summary(draws, ATTEMPTS, observed=SUCCESSES)
+    sampled = predictive_summary(draws, ATTEMPTS, observed=SUCCESSES, method="sample", random_seed=1)
+    np.testing.assert_allclose(sampled["mean"], analytical["mean"], rtol=5e-3)
+    np.testing.assert_allclose(sampled["std"], analytical["std"], rtol=2e-2)
+    np.testing.assert_allclose(sampled["p_value"], analytical["p_value"], atol=1e-2)
+
+
+@pytest.mark.parametrize("method", ["analytical", "sample"])
+def test_memory_cap_does_not_change_results(draws, method):
+    full = predictive_summary(draws[:1000], ATTEMPTS, SUCCESSES, method=method, random_seed=2)
+    # 100 bytes: one draw per block
+    capped = predictive_summary(draws[:1000], ATTEMPTS, SUCCESSES, method=method, max_bytes=100, random_seed=2)
+    for key in full:
+        np.testing.assert_allclose(capped[key], full[key], rtol=1e-12)
+
+
+def test_invalid_inputs(posterior, draws):
+    with pytest.raises(ValueError, match="Unknown method"):
+        predictive_summary(draws, ATTEMPTS, method="mcmc")
+    with pytest.raises(ValueError, match="one attempts value per group"):
+        predictive_summary(draws, ATTEMPTS[:2])
+    with pytest.raises(ValueError, match="posterior draws"):
+        predictive_summary(posterior, ATTEMPTS, method="sample")
@@ -0,0 +1,82 @@
+import gc
+import json
+
+import pytest
+
+from fundamentals import operators, profiling
+from fundamentals.ml_data_structures import Layer, Neuron, Vector
+
+from .strategies import Linear
+
+
+class Helper:
+    @staticmethod
+    def inner(n):
+        return [0] * n
+
+    def outer(self, n):
+        return sum(len(Helper.inner(n)) for _ in range(3))
+
+
+HELPER_TARGETS = ["tests.test_profiling:Helper.*"]
+
+
+def test_disabled_leaves_originals_in_place():
+    originals = (operators.mul, Vector.__dict__["dot"], Layer.__dict__["forward"])
+    with profiling.profile():
+        assert operators.mul is not originals[0]
+        assert Vector.__dict__["dot"] is not originals[1]
+    assert (operators.mul, Vector.__dict__["dot"], Layer.__dict__["forward"]) == originals
+    assert not profiling.is_enabled()
+
+
+def test_counts_and_own_time():
+    with profiling.profile(HELPER_TARGETS) as profiler:
+        assert Helper().outer(10) == 30
+    rows = {r["name"]: r for r in profiler.rows()}
+    assert rows["test_profiling.Helper.outer"]["calls"] == 1
+    assert rows["test_profiling.Helper.inner"]["calls"] == 3
+    outer, inner = rows["test_profiling.Helper.outer"], rows["test_profiling.Helper.inner"]
+    assert outer["own"] == pytest.approx(outer["total"] - inner["total"], abs=1e-6)
+    assert profiler.rows()[0]["name"] == "test_profiling.Helper.outer"
+    assert "test_profiling.Helper.inner" in profiler.report()
+
+
+def test_default_targets_see_layer_and_operator_calls():
+    layer = Layer([Neuron(Vector([1.0, 2.0]), 0.0, Linear())])
+    with profiling.profile() as profiler:
+        layer.forward(Vector([1.0, 1.0]))
+        Vector([1.0]).dot(Vector([2.0]))
+        with pytest.raises(NotImplementedError):
+            operators.mul(2.0, 3.0)
+    calls = {r["name"]: r["calls"] for r in profiler.rows()}
+    assert calls["ml_data_structures.Layer.forward"] == 1
+    assert calls["ml_data_structures.Vector.dot"] == 1
+    assert calls["operators.mul"] == 1
+
+
+def test_memory_and_chrome_trace(tmp_path):
+    # The bytes are net of frees during the call; a garbage collection there
+    # could release unrelated objects, so collect first and keep it off
+    gc.collect()
+    gc.disable()
+    try:
+        with profiling.profile(HELPER_TARGETS, memory=True, trace=True) as profiler:
+            kept = Helper.inner(100_000)
+    finally:
+        gc.enable()
+    rows = {r["name"]: r for r in profiler.rows("bytes")}
+    assert rows["test_profiling.Helper.inner"]["bytes"] >= 8 * len(kept)
+
+    path = tmp_path / "trace.json"
+    profiler.export_chrome_trace(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    assert [e["name"] for e in events] == ["test_profiling.Helper.inner"]
+    assert events[0]["ph"] == "X" and events[0]["dur"] > 0
+
+
+def test_enable_twice_fails():
+    with profiling.profile(HELPER_TARGETS):
+        with pytest.raises(RuntimeError):
+            profiling.enable(HELPER_TARGETS)
+    assert profiling.disable() is None
@@ -0,0 +1,64 @@
+import pytest
+
+from fundamentals.ml_data_structures import Layer, Neuron, Vector
+from fundamentals.packed import PackedLayer
+from fundamentals.pruning import SparseLayer, prune_layer, prune_neuron
+
+from .strategies import Linear
+
+
+def make_layer():
+    return Layer([
+        Neuron(Vector([0.1, -2.0, 0.3, 4.0]), 0.5, Linear()),
+        Neuron(Vector([-1.0, 0.05, 2.0, 0.0]), -0.25, Linear()),
+    ])
+
+
+class TestPruneNeuron:
+    def test_keeps_largest(self):
+        neuron = prune_neuron(Neuron(Vector([0.1, -2.0, 0.3, 4.0]), 0.5, Linear()), 0.5)
+        assert list(neuron.indices) == [1, 3]
+        assert list(neuron.values) == [-2.0, 4.0]
+        assert neuron.sparsity == 0.5
+        assert neuron.to_neuron().weights.values == [0.0, -2.0, 0.0, 4.0]
+
+    def test_forward(self):
+        neuron = prune_neuron(Neuron(Vector([0.1, -2.0, 0.3, 4.0]), 0.5, Linear()), 0.5)
+        # -2 * 2 + 4 * 4 + 0.5
+        assert neuron.forward(Vector([1.0, 2.0, 3.0, 4.0])) == 12.5
+        with pytest.raises(ValueError):
+            neuron.forward(Vector([1.0]))
+
+    def test_invalid_sparsity(self):
+        with pytest.raises(ValueError):
+            prune_neuron(Neuron(Vector([1.0]), 0.0, Linear()), 1.5)
+
+
+class TestPruneLayer:
+    def test_zero_sparsity_matches_dense(self):
+        layer = make_layer()
+        x = Vector([1.0, 2.0, 3.0, 4.0])
+        dense = PackedLayer.from_layer(layer).forward(x).values
+        sparse = prune_layer(layer, 0.0)
+        # The explicit zero weight is never stored
+        assert sparse.nnz == 7
+        assert sparse.forward(x).values == pytest.approx(dense)
+
+    def test_layer_wide_ranking(self):
+        sparse = prune_layer(make_layer(), 0.5)
+        assert sparse.nnz == 4
+        assert sparse.sparsity == 0.5
+        assert list(sparse.indptr) == [0, 2, 4]
+        assert [n.weights.values for n in sparse.to_layer().neurons] == [
+            [0.0, -2.0, 0.0, 4.0], [-1.0, 0.0, 2.0, 0.0],
+        ]
+
+    def test_per_neuron(self):
+        sparse = SparseLayer.from_layer(make_layer(), 0.75, per_neuron=True)
+        assert list(sparse.indptr) == [0, 1, 2]
+        assert sparse.forward(Vector([1.0, 1.0, 1.0, 1.0])).values == [4.5, 1.75]
+
+    def test_fully_pruned(self):
+        sparse = prune_layer(make_layer(), 1.0)
+        assert sparse.nnz == 0
+        assert sparse.forward(Vector([1.0, 1.0, 1.0, 1.0])).values == [0.5, -0.25]
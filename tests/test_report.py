@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+pytest.importorskip("arviz")
+import arviz as az  # noqa: E402
+
+import report  # noqa: E402
+
+
+def _trace(draws=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return az.from_dict(
+        posterior={"mu": rng.normal(1.0, 2.0, (2, draws)), "theta": rng.beta(2, 5, (2, draws, 3))},
+        dims={"theta": ["group"]},
+        coords={"group": ["a", "b", "c"]},
+    )
+
+
+def test_binned_kde_matches_normal_density():
+    samples = np.random.default_rng(1).normal(0.0, 1.0, 200_000)
+    x, y = report.binned_kde(samples)
+    assert np.sum(y) * (x[1] - x[0]) == pytest.approx(1.0, abs=1e-3)
+    assert y[np.argmin(np.abs(x))] == pytest.approx(1 / np.sqrt(2 * np.pi), rel=0.02)
+
+
+def test_hdi_and_thin():
+    samples = np.random.default_rng(2).normal(0.0, 1.0, 400_000)
+    lo, hi = report.hdi(samples, 0.94)
+    assert (lo, hi) == pytest.approx((-1.881, 1.881), abs=0.05)
+    index, thinned = report.thin(np.zeros((2, 10_001)), max_points=1000)
+    assert thinned.shape == (2, index.size) and index.size <= 1000
+
+
+def test_specs_are_small_and_element_wise():
+    trace = _trace(draws=50_000)
+    spec = report.trace_figure("t", trace, ["mu", "theta"], "Trace", max_points=500)
+    assert [row["label"] for row in spec.data["rows"]] == ["mu", "theta\na", "theta\nb", "theta\nc"]
+    assert all(row["draws"].shape == (2, 500) for row in spec.data["rows"])
+    forest = report.forest_figure("f", trace, "theta", "Forest", labels=["A", "B", "C"])
+    assert [row["label"] for row in forest.data["rows"]] == ["A", "B", "C"]
+
+
+def test_build_report_skips_unchanged_figures(tmp_path):
+    trace = _trace()
+    specs = [
+        report.posterior_figure("posterior", trace, ["mu"], "Posterior"),
+        report.axes_figure("line", [("plot", ([0, 1], [0, 1]), {"label": "y = x"})], title="Line"),
+    ]
+    paths = report.build_report(specs, str(tmp_path), workers=1)
+    assert [os.path.basename(p) for p in paths] == ["posterior.png", "line.png"]
+    mtimes = [os.stat(p).st_mtime_ns for p in paths]
+
+    specs[1] = report.axes_figure("line", [("plot", ([0, 1], [1, 0]), {"label": "y = 1 - x"})], title="Line")
+    assert report.build_report(specs, str(tmp_path), workers=1) == paths
+    assert os.stat(paths[0]).st_mtime_ns == mtimes[0]
+    assert os.stat(paths[1]).st_mtime_ns != mtimes[1]
+
+    os.remove(paths[0])
+    report.build_report(specs, str(tmp_path), workers=1)
+    assert os.path.exists(paths[0])
+
+
+def test_build_report_in_process_pool(tmp_path):
+    specs = [
+        report.axes_figure(f"line_{i}", [("plot", ([0, 1], [0, i]), {"label": str(i)})], title=str(i))
+        for i in range(3)
+    ]
+    paths = report.build_report(specs, str(tmp_path), workers=2)
+    assert all(os.path.getsize(p) > 0 for p in paths)
+
+
+def test_build_report_keeps_the_callers_backend(tmp_path):
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    previous = matplotlib.get_backend()
+    matplotlib.use("svg")
+    try:
+        spec = report.axes_figure("line", [("plot", ([0, 1], [0, 1]), {})], title="Line")
+        report.build_report([spec], str(tmp_path), workers=1)
+        assert matplotlib.get_backend() == "svg"
+        assert plt.get_fignums() == []
+    finally:
+        matplotlib.use(previous)
+
+
+def test_no_legend_without_labels(tmp_path, recwarn):
+    spec = report.axes_figure("bars", [("bar", ([0, 1], [2, 3]), {})], title="Bars")
+    report.build_report([spec], str(tmp_path), workers=1)
+    assert not [w for w in recwarn if "No artists with labels" in str(w.message)]
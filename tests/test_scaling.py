@@ -0,0 +1,122 @@
+import math
+import random
+from typing import List
+
+import pytest
+from hypothesis import given, settings
+
+from fundamentals.ml_data_structures import Dataset, Layer, Neuron, Vector
+from fundamentals.operators import addLists, prod, sum
+
+from .scaling import assert_at_most, fit_exponent, geometric_sizes, measure_growth
+from .strategies import Linear, large_float_lists
+
+# 4096 ... 65536 elements
+SIZES = geometric_sizes(2 ** 12, 2, 5)
+
+# A linear operation fits an exponent close to 1.0; allow for timer noise but
+# not for anything close to quadratic.
+LINEAR = 1.3
+
+
+def float_list(n: int) -> List[float]:
+    rng = random.Random(n)
+    return [rng.uniform(-100, 100) for _ in range(n)]
+
+
+def near_one_list(n: int) -> List[float]:
+    rng = random.Random(n)
+    return [1.0 + rng.uniform(-1e-6, 1e-6) for _ in range(n)]
+
+
+def quadratic_concat(ls: List[float]) -> List[float]:
+    out: List[float] = []
+    for x in ls:
+        out = out + [x]
+    return out
+
+
+class TestScalingHarness:
+    def test_fit_exponent(self):
+        sizes = geometric_sizes(10, 2, 6)
+        assert abs(fit_exponent(sizes, [3.0 * n for n in sizes]) - 1.0) < 1e-9
+        assert abs(fit_exponent(sizes, [n * n for n in sizes]) - 2.0) < 1e-9
+        assert abs(fit_exponent(sizes, [5.0 for _ in sizes])) < 1e-9
+
+    def test_detects_quadratic(self):
+        sizes = geometric_sizes(256, 2, 5)
+        linear = measure_growth(math.fsum, float_list, sizes)
+        quadratic = measure_growth(quadratic_concat, float_list, sizes)
+        assert linear.time_exponent < LINEAR
+        assert quadratic.time_exponent > 1.5
+        with pytest.raises(AssertionError):
+            assert_at_most(quadratic, LINEAR, LINEAR)
+
+
+@pytest.mark.scaling
+def test_sum_scaling() -> None:
+    assert_at_most(measure_growth(sum, float_list, SIZES), LINEAR, LINEAR)
+
+
+@pytest.mark.scaling
+def test_prod_scaling() -> None:
+    assert_at_most(measure_growth(prod, near_one_list, SIZES), LINEAR, LINEAR)
+
+
+@pytest.mark.scaling
+def test_addLists_scaling() -> None:
+    growth = measure_growth(
+        lambda pair: list(addLists(*pair)), lambda n: (float_list(n), float_list(n + 1)[:n]), SIZES
+    )
+    assert_at_most(growth, LINEAR, LINEAR)
+
+
+# A stub that returns None in constant time would fit an exponent of 0, so
+# every test below first checks the result at the smallest size.
+
+
+@pytest.mark.scaling
+def test_dot_scaling() -> None:
+    def make_input(n: int):
+        return Vector(float_list(n)), Vector(near_one_list(n))
+
+    a, b = make_input(SIZES[0])
+    assert a.dot(b) == pytest.approx(math.fsum(x * y for x, y in zip(a.values, b.values)))
+    growth = measure_growth(lambda pair: pair[0].dot(pair[1]), make_input, SIZES)
+    assert_at_most(growth, LINEAR, LINEAR)
+
+
+@pytest.mark.scaling
+def test_layer_forward_scaling() -> None:
+    "Forward cost should be linear in the number of neurons for a fixed input size"
+    def make_input(n: int):
+        weights = Vector(near_one_list(16))
+        layer = Layer([Neuron(weights, 0.0, Linear()) for _ in range(n // 16)])
+        return layer, Vector(float_list(16))
+
+    layer, x = make_input(SIZES[0])
+    expected = math.fsum(w * v for w, v in zip(near_one_list(16), x.values))
+    assert layer.forward(x).values == pytest.approx([expected] * (SIZES[0] // 16))
+    growth = measure_growth(lambda pair: pair[0].forward(pair[1]), make_input, SIZES)
+    assert_at_most(growth, LINEAR, LINEAR)
+
+
+@pytest.mark.scaling
+def test_split_scaling() -> None:
+    def make_input(n: int) -> Dataset:
+        return Dataset([Vector([float(i)]) for i in range(n)], [0.0] * n, "scaling")
+
+    dataset = make_input(SIZES[0])
+    train, test = dataset.split(0.8)
+    assert abs(len(train.features) - 0.8 * SIZES[0]) <= 1
+    assert train.features + test.features == dataset.features
+    assert train.labels + test.labels == dataset.labels
+    growth = measure_growth(lambda dataset: dataset.split(0.8), make_input, SIZES)
+    assert_at_most(growth, LINEAR, LINEAR)
+
+
+@pytest.mark.scaling
+@settings(max_examples=10)
+@given(large_float_lists)
+def test_sum_large(ls: List[float]) -> None:
+    assert abs(sum(ls) - math.fsum(ls)) < 1e-6 * len(ls)
@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("scipy.stats")
+
+import beta_binomial_model  # noqa: E402
+import intro_to_pymc  # noqa: E402
+
+SCRIPTS = os.path.join(os.path.dirname(__file__), os.pardir, "bayesian-statistics")
+
+
+def test_closed_form_results():
+    results = beta_binomial_model.run(mcmc=False, verbose=False)
+    conjugate = results["conjugate"]
+    assert (conjugate["alpha_posterior"], conjugate["beta_posterior"]) == (452, 553)
+    assert conjugate["hdi_95"][0] < conjugate["mean"] < conjugate["hdi_95"][1]
+    assert set(conjugate["all_methods"]) == set(beta_binomial_model.DETECTION_DATA["method"])
+    assert intro_to_pymc.run(mcmc=False, verbose=False)["analytical"]["alpha"] == 17
+
+
+@pytest.mark.parametrize("script", ["beta_binomial_model.py", "intro_to_pymc.py"])
+def test_numbers_only_run_skips_heavy_imports(script, tmp_path):
+    out = tmp_path / "results.json"
+    # Report which heavy modules the run imported
+    code = (
+        "import runpy, sys; "
+        f"sys.argv = [{script!r}, '--no-mcmc', '--no-plots', '--json', {str(out)!r}]; "
+        f"runpy.run_path({script!r}, run_name='__main__'); "
+        "print(sorted(m for m in ('pymc', 'arviz', 'matplotlib') if m in sys.modules))"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=SCRIPTS, capture_output=True, text=True, check=True)
+    assert proc.stdout.strip().splitlines()[-1] == "[]"
+    assert json.loads(out.read_text())
+
+
+def test_json_to_stdout_is_clean():
+    proc = subprocess.run(
+        [sys.executable, "intro_to_pymc.py", "--no-mcmc", "--json", "-"],
+        cwd=SCRIPTS, capture_output=True, text=True, check=True,
+    )
+    assert json.loads(proc.stdout)["analytical"]["beta"] == 43
+
+
+def test_saving_figures_keeps_the_backend(tmp_path):
+    matplotlib = pytest.importorskip("matplotlib")
+    import matplotlib.pyplot as plt
+
+    from cli import Figures
+
+    previous = matplotlib.get_backend()
+    matplotlib.use("svg")
+    try:
+        mine = plt.figure()
+        figures = Figures(str(tmp_path))
+        plt.figure()
+        figures.finish("figure")
+        assert matplotlib.get_backend() == "svg"
+        assert plt.get_fignums() == [mine.number]
+        assert os.path.exists(figures.saved[0])
+    finally:
+        plt.close("all")
+        matplotlib.use(previous)
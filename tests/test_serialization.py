@@ -0,0 +1,83 @@
+import pytest
+
+from fundamentals.ml_data_structures import ActivationFunction, Layer, Neuron, ReLU, Sigmoid, Vector
+from fundamentals.packed import PackedLayer, PackedNetwork
+from fundamentals.serialization import load_layer, load_network, register_activation, save_layer, save_network
+
+from .strategies import Linear
+
+register_activation(Linear)
+
+
+def make_layer():
+    return Layer([
+        Neuron(Vector([0.1, 0.2, 0.3]), 0.5, Linear()),
+        Neuron(Vector([-1.0, 0.0, 2.0]), -0.25, ReLU()),
+    ])
+
+
+class TestPackedLayer:
+    def test_from_layer(self):
+        packed = PackedLayer.from_layer(make_layer())
+        assert packed.n_inputs == 3
+        assert len(packed) == 2
+        assert list(packed.row(1)) == [-1.0, 0.0, 2.0]
+        assert list(packed.biases) == [0.5, -0.25]
+
+    def test_forward(self):
+        layer = Layer([
+            Neuron(Vector([0.1, 0.2, 0.3]), 0.5, Linear()),
+            Neuron(Vector([-1.0, 0.0, 2.0]), -0.25, Linear()),
+        ])
+        outputs = PackedLayer.from_layer(layer).forward(Vector([1.0, 2.0, 3.0]))
+        assert abs(outputs.values[0] - 1.9) < 1e-12
+        assert outputs.values[1] == 4.75
+
+        with pytest.raises(ValueError):
+            PackedLayer.from_layer(layer).forward(Vector([1.0, 2.0]))
+
+    def test_mismatched_network(self):
+        packed = PackedLayer.from_layer(make_layer())
+        with pytest.raises(ValueError):
+            PackedNetwork([packed, packed])
+
+
+class TestSerialization:
+    def test_layer_roundtrip(self, tmp_path):
+        path = tmp_path / "layer.bin"
+        save_layer(make_layer(), path)
+        loaded = load_layer(path)
+
+        assert isinstance(loaded.weights, memoryview)
+        assert list(loaded.weights) == [0.1, 0.2, 0.3, -1.0, 0.0, 2.0]
+        assert [type(a) for a in loaded.activations] == [Linear, ReLU]
+
+        neuron = loaded.neurons[1]
+        assert neuron.weights.values == [-1.0, 0.0, 2.0]
+        assert neuron.bias == -0.25
+        assert isinstance(neuron.activation, ReLU)
+
+    def test_network_roundtrip(self, tmp_path):
+        first = Layer([Neuron(Vector([1.0, 2.0]), 0.0, Linear()) for _ in range(3)])
+        second = Layer([Neuron(Vector([1.0, 1.0, 1.0]), 1.0, Sigmoid())])
+        path = tmp_path / "network.bin"
+        save_network([first, second], path)
+
+        for use_mmap in (True, False):
+            network = load_network(path, use_mmap=use_mmap)
+            assert [layer.n_inputs for layer in network.layers] == [2, 3]
+            assert list(network[1].biases) == [1.0]
+            # Neurons sharing an activation share one loaded instance
+            assert network[0].activations[0] is network[0].activations[2]
+
+    def test_invalid_files(self, tmp_path):
+        path = tmp_path / "bad.bin"
+        path.write_bytes(b"not a model file")
+        with pytest.raises(ValueError):
+            load_network(path)
+
+        class Unregistered(ActivationFunction):
+            pass
+
+        with pytest.raises(ValueError):
+            save_layer(Layer([Neuron(Vector([1.0]), 0.0, Unregistered())]), path)
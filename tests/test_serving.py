@@ -0,0 +1,219 @@
+import asyncio
+import math
+import threading
+
+import pytest
+
+from fundamentals.ml_data_structures import ActivationFunction, Layer, Neuron, Vector
+from fundamentals.packed import PackedLayer, PackedNetwork
+from fundamentals.serving import InferenceServer, LatencyStats, MicroBatcher, request
+
+from .strategies import Linear
+
+
+def make_layer():
+    return Layer([
+        Neuron(Vector([0.1, 0.2, 0.3]), 0.5, Linear()),
+        Neuron(Vector([-1.0, 0.0, 2.0]), -0.25, Linear()),
+    ])
+
+
+class CountingModel:
+    """Packed layer that records the size of every batch"""
+
+    def __init__(self):
+        self.layer = PackedLayer.from_layer(make_layer())
+        self.n_inputs = self.layer.n_inputs
+        self.batch_sizes = []
+
+    def forward_batch(self, batch):
+        self.batch_sizes.append(len(batch))
+        return self.layer.forward_batch(batch)
+
+
+class Exp(ActivationFunction):
+    def __call__(self, x: float) -> float:
+        return math.exp(x)
+
+    def derivative(self, x: float) -> float:
+        return math.exp(x)
+
+
+class BlockingModel:
+    """Model whose forward pass waits until `release` is set"""
+
+    n_inputs = 3
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def forward_batch(self, batch):
+        self.started.set()
+        self.release.wait(5)
+        return [[0.0] for _ in batch]
+
+
+ROWS = [[float(i), 1.0, -float(i)] for i in range(10)]
+
+
+def test_forward_batch_matches_single_rows():
+    layer = PackedLayer.from_layer(make_layer())
+    network = PackedNetwork([layer, PackedLayer.from_layer(Layer([Neuron(Vector([1.0, -1.0]), 0.0, Linear())]))])
+    for model in (layer, network):
+        assert model.forward_batch(ROWS) == [model.forward_values(row) for row in ROWS]
+    with pytest.raises(ValueError):
+        layer.forward_batch(ROWS + [[1.0]])
+
+
+def test_concurrent_rows_share_a_batch():
+    model = CountingModel()
+
+    async def run():
+        async with MicroBatcher(model, max_batch_size=4, max_wait=10.0) as batcher:
+            return await asyncio.gather(*(batcher.predict(row) for row in ROWS[:8])), batcher.stats
+
+    outputs, stats = asyncio.run(run())
+    assert outputs == model.layer.forward_batch(ROWS[:8])
+    assert model.batch_sizes == [4, 4]
+    assert stats.requests == 8 and stats.batches == 2
+
+
+def test_partial_batch_flushes_after_max_wait():
+    model = CountingModel()
+
+    async def run():
+        async with MicroBatcher(model, max_batch_size=64, max_wait=0.01) as batcher:
+            return await asyncio.wait_for(asyncio.gather(*(batcher.predict(row) for row in ROWS[:3])), 5)
+
+    assert len(asyncio.run(run())) == 3
+    assert model.batch_sizes == [3]
+
+
+def test_wrong_input_length():
+    async def run():
+        async with MicroBatcher(make_layer()) as batcher:
+            await batcher.predict([1.0])
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+
+
+def test_latency_percentiles():
+    stats = LatencyStats()
+    for ms in range(1, 101):
+        stats.record(ms / 1000)
+    stats.record_batch(100, 0.5)
+    snapshot = stats.snapshot()
+    assert snapshot["p50_ms"] == pytest.approx(50.0)
+    assert snapshot["p99_ms"] == pytest.approx(99.0)
+    assert snapshot["mean_batch_size"] == 100
+
+
+def test_http_round_trip():
+    layer = make_layer()
+    packed = PackedLayer.from_layer(layer)
+
+    async def run():
+        async with InferenceServer(layer, port=0, max_batch_size=8, max_wait=0.001) as server:
+            host, port = server.address[:2]
+            reader, writer = await asyncio.open_connection(host, port)
+            single = await request(reader, writer, "POST", "/predict", {"inputs": ROWS[0]})
+            several = await request(reader, writer, "POST", "/predict", {"inputs": ROWS[:5]})
+            bad = await request(reader, writer, "POST", "/predict", {"inputs": [1.0]})
+            missing = await request(reader, writer, "GET", "/nowhere")
+            stats = await request(reader, writer, "GET", "/stats")
+            writer.close()
+            return single, several, bad, missing, stats
+
+    single, several, bad, missing, stats = asyncio.run(run())
+    assert single == (200, {"outputs": packed.forward_values(ROWS[0])})
+    assert several == (200, {"outputs": packed.forward_batch(ROWS[:5])})
+    assert bad[0] == 400 and "Expected 3 inputs" in bad[1]["error"]
+    assert missing[0] == 404
+    assert stats[0] == 200 and stats[1]["requests"] == 6
+
+
+def test_bad_row_fails_alone():
+    layer = Layer([Neuron(Vector([1.0, 0.0, 0.0]), 0.0, Exp())])
+
+    async def run():
+        async with MicroBatcher(layer, max_batch_size=3, max_wait=10.0) as batcher:
+            rows = [[0.0, 0.0, 0.0], [1e6, 0.0, 0.0], [1.0, 0.0, 0.0]]
+            return await asyncio.gather(*(batcher.predict(row) for row in rows), return_exceptions=True), batcher.stats
+
+    (first, bad, last), stats = asyncio.run(run())
+    assert first == [1.0] and last == [pytest.approx(math.e)]
+    assert isinstance(bad, OverflowError)
+    assert stats.errors == 1
+
+
+def test_model_error_is_a_500():
+    layer = Layer([Neuron(Vector([1.0]), 0.0, Exp())])
+
+    async def run():
+        async with InferenceServer(layer, port=0, max_wait=0.001) as server:
+            reader, writer = await asyncio.open_connection(*server.address[:2])
+            failed = await request(reader, writer, "POST", "/predict", {"inputs": [1e6]})
+            # The connection stays usable
+            ok = await request(reader, writer, "POST", "/predict", {"inputs": [0.0]})
+            writer.close()
+            return failed, ok
+
+    failed, ok = asyncio.run(run())
+    assert failed[0] == 500 and "OverflowError" in failed[1]["error"]
+    assert ok == (200, {"outputs": [1.0]})
+
+
+def test_stop_cancels_the_running_batch():
+    model = BlockingModel()
+
+    async def run():
+        batcher = MicroBatcher(model, max_batch_size=1)
+        await batcher.start()
+        future = asyncio.ensure_future(batcher.predict(ROWS[0]))
+        while not model.started.is_set():
+            await asyncio.sleep(0.001)
+        model.release.set()
+        await batcher.stop()
+        return await asyncio.wait_for(asyncio.gather(future, return_exceptions=True), 5)
+
+    (result,) = asyncio.run(run())
+    assert isinstance(result, asyncio.CancelledError)
+
+
+def test_bad_row_fails_alone_without_forward_values():
+    class BatchOnly:
+        n_inputs = 1
+
+        def forward_batch(self, batch):
+            return [[1.0 / row[0]] for row in batch]
+
+    async def run():
+        async with MicroBatcher(BatchOnly(), max_batch_size=3, max_wait=10.0) as batcher:
+            rows = [[2.0], [0.0], [4.0]]
+            return await asyncio.gather(*(batcher.predict(row) for row in rows), return_exceptions=True)
+
+    first, bad, last = asyncio.run(run())
+    assert (first, last) == ([0.5], [0.25])
+    assert isinstance(bad, ZeroDivisionError)
+
+
+def test_stop_does_not_block_the_event_loop():
+    model = BlockingModel()
+
+    async def run():
+        batcher = MicroBatcher(model, max_batch_size=1)
+        await batcher.start()
+        future = asyncio.ensure_future(batcher.predict(ROWS[0]))
+        while not model.started.is_set():
+            await asyncio.sleep(0.001)
+        stopping = asyncio.ensure_future(batcher.stop())
+        # The loop still runs other tasks while the forward pass is blocked
+        await asyncio.wait_for(asyncio.sleep(0.01), 1)
+        assert not stopping.done()
+        model.release.set()
+        await asyncio.wait_for(stopping, 5)
+        return future.cancelled()
+
+    assert asyncio.run(run())
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy.stats")
+
+from conjugate import BetaPosterior, BetaPrior  # noqa: E402
+from streaming import StreamingBetaBinomial  # noqa: E402
+
+METHODS = ["Transit", "Radial Velocity", "Direct Imaging", "Microlensing"]
+ATTEMPTS = [1000, 800, 200, 150]
+SUCCESSES = [450, 320, 25, 18]
+
+
+def test_batches_match_one_conjugate_update():
+    rates = StreamingBetaBinomial(BetaPrior(2, 3))
+    # Every method's counts over 10 batches, each listing every method twice
+    attempts, successes = np.array(ATTEMPTS) // 20, np.array(SUCCESSES) // 20
+    for _ in range(10):
+        rates.update(METHODS * 2, np.tile(attempts, 2), np.tile(successes, 2))
+    expected = BetaPosterior.from_counts(attempts * 20, successes * 20, BetaPrior(2, 3))
+    post = rates.posterior(METHODS)
+    np.testing.assert_allclose(post.alpha, expected.alpha)
+    np.testing.assert_allclose(post.beta, expected.beta)
+    assert rates.methods == METHODS
+    assert rates.summary().index.tolist() == METHODS
+
+
+def test_forgetting_discounts_old_evidence():
+    rates = StreamingBetaBinomial(forgetting=0.5)
+    rates.update("a", 100, 100)
+    rates.update("b", 10, 0)
+    rates.update("b", 10, 0)
+    # "a" was last updated two batches ago: 100 successes * 0.5^2
+    assert rates.evidence(["a"])["successes"].iloc[0] == pytest.approx(25.0)
+    assert rates.evidence(["b"])["failures"].iloc[0] == pytest.approx(15.0)
+    rates.update("a", 10, 0)
+    counts = rates.evidence(["a"]).iloc[0]
+    assert (counts["successes"], counts["failures"]) == pytest.approx((12.5, 10.0))
+
+
+def test_drift_is_tracked():
+    rng = np.random.default_rng(1)
+    static = StreamingBetaBinomial()
+    adaptive = StreamingBetaBinomial(forgetting=0.9)
+    for rate in [0.2] * 100 + [0.6] * 50:
+        k = rng.binomial(100, rate)
+        static.update("m", 100, k)
+        adaptive.update("m", 100, k)
+    assert abs(adaptive.posterior().mean[0] - 0.6) < 0.02
+    assert static.posterior().mean[0] < 0.4
+
+
+def test_checkpoint_round_trip(tmp_path):
+    rates = StreamingBetaBinomial(BetaPrior(2, 3), forgetting=0.9, capacity=2)
+    rates.update(METHODS, ATTEMPTS, SUCCESSES)
+    rates.update(METHODS[:1], [10], [5])
+    path = tmp_path / "rates.json"
+    rates.save(path)
+    restored = StreamingBetaBinomial.load(path)
+    np.testing.assert_allclose(restored.posterior().alpha, rates.posterior().alpha)
+    np.testing.assert_allclose(restored.posterior().beta, rates.posterior().beta)
+    # Pending discounts carry on after restoring
+    restored.update(["new"], [1], [1])
+    rates.update(["new"], [1], [1])
+    np.testing.assert_allclose(restored.posterior().alpha, rates.posterior().alpha)
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_invalid_input():
+    rates = StreamingBetaBinomial()
+    with pytest.raises(ValueError):
+        rates.update(["a"], [1], [2])
+    with pytest.raises(ValueError):
+        rates.update(["a", "b"], [1], [1])
+    with pytest.raises(KeyError):
+        rates.posterior(["missing"])
+    with pytest.raises(ValueError):
+        StreamingBetaBinomial(forgetting=0.0)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from synthetic import GroundTruth, SyntheticDetections, aggregate
+
+
+def test_records_are_seeded_and_within_truth():
+    truth = GroundTruth(mean=0.2, concentration=50.0, min_attempts=5, max_attempts=50)
+    data = SyntheticDetections(n_groups=20, truth=truth, random_seed=3)
+    chunks = list(data.chunks(25_000, chunk_size=10_000))
+    assert [c["group"].size for c in chunks] == [10_000, 10_000, 5_000]
+    again = list(SyntheticDetections(20, truth, random_seed=3).chunks(25_000, chunk_size=10_000))
+    for a, b in zip(chunks, again):
+        for column in ("group", "attempts", "successes"):
+            np.testing.assert_array_equal(a[column], b[column])
+
+    records = pd.concat([pd.DataFrame(c) for c in chunks])
+    assert records["group"].between(0, 19).all()
+    assert records["attempts"].between(5, 50).all()
+    assert (records["successes"] <= records["attempts"]).all()
+    assert data.rates.mean() == pytest.approx(0.2, abs=0.05)
+
+
+def test_aggregate_recovers_rates():
+    data = SyntheticDetections(n_groups=10, random_seed=1)
+    attempts, successes = aggregate(data.chunks(200_000, chunk_size=50_000), 10)
+    frame = data.frame(200_000, chunk_size=50_000)
+    assert attempts.sum() == frame["attempts"].sum()
+    np.testing.assert_allclose(successes / attempts, data.rates, atol=0.005)
+
+
+def test_write_csv_in_chunks(tmp_path):
+    data = SyntheticDetections(n_groups=5, random_seed=2)
+    path = data.write(str(tmp_path / "records.csv"), 2_500, chunk_size=1_000)
+    data.write(path, 2_500, chunk_size=1_000)  # overwrites, does not append
+    frame = pd.read_csv(path)
+    assert list(frame.columns) == ["group", "attempts", "successes"]
+    pd.testing.assert_frame_equal(frame, data.frame(2_500, chunk_size=1_000))
+
+
+def test_write_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    data = SyntheticDetections(n_groups=5, random_seed=2)
+    path = data.write(str(tmp_path / "records.parquet"), 2_500, chunk_size=1_000)
+    pd.testing.assert_frame_equal(pd.read_parquet(path), data.frame(2_500, chunk_size=1_000))
+
+
+def test_invalid_truth():
+    with pytest.raises(ValueError):
+        GroundTruth(mean=1.5)
+    with pytest.raises(ValueError):
+        GroundTruth(min_attempts=10, max_attempts=5)
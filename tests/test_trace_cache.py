@@ -0,0 +1,132 @@
+import os
+
+import numpy as np
+import pytest
+
+pm = pytest.importorskip("pymc")
+
+from trace_cache import TraceCache, model_fingerprint  # noqa: E402
+
+SAMPLE = dict(draws=50, tune=50, chains=1, cores=1, random_seed=1, progressbar=False, compute_convergence_checks=False)
+
+
+def beta_binomial(n=50, k=15, a=2.0):
+    with pm.Model() as model:
+        theta = pm.Beta("theta", alpha=a, beta=8)
+        pm.Binomial("obs", n=n, p=theta, observed=k)
+    return model
+
+
+class TestFingerprint:
+    def test_deterministic(self):
+        assert model_fingerprint(beta_binomial()) == model_fingerprint(beta_binomial())
+
+    def test_sensitive_to_data_and_priors(self):
+        base = model_fingerprint(beta_binomial())
+        assert model_fingerprint(beta_binomial(k=16)) != base
+        assert model_fingerprint(beta_binomial(a=3.0)) != base
+
+    def test_stable_after_sampling(self):
+        model = beta_binomial()
+        before = model_fingerprint(model)
+        with model:
+            trace = pm.sample(**SAMPLE)
+            pm.sample_posterior_predictive(trace, random_seed=2, progressbar=False)
+        assert model_fingerprint(model) == before
+
+    def test_sensitive_to_large_arrays(self):
+        def model(observed):
+            with pm.Model() as m:
+                p = pm.Beta("p", 1, 1)
+                pm.Binomial("obs", n=100, p=p, observed=observed)
+            return m
+
+        counts = np.arange(5000) % 100
+        changed = counts.copy()
+        changed[2500] += 1
+        assert model_fingerprint(model(counts)) != model_fingerprint(model(changed))
+
+
+class TestTraceCache:
+    def test_hit_returns_stored_trace(self, tmp_path):
+        cache = TraceCache(tmp_path)
+        with beta_binomial():
+            first = cache.sample(**SAMPLE)
+            second = cache.sample(**{**SAMPLE, "progressbar": True})
+        assert (cache.hits, cache.misses) == (1, 1)
+        np.testing.assert_array_equal(first.posterior["theta"].values, second.posterior["theta"].values)
+
+    def test_settings_change_key(self, tmp_path):
+        cache = TraceCache(tmp_path)
+        model = beta_binomial()
+        assert cache.key(model, draws=50) != cache.key(model, draws=51)
+        assert cache.key(model, draws=50, progressbar=True) == cache.key(model, draws=50, progressbar=False)
+
+    def test_step_settings_change_key(self, tmp_path):
+        cache = TraceCache(tmp_path)
+        with beta_binomial() as model:
+            low, high = pm.NUTS(target_accept=0.8), pm.NUTS(target_accept=0.99)
+            small = pm.NUTS(target_accept=0.8, step_scale=0.05)
+        keys = [cache.key(model, draws=50, step=step) for step in (low, high, small)]
+        assert len(set(keys)) == 3
+        # Adapting during a run does not change the key of a reused step
+        with model:
+            cache.sample(**SAMPLE, step=low)
+        assert cache.key(model, draws=50, step=low) == keys[0]
+        with model:
+            cache.sample(**SAMPLE, step=low)
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_other_steps_bypass_cache(self, tmp_path):
+        cache = TraceCache(tmp_path)
+        with beta_binomial():
+            cache.sample(**SAMPLE, step=pm.Metropolis())
+        assert cache.entries() == [] and cache.misses == 0
+
+    def test_posterior_predictive(self, tmp_path):
+        cache = TraceCache(tmp_path)
+        with beta_binomial():
+            trace = cache.sample(**SAMPLE)
+            ppc = cache.sample_posterior_predictive(trace, random_seed=2, progressbar=False)
+            again = cache.sample_posterior_predictive(trace, random_seed=2, progressbar=False)
+        assert cache.hits == 1
+        np.testing.assert_array_equal(ppc.posterior_predictive["obs"].values, again.posterior_predictive["obs"].values)
+
+    def test_lru_eviction(self, tmp_path):
+        cache = TraceCache(tmp_path)
+        with beta_binomial():
+            trace = pm.sample(**SAMPLE)
+        for key in "abc":
+            cache.put(key, trace)
+        os.utime(cache.path("a"), (1, 1))
+        os.utime(cache.path("b"), (2, 2))
+        cache.get("a")  # touch: "b" is now the least recently used
+        cache.max_bytes = 2 * cache.path("c").stat().st_size
+        assert cache.evict() == ["b"]
+        assert cache.get("b") is None and cache.get("a") is not None
+
+    def test_invalidate_and_disable(self, tmp_path):
+        cache = TraceCache(tmp_path)
+        with beta_binomial():
+            trace = pm.sample(**SAMPLE)
+        cache.put("a", trace)
+        cache.put("b", trace)
+        assert cache.invalidate("a") == 1
+        assert cache.invalidate() == 1
+        assert cache.entries() == []
+
+        off = TraceCache(tmp_path, enabled=False)
+        off.put("a", trace)
+        assert off.get("a") is None and cache.entries() == []
+
+    def test_corrupt_entry_is_a_miss(self, tmp_path):
+        cache = TraceCache(tmp_path)
+        tmp_path.joinpath("bad.nc").write_bytes(b"not netcdf")
+        assert cache.get("bad") is None
+        assert not cache.path("bad").exists()
+
+    def test_unseeded_runs_bypass_cache(self, tmp_path):
+        cache = TraceCache(tmp_path)
+        with beta_binomial():
+            cache.sample(**{**SAMPLE, "random_seed": None})
+        assert cache.entries() == [] and cache.misses == 0